@@ -12,26 +12,39 @@ src_dir = Path(__file__).parent / "src"
 sys.path.insert(0, str(src_dir))
 
 def main():
-    """Lance l'application Gradio"""
+    """
+    Lance l'application Gradio
+    
+    Le modèle d'encodage se charge et se chauffe en arrière-plan pendant l'import de Gradio
+    et le démarrage du serveur : l'interface répond tout de suite, /ready passe à 200
+    (sonde de disponibilité de l'orchestrateur) quand la recherche est chaude.
+    """
     try:
-        from gradio_app import create_gradio_interface
+        from gradio_app import PlayerSearchApp, create_gradio_interface
         
         print("🚀 Lancement de ScoutRAG...")
         print("📊 Connexion à la base de données vectorielle...")
         
-        # Créer et lancer l'interface
-        interface = create_gradio_interface()
+        # Modèle chargé en arrière-plan dès la création de l'application
+        app = PlayerSearchApp()
+        interface = create_gradio_interface(app)
         
-        print("✅ Application prête !")
-        print("🌐 Interface disponible sur: http://localhost:7860")
+        import gradio as gr
+        import uvicorn
+        from fastapi import FastAPI
+        from search_api import add_monitoring_routes
+        
+        # Sondes /health et /ready, métriques /metrics à côté de l'interface
+        server = FastAPI(title="ScoutRAG")
+        add_monitoring_routes(server, app)
+        server = gr.mount_gradio_app(server, interface, path="/")
+        
+        print("✅ Interface prête ! (modèle chargé en arrière-plan, GET /ready pour la disponibilité)")
+        port = int(os.getenv("GRADIO_SERVER_PORT", "7860"))
+        print(f"🌐 Interface disponible sur: http://localhost:{port}")
         print("⏹️  Appuyez sur Ctrl+C pour arrêter")
         
-        interface.launch(
-            server_name="0.0.0.0",
-            server_port=7860,
-            share=False,
-            show_error=True
-        )
+        uvicorn.run(server, host="0.0.0.0", port=port)
         
     except ImportError as e:
         print(f"❌ Erreur d'import: {e}")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Mesure de débit de l'API JSON de recherche (search_api.py, lancée sans interface)
+Compare une connexion par requête, des connexions réutilisées (keep-alive) et l'endpoint par lots
+
+Usage:
+    python search_api.py --no-ui &
+    python api_bench.py --url http://localhost:8000 --threads 8 --queries 200
+"""
+
+import sys
+import os
+import time
+import queue
+import argparse
+import threading
+import numpy as np
+import requests
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+import config
+from evaluation import load_queries
+
+DEFAULT_QUERIES = [
+    "défenseur central solide avec pressing intense et relance propre",
+    "milieu central polyvalent avec capacité à jouer entre les lignes",
+    "attaquant rapide avec finition et jeu de pointe",
+    "latéral droit offensif avec centres de qualité",
+    "gardien avec sorties aériennes et relance au pied",
+]
+
+
+def run_bench(send, threads: int, jobs: list) -> dict:
+    """Durée totale et latences de `send(session, job)` appelé depuis `threads` threads (une session par thread)"""
+    latencies = []
+    lock = threading.Lock()
+    pending = queue.Queue()
+    for job in jobs:
+        pending.put(job)
+
+    def worker():
+        session = requests.Session()
+        while True:
+            try:
+                job = pending.get_nowait()
+            except queue.Empty:
+                break
+            t0 = time.perf_counter()
+            send(session, job)
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+        session.close()
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "p50_ms": 1000 * float(np.percentile(latencies, 50)),
+        "p95_ms": 1000 * float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit de l'API de recherche ScoutRAG")
+    parser.add_argument("--url", default=f"http://localhost:{config.Config.API_PORT}")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = load_queries(Path(config.DATA_DIR / "player_queries.json")) \
+        if (config.DATA_DIR / "player_queries.json").exists() else []
+    base = [s["query"] for s in samples] or DEFAULT_QUERIES
+    # Requêtes distinctes : le cache de résultats ne doit pas fausser la mesure
+    queries = [f"{base[i % len(base)]} #{i}" for i in range(args.queries)]
+    batches = [queries[i:i + args.batch_size] for i in range(0, len(queries), args.batch_size)]
+
+    def search_new_connection(session, query):
+        requests.post(f"{args.url}/search", json={"query": query, "top_k": args.top_k},
+                      headers={"Connection": "close"}).raise_for_status()
+
+    def search_keep_alive(session, query):
+        session.post(f"{args.url}/search", json={"query": query, "top_k": args.top_k}).raise_for_status()
+
+    def search_batch(session, batch):
+        session.post(f"{args.url}/search/batch", json={"queries": batch, "top_k": args.top_k}).raise_for_status()
+
+    requests.get(f"{args.url}/health").raise_for_status()
+    for name, send, jobs in [
+        ("connexion/req", search_new_connection, queries),
+        ("keep-alive", search_keep_alive, [q + " ka" for q in queries]),
+        (f"lots de {args.batch_size}", search_batch, [[q + " lot" for q in b] for b in batches]),
+    ]:
+        result = run_bench(send, args.threads, jobs)
+        print(f"⚡ {name:<14} {len(queries) / result['seconds']:.1f} requêtes/s | p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Encodage des requêtes par micro-lots
+Les requêtes arrivant en même temps sont regroupées en une seule passe du modèle
+
+Usage (mesure de débit, avec et sans micro-lots):
+    python batch_encoder.py --threads 16 --queries 400
+"""
+
+import time
+import queue
+import threading
+import numpy as np
+from concurrent.futures import Future
+
+
+class MicroBatchEncoder:
+    """
+    File d'encodage devant un SentenceTransformer
+
+    Un thread dédié prend la première requête en attente, attend au plus `max_wait_ms`
+    que d'autres arrivent (jusqu'à `max_batch_size`), encode le lot en une passe
+    et rend à chaque appelant son vecteur.
+    """
+
+    def __init__(self, model, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        """
+        Args:
+            model: Modèle exposant `encode(list[str], ...)`
+            max_batch_size: Taille maximale d'un lot (1 = pas de regroupement)
+            max_wait_ms: Attente maximale pour compléter un lot après la première requête
+        """
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "encoded": 0, "max_batch": 0, "encode_seconds": 0.0}
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="query-encoder", daemon=True)
+        self._worker.start()
+
+    def encode(self, text: str) -> np.ndarray:
+        """Vecteur normalisé de `text` (bloque jusqu'à l'encodage de son lot)"""
+        if self._closed:
+            raise RuntimeError("MicroBatchEncoder fermé")
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _collect(self) -> list:
+        """Premier élément en attente, complété jusqu'à la taille maximale ou l'échéance"""
+        batch = [self._queue.get()]
+        if batch[0] is None:
+            return batch
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is None:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            stop = batch[-1] is None
+            items = [item for item in batch if item is not None]
+            if items:
+                self._encode_batch(items)
+            if stop:
+                return
+
+    def _encode_batch(self, items: list):
+        # Une requête présente plusieurs fois dans le lot n'est encodée qu'une fois
+        texts = list(dict.fromkeys(text for text, _ in items))
+        start = time.perf_counter()
+        try:
+            vectors = self.model.encode(
+                texts,
+                batch_size=len(texts),
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+
+        by_text = dict(zip(texts, vectors))
+        for text, future in items:
+            future.set_result(by_text[text])
+
+        with self._lock:
+            self._stats["requests"] += len(items)
+            self._stats["batches"] += 1
+            self._stats["encoded"] += len(texts)
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(items))
+            self._stats["encode_seconds"] += elapsed
+
+    def stats(self) -> dict:
+        """Nombre de lots, taille moyenne et durée moyenne d'une passe (ms)"""
+        with self._lock:
+            stats = dict(self._stats)
+        batches = stats["batches"]
+        stats["mean_batch"] = round(stats["requests"] / batches, 2) if batches else 0.0
+        stats["mean_encode_ms"] = round(1000 * stats.pop("encode_seconds") / batches, 3) if batches else 0.0
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait * 1000
+        return stats
+
+    def close(self):
+        """Arrête le thread d'encodage après les lots en attente"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._worker.join()
+
+
+def _bench(encode, threads: int, queries: list[str]) -> dict:
+    """Débit et latences de `encode` appelé depuis `threads` threads"""
+    latencies = []
+    lock = threading.Lock()
+    pending = queue.Queue()
+    for q in queries:
+        pending.put(q)
+
+    def worker():
+        while True:
+            try:
+                q = pending.get_nowait()
+            except queue.Empty:
+                return
+            t0 = time.perf_counter()
+            encode(q)
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "qps": len(queries) / elapsed,
+        "p50_ms": 1000 * float(np.percentile(latencies, 50)),
+        "p95_ms": 1000 * float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    import argparse
+    import sys
+    import os
+
+    parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    if parent_dir not in sys.path:
+        sys.path.append(parent_dir)
+    import config
+    from embedding_model import load_sentence_transformer
+
+    parser = argparse.ArgumentParser(description="Débit de l'encodage des requêtes")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--max-batch-size", type=int, default=config.Config.QUERY_BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=config.Config.QUERY_BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    model = load_sentence_transformer()
+    base = ["défenseur central solide avec pressing intense", "milieu créatif avec jeu entre les lignes",
+            "attaquant rapide avec finition", "latéral offensif avec centres de qualité"]
+    queries = [f"{base[i % len(base)]} {i}" for i in range(args.queries)]
+
+    lock = threading.Lock()
+    def direct(text):
+        # Le modèle est partagé : une passe à la fois, comme dans l'application sans micro-lots
+        with lock:
+            return model.encode(text, normalize_embeddings=True)
+
+    encoder = MicroBatchEncoder(model, args.max_batch_size, args.max_wait_ms)
+    for name, encode in [("direct", direct), ("micro-lots", encoder.encode)]:
+        encode(queries[0])  # chauffe
+        result = _bench(encode, args.threads, queries)
+        print(f"⚡ {name:<10} {result['qps']:.1f} req/s | p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms")
+    print(f"📦 {encoder.stats()}")
+    encoder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Génération des résumés via l'API Batch d'OpenAI
+Écrit les prompts dans un JSONL, soumet le lot, suit son avancement et ingère le fichier de résultats
+"""
+
+import json
+import time
+import hashlib
+from pathlib import Path
+from openai import OpenAI
+
+from summary_generator import build_chat_request
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def custom_id_for(key: str) -> str:
+    """custom_id stable et court pour une clé joueur (la clé peut contenir n'importe quel caractère)"""
+    return "player-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+class BatchSummaryRunner:
+    """
+    Cycle de vie d'un lot de résumés : préparation, soumission, suivi, ingestion
+
+    L'état du lot en cours (identifiant, correspondance custom_id -> clé joueur)
+    est persisté dans `work_dir` : le processus peut s'arrêter après la soumission
+    et une exécution ultérieure reprendra le suivi puis l'ingestion.
+    """
+
+    def __init__(self, client: OpenAI, model: str, work_dir: Path,
+                 completion_window: str = "24h", poll_interval: float = 60.0):
+        """
+        Args:
+            client: Client OpenAI (base_url configurable pour un serveur de test)
+            model: Modèle de chat à utiliser
+            work_dir: Dossier des fichiers du lot (requêtes, correspondances, état)
+            completion_window: Fenêtre de traitement demandée à l'API
+            poll_interval: Intervalle entre deux vérifications du statut (s)
+        """
+        self.client = client
+        self.model = model
+        self.work_dir = Path(work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.completion_window = completion_window
+        self.poll_interval = poll_interval
+        self.state_path = self.work_dir / "batch_state.json"
+        # Tokens facturés des réponses ingérées
+        self.usage = {"prompt_tokens": 0, "completion_tokens": 0}
+
+    def load_state(self) -> dict | None:
+        """État du lot en cours (None si aucun)"""
+        if not self.state_path.exists():
+            return None
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self, state: dict | None):
+        if state is None:
+            self.state_path.unlink(missing_ok=True)
+            return
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        tmp_path.replace(self.state_path)
+
+    def write_requests(self, prompts: dict) -> tuple[Path, dict]:
+        """
+        Écrit le fichier JSONL des requêtes
+
+        Returns:
+            (chemin du JSONL, correspondance {custom_id: clé joueur})
+        """
+        requests_path = self.work_dir / f"requests_{time.strftime('%Y%m%d%H%M%S')}.jsonl"
+        mapping = {}
+        with open(requests_path, "w", encoding="utf-8") as f:
+            for key, prompt in prompts.items():
+                custom_id = custom_id_for(key)
+                if custom_id in mapping and mapping[custom_id] != key:
+                    raise ValueError(f"Collision de custom_id pour {key} et {mapping[custom_id]}")
+                mapping[custom_id] = key
+                f.write(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": build_chat_request(prompt, self.model),
+                }, ensure_ascii=False) + "\n")
+        return requests_path, mapping
+
+    def submit(self, prompts: dict) -> dict:
+        """Prépare et soumet un lot, puis persiste son état"""
+        requests_path, mapping = self.write_requests(prompts)
+        with open(requests_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+            metadata={"source": "scoutrag", "requests": str(len(mapping))}
+        )
+        state = {
+            "batch_id": batch.id,
+            "input_file_id": input_file.id,
+            "requests_path": str(requests_path),
+            "mapping": mapping,
+            "submitted_at": time.time(),
+        }
+        self._save_state(state)
+        print(f"📤 Lot soumis: {batch.id} ({len(mapping)} requêtes)")
+        return state
+
+    def poll(self, batch_id: str, wait: bool = True):
+        """Récupère le statut du lot, en attendant sa fin si `wait`"""
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            counts = getattr(batch, "request_counts", None)
+            progress = f" ({counts.completed}/{counts.total})" if counts else ""
+            print(f"⏳ Lot {batch_id}: {batch.status}{progress}")
+            if batch.status in TERMINAL_STATUSES or not wait:
+                return batch
+            time.sleep(self.poll_interval)
+
+    def _read_file(self, file_id: str | None) -> list[dict]:
+        if not file_id:
+            return []
+        content = self.client.files.content(file_id).text
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    def ingest(self, batch, mapping: dict, on_result) -> tuple[int, list[str]]:
+        """
+        Lit les fichiers de résultats et d'erreurs d'un lot terminé
+
+        Args:
+            batch: Lot terminé (tel que renvoyé par `poll`)
+            mapping: Correspondance {custom_id: clé joueur}
+            on_result: Callback (clé, résumé) pour chaque réponse réussie
+
+        Returns:
+            (nombre de résumés ingérés, clés en échec ou sans réponse)
+        """
+        ingested = set()
+        for line in self._read_file(getattr(batch, "output_file_id", None)):
+            key = mapping.get(line.get("custom_id"))
+            response = line.get("response") or {}
+            if key is None or line.get("error") or response.get("status_code") != 200:
+                continue
+            try:
+                summary = response["body"]["choices"][0]["message"]["content"].strip()
+            except (KeyError, IndexError, AttributeError):
+                continue
+            on_result(key, summary)
+            ingested.add(key)
+            usage = response["body"].get("usage") or {}
+            self.usage["prompt_tokens"] += usage.get("prompt_tokens") or 0
+            self.usage["completion_tokens"] += usage.get("completion_tokens") or 0
+
+        for line in self._read_file(getattr(batch, "error_file_id", None)):
+            key = mapping.get(line.get("custom_id"))
+            error = line.get("error") or (line.get("response") or {}).get("body", {}).get("error")
+            if key is not None:
+                print(f"⚠️ Erreur pour {key}: {error}")
+
+        failed = [key for key in mapping.values() if key not in ingested]
+        return len(ingested), failed
+
+    def run(self, prompts: dict, on_result, wait: bool = True) -> tuple[int, list[str]] | None:
+        """
+        Soumet un lot (ou reprend le lot en cours) et l'ingère s'il est terminé
+
+        Returns:
+            (résumés ingérés, clés en échec), ou None si le lot est encore en cours
+        """
+        state = self.load_state()
+        if state is None:
+            if not prompts:
+                return 0, []
+            state = self.submit(prompts)
+        else:
+            print(f"♻️ Reprise du lot en cours: {state['batch_id']}")
+
+        batch = self.poll(state["batch_id"], wait=wait)
+        if batch.status not in TERMINAL_STATUSES:
+            return None
+
+        result = self.ingest(batch, state["mapping"], on_result)
+        self._save_state(None)
+        return result
@@ -0,0 +1,313 @@
+"""
+Index BM25 persistant sur tout le corpus de la collection Qdrant
+Construit à l'indexation, chargé par memory-map au démarrage de l'application
+"""
+
+import re
+import json
+import hashlib
+import numpy as np
+from pathlib import Path
+from dataclasses import dataclass, field
+
+from generations import GenerationStore
+
+FORMAT_VERSION = 1
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_PROFIL_RE = re.compile(r"Profil-type\s*:\s*(.+)", flags=re.IGNORECASE)
+
+# Fichiers d'une génération de l'index
+_ARRAYS = ("doc_len", "idf", "postings_indptr", "postings_docs", "postings_weight",
+           "forward_indptr", "forward_terms", "forward_tf")
+
+
+def tokenize(text: str) -> list[str]:
+    """Tokens BM25 (mots en minuscules)"""
+    return _WORD_RE.findall((text or "").lower())
+
+
+def document_text(summary: str) -> str:
+    """Texte indexé pour un joueur : profil-type puis résumé complet"""
+    m = _PROFIL_RE.search(summary or "")
+    profil_type = m.group(1).strip() if m else ""
+    return f"{profil_type} {summary or ''}".strip()
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class BM25Snapshot:
+    """
+    Génération chargée de l'index (memory-map), en lecture seule
+
+    Les scores d'une requête ne valent que pour l'instantané qui les a calculés (positions
+    de `doc_ids`) : un appelant qui enchaîne `scores` puis `scores_for` ou `search` les
+    appelle sur le même instantané.
+    """
+    manifest: dict | None = None
+    vocab: dict = field(default_factory=dict)
+    doc_ids: list = field(default_factory=list)
+    doc_hashes: list = field(default_factory=list)
+    arrays: dict = field(default_factory=dict)
+    position: dict = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Scores BM25 de tous les documents pour la requête (ordre de `doc_ids`)"""
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        if not self.doc_ids:
+            return scores
+        indptr = self.arrays["postings_indptr"]
+        docs = self.arrays["postings_docs"]
+        weights = self.arrays["postings_weight"]
+        # Un terme répété dans la requête compte plusieurs fois (comme BM25Okapi)
+        for token in tokenize(query):
+            term = self.vocab.get(token)
+            if term is None:
+                continue
+            start, end = indptr[term], indptr[term + 1]
+            # Un document apparaît au plus une fois par liste de postings
+            scores[docs[start:end]] += weights[start:end]
+        return scores
+
+    def scores_for(self, query: str, doc_ids: list, scores: np.ndarray | None = None) -> np.ndarray:
+        """
+        Scores BM25 (IDF du corpus entier) des documents demandés ; 0 pour un document inconnu
+
+        Args:
+            scores: Scores de tout le corpus déjà calculés pour `query` par cet instantané
+        """
+        all_scores = self.scores(query) if scores is None else scores
+        positions = np.array([self.position.get(str(doc_id), -1) for doc_id in doc_ids], dtype=np.int64)
+        result = np.zeros(len(doc_ids), dtype=np.float32)
+        known = positions >= 0
+        result[known] = all_scores[positions[known]]
+        return result
+
+    def search(self, query: str, top_k: int, scores: np.ndarray | None = None) -> list[tuple[str, float]]:
+        """Les `top_k` meilleurs documents : [(id, score)], scores nuls exclus"""
+        scores = self.scores(query) if scores is None else scores
+        if scores.size == 0 or top_k <= 0:
+            return []
+        top_k = min(top_k, scores.size)
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.doc_ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+_EMPTY = BM25Snapshot()
+
+
+class BM25Index:
+    """
+    Index inversé BM25 (Okapi) stocké en tableaux NumPy
+
+    - postings au format CSR : pour le terme t, `postings_docs[indptr[t]:indptr[t+1]]`
+      et le poids BM25 pré-calculé de chaque occurrence (IDF x saturation du tf)
+    - index direct (terme, tf par document) conservé pour les mises à jour incrémentales :
+      seuls les documents nouveaux ou modifiés sont re-tokenisés
+    - chaque mise à jour écrit une nouvelle génération `gen-<n>/` puis bascule `manifest.json`
+      de manière atomique (`GenerationStore`) ; la génération chargée est un `BM25Snapshot`
+      remplacé d'un bloc, lu une seule fois par requête
+    """
+
+    def __init__(self, root: Path, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        """
+        Args:
+            root: Dossier de l'index (ex: data/bm25_index/ragscout_players)
+            k1, b: Paramètres BM25
+            epsilon: Plancher des IDF négatifs (fraction de l'IDF moyen, comme rank_bm25)
+        """
+        self.root = Path(root)
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self._generations = GenerationStore(self.root, FORMAT_VERSION, self._read_generation)
+
+    # ------------------------------------------------------------------ lecture
+
+    def _read_generation(self, gen_dir: Path, manifest: dict) -> BM25Snapshot:
+        with open(gen_dir / "vocab.json", "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        with open(gen_dir / "docs.json", "r", encoding="utf-8") as f:
+            docs = json.load(f)
+        self.k1, self.b = manifest["k1"], manifest["b"]
+        return BM25Snapshot(
+            manifest=manifest,
+            vocab=vocab,
+            doc_ids=docs["ids"],
+            doc_hashes=docs["hashes"],
+            arrays={name: np.load(gen_dir / f"{name}.npy", mmap_mode="r") for name in _ARRAYS},
+            position={doc_id: i for i, doc_id in enumerate(docs["ids"])},
+        )
+
+    def load(self) -> bool:
+        """Charge la génération courante (memory-map). Faux si l'index n'existe pas."""
+        return self._generations.load()
+
+    def reload_if_changed(self) -> bool:
+        """Recharge l'index si une nouvelle génération a été publiée. Vrai si rechargé."""
+        return self._generations.reload_if_changed()
+
+    def snapshot(self) -> BM25Snapshot:
+        """Génération chargée (vide avant le premier chargement)"""
+        return self._generations.snapshot or _EMPTY
+
+    @property
+    def manifest(self) -> dict | None:
+        return self.snapshot().manifest
+
+    @property
+    def vocab(self) -> dict:
+        return self.snapshot().vocab
+
+    @property
+    def doc_ids(self) -> list:
+        return self.snapshot().doc_ids
+
+    def __len__(self) -> int:
+        return len(self.snapshot())
+
+    def scores(self, query: str) -> np.ndarray:
+        """Scores BM25 de tous les documents pour la requête (voir `BM25Snapshot.scores`)"""
+        return self.snapshot().scores(query)
+
+    def scores_for(self, query: str, doc_ids: list, scores: np.ndarray | None = None) -> np.ndarray:
+        """
+        Scores des documents demandés (voir `BM25Snapshot.scores_for`)
+        Avec `scores` calculés par un appel précédent, passer plutôt par `snapshot()` :
+        une nouvelle génération a pu être chargée entre les deux appels.
+        """
+        return self.snapshot().scores_for(query, doc_ids, scores)
+
+    def search(self, query: str, top_k: int, scores: np.ndarray | None = None) -> list[tuple[str, float]]:
+        """Les `top_k` meilleurs documents (voir `BM25Snapshot.search`)"""
+        return self.snapshot().search(query, top_k, scores)
+
+    # ------------------------------------------------------------------ écriture
+
+    def sync(self, documents: dict) -> dict:
+        """
+        Aligne l'index sur le corpus : {id: texte}
+
+        Seuls les documents nouveaux ou dont le texte a changé sont tokenisés ;
+        IDF, longueurs et poids sont recalculés de façon vectorisée.
+
+        Returns:
+            {"added": n, "updated": n, "deleted": n, "unchanged": n}
+        """
+        if self.manifest is None:
+            self.load()
+        snapshot = self.snapshot()
+
+        documents = {str(doc_id): text for doc_id, text in documents.items()}
+        hashes = {doc_id: _text_hash(text) for doc_id, text in documents.items()}
+
+        # Documents conservés tels quels (ordre existant), puis nouveaux/modifiés
+        keep = np.array([
+            doc_id in hashes and hashes[doc_id] == doc_hash
+            for doc_id, doc_hash in zip(snapshot.doc_ids, snapshot.doc_hashes)
+        ], dtype=bool)
+        kept_ids = [doc_id for doc_id, k in zip(snapshot.doc_ids, keep) if k]
+        kept_set = set(kept_ids)
+        changed_ids = [doc_id for doc_id in documents if doc_id not in kept_set]
+
+        stats = {
+            "added": sum(1 for doc_id in changed_ids if doc_id not in snapshot.position),
+            "updated": sum(1 for doc_id in changed_ids if doc_id in snapshot.position),
+            "deleted": sum(1 for doc_id in snapshot.doc_ids if doc_id not in hashes),
+            "unchanged": len(kept_ids),
+        }
+        if not changed_ids and stats["deleted"] == 0 and snapshot.manifest is not None:
+            return stats
+
+        vocab = dict(snapshot.vocab)
+        fwd_indptr, fwd_terms, fwd_tf = self._kept_forward_rows(snapshot, keep)
+
+        new_terms, new_tf, new_lengths = [], [], []
+        for doc_id in changed_ids:
+            counts = {}
+            for token in tokenize(documents[doc_id]):
+                term = vocab.setdefault(token, len(vocab))
+                counts[term] = counts.get(term, 0) + 1
+            new_terms.append(np.fromiter(counts.keys(), dtype=np.int32, count=len(counts)))
+            new_tf.append(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+            new_lengths.append(len(counts))
+
+        if changed_ids:
+            fwd_terms = np.concatenate([fwd_terms] + new_terms)
+            fwd_tf = np.concatenate([fwd_tf] + new_tf)
+            fwd_indptr = np.concatenate([fwd_indptr, fwd_indptr[-1] + np.cumsum(new_lengths)])
+
+        doc_ids = kept_ids + changed_ids
+        doc_hashes = [hashes[doc_id] for doc_id in doc_ids]
+        self._write_generation(vocab, doc_ids, doc_hashes, fwd_indptr, fwd_terms, fwd_tf)
+        return stats
+
+    @staticmethod
+    def _kept_forward_rows(snapshot: BM25Snapshot, keep: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Lignes de l'index direct des documents conservés (sélection vectorisée)"""
+        if not snapshot.doc_ids:
+            return np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        indptr = np.asarray(snapshot.arrays["forward_indptr"])
+        lengths = np.diff(indptr)
+        entry_doc = np.repeat(np.arange(len(snapshot.doc_ids)), lengths)
+        entry_mask = keep[entry_doc]
+        kept_indptr = np.concatenate([[0], np.cumsum(lengths[keep])]).astype(np.int64)
+        return (kept_indptr,
+                np.asarray(snapshot.arrays["forward_terms"])[entry_mask],
+                np.asarray(snapshot.arrays["forward_tf"])[entry_mask])
+
+    def _write_generation(self, vocab: dict, doc_ids: list, doc_hashes: list,
+                          fwd_indptr: np.ndarray, fwd_terms: np.ndarray, fwd_tf: np.ndarray):
+        """Calcule postings, longueurs et IDF puis publie une nouvelle génération"""
+        n_docs, n_terms = len(doc_ids), len(vocab)
+        entry_doc = np.repeat(np.arange(n_docs, dtype=np.int32), np.diff(fwd_indptr))
+
+        doc_len = np.bincount(entry_doc, weights=fwd_tf, minlength=n_docs).astype(np.float32)
+        avgdl = float(doc_len.mean()) if n_docs else 0.0
+
+        # IDF Okapi, avec plancher epsilon x IDF moyen pour les termes très fréquents
+        df = np.bincount(fwd_terms, minlength=n_terms).astype(np.float64)
+        idf = np.log((n_docs - df + 0.5) / (df + 0.5))
+        used = df > 0
+        if used.any():
+            idf[idf < 0] = self.epsilon * idf[used].mean()
+        idf = idf.astype(np.float32)
+
+        # Postings triés par terme puis document ; poids BM25 pré-calculés
+        order = np.lexsort((entry_doc, fwd_terms))
+        postings_docs = entry_doc[order]
+        tf = fwd_tf[order]
+        terms = fwd_terms[order]
+        postings_indptr = np.concatenate([[0], np.cumsum(np.bincount(fwd_terms, minlength=n_terms))]).astype(np.int64)
+        norm = self.k1 * (1 - self.b + self.b * doc_len[postings_docs] / max(avgdl, 1e-9))
+        postings_weight = (idf[terms] * tf * (self.k1 + 1) / (tf + norm)).astype(np.float32)
+
+        arrays = {
+            "doc_len": doc_len,
+            "idf": idf,
+            "postings_indptr": postings_indptr,
+            "postings_docs": postings_docs,
+            "postings_weight": postings_weight,
+            "forward_indptr": fwd_indptr.astype(np.int64),
+            "forward_terms": fwd_terms.astype(np.int32),
+            "forward_tf": fwd_tf.astype(np.float32),
+        }
+
+        def write(gen_dir: Path):
+            for name, array in arrays.items():
+                np.save(gen_dir / f"{name}.npy", array)
+            with open(gen_dir / "vocab.json", "w", encoding="utf-8") as f:
+                json.dump(vocab, f, ensure_ascii=False)
+            with open(gen_dir / "docs.json", "w", encoding="utf-8") as f:
+                json.dump({"ids": doc_ids, "hashes": doc_hashes}, f)
+
+        self._generations.publish(
+            write, documents=n_docs, terms=n_terms, avgdl=avgdl, k1=self.k1, b=self.b
+        )
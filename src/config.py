@@ -24,11 +24,152 @@ class Config:
     # OpenAI
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    # URL alternative (proxy, serveur de test compatible OpenAI)
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+    OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+    OPENAI_TPM = int(os.getenv("OPENAI_TPM", "200000"))
+    SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "16"))
+    SUMMARY_MAX_RETRIES = int(os.getenv("SUMMARY_MAX_RETRIES", "6"))
+    # Politique fsync du journal des résumés : full | normal
+    SUMMARY_JOURNAL_SYNC = os.getenv("SUMMARY_JOURNAL_SYNC", "full").lower()
+    SUMMARY_CLAIM_LEASE = int(os.getenv("SUMMARY_CLAIM_LEASE", "900"))
+    # Mode de génération : async (appels directs) | batch (API Batch OpenAI)
+    SUMMARY_MODE = os.getenv("SUMMARY_MODE", "async").lower()
+    BATCH_WAIT = os.getenv("BATCH_WAIT", "True").lower() == "true"
+    BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "60"))
+    BATCH_CLAIM_LEASE = int(os.getenv("BATCH_CLAIM_LEASE", str(26 * 3600)))
     
     # Application
     DEBUG = os.getenv("DEBUG", "True").lower() == "true"
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     
+    # Embeddings
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-m3")
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    EMBEDDING_MULTI_PROCESS = os.getenv("EMBEDDING_MULTI_PROCESS", "False").lower() == "true"
+    EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", str(os.cpu_count() or 1)))
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+    # Exécution du modèle : torch | torch-int8 (quantification dynamique) | onnx | onnx-int8 (onnxruntime, CPU)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+    # Backend autre que torch utilisé seulement s'il a passé la vérification de parité (evaluation.py --encoder-parity)
+    EMBEDDING_PARITY_REQUIRED = os.getenv("EMBEDDING_PARITY_REQUIRED", "True").lower() == "true"
+    # Seuils de la vérification : cosinus minimal (1er centile) avec torch, perte de nDCG maximale
+    EMBEDDING_PARITY_MIN_COSINE = float(os.getenv("EMBEDDING_PARITY_MIN_COSINE", "0.98"))
+    EMBEDDING_PARITY_MAX_NDCG_DROP = float(os.getenv("EMBEDDING_PARITY_MAX_NDCG_DROP", "0.01"))
+    EMBEDDING_PARITY_SAMPLES = int(os.getenv("EMBEDDING_PARITY_SAMPLES", "200"))
+    # Threads de calcul de l'encodeur (0 = valeur par défaut du backend)
+    EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+    # Longueur maximale en tokens (0 = celle du modèle, 8192 pour bge-m3)
+    EMBEDDING_MAX_SEQ_LENGTH = int(os.getenv("EMBEDDING_MAX_SEQ_LENGTH", "0"))
+    # Jeu d'instructions ciblé par la quantification : arm64 | avx2 | avx512 | avx512_vnni
+    EMBEDDING_ONNX_QCONFIG = os.getenv("EMBEDDING_ONNX_QCONFIG", "avx512_vnni").lower()
+    EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", str(DATA_DIR / "onnx_models"))
+    # Démarrage de l'application : modèle chargé en arrière-plan, puis chauffé avant d'être déclaré prêt
+    EMBEDDING_BACKGROUND_LOAD = os.getenv("EMBEDDING_BACKGROUND_LOAD", "True").lower() == "true"
+    EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "True").lower() == "true"
+    
+    # Qdrant : serveur (QDRANT_URL) ou embarqué sans serveur (QDRANT_PATH, ex: data/qdrant_local)
+    QDRANT_URL = os.getenv("QDRANT_URL", "localhost")
+    QDRANT_PATH = os.getenv("QDRANT_PATH", "")
+    # recreate | incremental | bluegreen
+    QDRANT_SYNC_MODE = os.getenv("QDRANT_SYNC_MODE", "incremental").lower()
+    QDRANT_UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "100"))
+    # Quantification des vecteurs : none | int8 | binary (originaux conservés pour le rescoring)
+    QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none").lower()
+    QDRANT_VECTORS_ON_DISK = os.getenv("QDRANT_VECTORS_ON_DISK", "False").lower() == "true"
+    QDRANT_PAYLOAD_ON_DISK = os.getenv("QDRANT_PAYLOAD_ON_DISK", "False").lower() == "true"
+    # Recherche sur vecteurs quantifiés : rescoring sur les originaux, sur-échantillonnage
+    QDRANT_RESCORE = os.getenv("QDRANT_RESCORE", "True").lower() == "true"
+    QDRANT_OVERSAMPLING = float(os.getenv("QDRANT_OVERSAMPLING", "2.0"))
+    # Mesure du rappel des vecteurs quantifiés face à la recherche exacte float32
+    QUANTIZATION_EVAL_SAMPLES = int(os.getenv("QUANTIZATION_EVAL_SAMPLES", "100"))
+    # Vecteur réduit "mini" (premières composantes renormalisées) stocké à côté du vecteur "full"
+    # 0 = vecteur unique ; changer cette valeur impose une collection neuve (bluegreen/recreate)
+    QDRANT_MINI_DIM = int(os.getenv("QDRANT_MINI_DIM", "0"))
+    
+    # Backend de la recherche dense : qdrant | numpy (exact, memory-map) | faiss
+    # numpy et faiss lisent un export local de la collection (un sous-dossier par collection)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+    VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", str(DATA_DIR / "vector_index"))
+    # Index FAISS : hnsw | ivf
+    FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "hnsw").lower()
+    FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+    FAISS_HNSW_EF = int(os.getenv("FAISS_HNSW_EF", "128"))
+    FAISS_IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", "64"))
+    FAISS_IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", "8"))
+    
+    # Table des plus proches voisins ("joueurs similaires"), recalculée à l'indexation
+    NEIGHBORS_DIR = os.getenv("NEIGHBORS_DIR", str(DATA_DIR / "neighbors"))
+    NEIGHBORS_K = int(os.getenv("NEIGHBORS_K", "100"))
+    
+    # Index BM25 du corpus (un sous-dossier par collection)
+    BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", str(DATA_DIR / "bm25_index"))
+    
+    # Recherche hybride
+    # Fusion des listes dense et lexicale : normalized | rrf
+    SEARCH_FUSION = os.getenv("SEARCH_FUSION", "normalized").lower()
+    SEARCH_DENSE_WEIGHT = float(os.getenv("SEARCH_DENSE_WEIGHT", "0.75"))
+    SEARCH_SPARSE_WEIGHT = float(os.getenv("SEARCH_SPARSE_WEIGHT", "0.25"))
+    SEARCH_RRF_K = int(os.getenv("SEARCH_RRF_K", "60"))
+    SEARCH_DENSE_TOP_N = int(os.getenv("SEARCH_DENSE_TOP_N", "50"))
+    SEARCH_SPARSE_TOP_N = int(os.getenv("SEARCH_SPARSE_TOP_N", "50"))
+    # Pré-filtres : une contrainte déduite de la requête (poste, ligues, âge, saison) n'est filtrée
+    # que si le filtre cumulé garde au moins FILTER_MIN_MATCHES joueurs, sinon elle reste un boost
+    FILTER_MIN_MATCHES = int(os.getenv("FILTER_MIN_MATCHES", "20"))
+    # Sous-ensemble filtré d'au plus FILTER_ID_LIST_MAX joueurs : recherche lexicale restreinte à ses identifiants
+    FILTER_ID_LIST_MAX = int(os.getenv("FILTER_ID_LIST_MAX", "2000"))
+    FILTER_COUNT_CACHE_TTL = float(os.getenv("FILTER_COUNT_CACHE_TTL", "3600"))
+    # Recherche dense en deux temps : pré-sélection sur "mini", reclassement sur "full"
+    SEARCH_TWO_STAGE = os.getenv("SEARCH_TWO_STAGE", "False").lower() == "true"
+    SEARCH_TWO_STAGE_OVERSAMPLING = float(os.getenv("SEARCH_TWO_STAGE_OVERSAMPLING", "4.0"))
+    
+    # Caches de la recherche (taille 0 = désactivé, TTL en secondes)
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "512"))
+    RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+    COLLECTION_VERSION_INTERVAL = float(os.getenv("COLLECTION_VERSION_INTERVAL", "5"))
+    # Encodage des requêtes par micro-lots (taille 1 = pas de regroupement)
+    QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "16"))
+    QUERY_BATCH_MAX_WAIT_MS = float(os.getenv("QUERY_BATCH_MAX_WAIT_MS", "5"))
+    # Concurrence de la recherche : exécuteur des étapes CPU, file d'attente Gradio
+    SEARCH_CPU_WORKERS = int(os.getenv("SEARCH_CPU_WORKERS", "8"))
+    GRADIO_CONCURRENCY = int(os.getenv("GRADIO_CONCURRENCY", "16"))
+    GRADIO_QUEUE_MAX_SIZE = int(os.getenv("GRADIO_QUEUE_MAX_SIZE", "64"))
+    # API JSON de recherche (search_api.py)
+    API_HOST = os.getenv("API_HOST", "0.0.0.0")
+    API_PORT = int(os.getenv("API_PORT", "8000"))
+    API_KEEPALIVE_SECONDS = int(os.getenv("API_KEEPALIVE_SECONDS", "30"))
+    API_MAX_BATCH = int(os.getenv("API_MAX_BATCH", "32"))
+    # Télémétrie de la recherche : métriques sur GET /metrics, journal JSON d'une ligne par requête
+    SEARCH_LOG_ENABLED = os.getenv("SEARCH_LOG_ENABLED", "False").lower() == "true"
+    SEARCH_LOG_PATH = os.getenv("SEARCH_LOG_PATH", str(LOGS_DIR / "search.jsonl"))
+    # Ne journaliser que les requêtes plus lentes (ms, 0 = toutes) ; les erreurs le sont toujours
+    SEARCH_LOG_SLOW_MS = float(os.getenv("SEARCH_LOG_SLOW_MS", "0"))
+    SEARCH_LOG_MAX_BYTES = int(os.getenv("SEARCH_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+    SEARCH_LOG_BACKUPS = int(os.getenv("SEARCH_LOG_BACKUPS", "5"))
+    
+    # Partitions ingérées : saisons x ligues FBref (listes séparées par des virgules)
+    SEASONS = [s.strip() for s in os.getenv("SEASONS", "2425").split(",") if s.strip()]
+    LEAGUES = [l.strip() for l in os.getenv("LEAGUES", "Big 5 European Leagues Combined").split(",") if l.strip()]
+    # Partitions construites simultanément (limites OpenAI réparties entre elles)
+    PARTITION_WORKERS = int(os.getenv("PARTITION_WORKERS", "2"))
+    # Profil de chaque exécution du pipeline : rapport JSON par exécution, comparé au précédent
+    PIPELINE_REPORT_DIR = os.getenv("PIPELINE_REPORT_DIR", str(LOGS_DIR / "pipeline_runs"))
+    # Profils cProfile par étape (--profile) ; les partitions sont alors construites une à une
+    PIPELINE_PROFILE = os.getenv("PIPELINE_PROFILE", "False").lower() == "true"
+    PIPELINE_PROFILE_DIR = os.getenv("PIPELINE_PROFILE_DIR", str(LOGS_DIR / "pipeline_profiles"))
+    # Régression : débit (ou durée) dégradé de plus de 20 %, écart d'au moins 2 s
+    PIPELINE_REGRESSION_THRESHOLD = float(os.getenv("PIPELINE_REGRESSION_THRESHOLD", "0.2"))
+    PIPELINE_REGRESSION_MIN_SECONDS = float(os.getenv("PIPELINE_REGRESSION_MIN_SECONDS", "2"))
+    
+    # FBref
+    # Durée de validité du cache des pages et tables (0 = jamais expiré)
+    FBREF_CACHE_TTL_HOURS = float(os.getenv("FBREF_CACHE_TTL_HOURS", "24"))
+    FBREF_MAX_WORKERS = int(os.getenv("FBREF_MAX_WORKERS", "6"))
+    FBREF_PER_HOST_LIMIT = int(os.getenv("FBREF_PER_HOST_LIMIT", "2"))
+    FBREF_MIN_INTERVAL = float(os.getenv("FBREF_MIN_INTERVAL", "3.0"))
+    
     # Sources de données
     PLAYERS_DATA_PATH = os.getenv("PLAYERS_DATA_PATH", str(DATA_DIR / "players_data.csv"))
     SCOUTING_REPORTS_PATH = os.getenv("SCOUTING_REPORTS_PATH", str(DATA_DIR / "scouting_reports"))
@@ -6,15 +6,19 @@ Récupère les données, les traite et les stocke dans Qdrant
 import sys
 import os
 import json
+import argparse
+import threading
+import functools
+import numpy as np
 import pandas as pd
-import soccerdata as sd
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, PayloadSchemaType
+from qdrant_client.models import (
+    Distance, VectorParams, VectorParamsDiff, CollectionParamsDiff, Disabled, PayloadSchemaType
+)
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
 import time
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 
 # Ajouter le répertoire parent au path
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -22,239 +26,345 @@ if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
 import config
+from embedding_cache import EmbeddingCache
+from embedding_model import BackgroundModel, embedding_model_id
+from summary_generator import AsyncSummaryGenerator, build_summary_prompt, player_key
+from summary_journal import SummaryJournal
+from stats_store import StatsStore
+from fbref_fetch import FBrefFetcher, STAT_TYPES
+from bm25_index import BM25Index, document_text
+from vector_store import LocalVectorIndex, create_qdrant_client, fetch_points
+from neighbors import NeighborTable
+from partitions import Partition, LEGACY_SEASON, LEGACY_LEAGUE, build_partitions, parse_list, summary_files
+from stats_fingerprint import compute_fingerprint, has_materially_changed
+from batch_summaries import BatchSummaryRunner
+from pipeline_profiler import (
+    PipelineProfiler, profiled_step, find_baseline, compare_reports, print_report, print_regressions
+)
+from qdrant_sync import (
+    CollectionSync, player_point_id, vector_hash, payload_hash, partition_filter,
+    quantization_config, measure_quantization_recall,
+    dense_vector_name, truncate_vectors, FULL_VECTOR, MINI_VECTOR
+)
 
 class ScoutRAGPipeline:
     """Pipeline complet pour automatiser la récupération et le stockage des données"""
     
-    def __init__(self):
-        """Initialise le pipeline"""
+    REFRESH_MODES = ("none", "missing", "changed", "all")
+    
+    def __init__(self, refresh: str | None = None, partitions: list[Partition] | None = None,
+                 profile: bool | None = None, baseline: Path | None = None):
+        """
+        Initialise le pipeline
+        
+        Args:
+            refresh: Joueurs dont le résumé est (re)généré : "none", "missing" (sans résumé),
+                "changed" (stats modifiées), "all". None = question interactive.
+            partitions: Partitions (saison, ligue) à construire. None = config.Config.SEASONS x LEAGUES
+            profile: Profil cProfile de chaque étape. None = config.Config.PIPELINE_PROFILE
+            baseline: Rapport d'exécution de référence. None = rapport réussi le plus récent
+        """
         self.data_dir = Path("../data")
         self.data_dir.mkdir(exist_ok=True)
         
+        # Mesures de chaque étape, rapport écrit en fin d'exécution
+        profile = config.Config.PIPELINE_PROFILE if profile is None else profile
+        self.profiler = PipelineProfiler(
+            report_dir=config.Config.PIPELINE_REPORT_DIR,
+            profile_dir=config.Config.PIPELINE_PROFILE_DIR if profile else None
+        )
+        self.baseline = baseline
+        
         # Initialiser les clients
-        self.openai_client = OpenAI(api_key=config.Config.OPENAI_API_KEY)
-        self.qdrant_client = QdrantClient(url='localhost')
-        self.embedding_model = SentenceTransformer("BAAI/bge-m3")
+        self.openai_client = OpenAI(api_key=config.Config.OPENAI_API_KEY, base_url=config.Config.OPENAI_BASE_URL)
+        self.qdrant_client = create_qdrant_client()
+        # Chargé en arrière-plan pendant la récupération des données et les résumés
+        self.embedding_model = BackgroundModel()
         
         # Configuration
         self.collection_name = 'ragscout_players'
-        self.season = "2425"  # Saison 2024-2025
+        self.target_collection = self.collection_name
+        self.collection_sync = CollectionSync(self.qdrant_client, self.collection_name)
+        self.partitions = partitions or build_partitions(config.Config.SEASONS, config.Config.LEAGUES)
+        self.refresh = refresh
+        self.stats_store = StatsStore(self.data_dir / "players_stats", legacy_csv=self.data_dir / "players_stats.csv")
+        self.fbref_fetcher = FBrefFetcher(
+            self.data_dir / "fbref_cache",
+            ttl_hours=config.Config.FBREF_CACHE_TTL_HOURS,
+            max_workers=config.Config.FBREF_MAX_WORKERS,
+            per_host_limit=config.Config.FBREF_PER_HOST_LIMIT,
+            min_interval=config.Config.FBREF_MIN_INTERVAL
+        )
+        
+        # Part des limites OpenAI allouée à chaque partition construite en parallèle
+        self._llm_share = 1
+        # Le modèle d'encodage et le cache d'embeddings sont partagés : une partition indexée à la fois
+        self._index_lock = threading.Lock()
         
         print("🚀 Pipeline ScoutRAG initialisé")
+        print(f"🧩 Partitions: {', '.join(str(p) for p in self.partitions)}")
+    
+    @functools.cached_property
+    def model_id(self) -> str:
+        """Identifiant des vecteurs produits (modèle, backend, longueur maximale) : clé du cache et de `vector_hash`"""
+        return embedding_model_id()
     
-    def step_1_scrape_data(self):
-        """Étape 1: Récupération des données depuis FBref"""
+    @functools.cached_property
+    def embedding_cache(self) -> EmbeddingCache | None:
+        """Cache des embeddings du modèle utilisé (créé au premier encodage : attend le modèle)"""
+        if not config.Config.EMBEDDING_CACHE_ENABLED:
+            return None
+        return EmbeddingCache(
+            self.data_dir / "embedding_cache",
+            model_name=self.model_id,
+            dim=self.embedding_model.get_sentence_embedding_dimension()
+        )
+    
+    @profiled_step
+    def step_1_scrape_data(self) -> dict:
+        """
+        Étape 1: Récupération des données depuis FBref
+        
+        Returns:
+            {partition: DataFrame des statistiques de la partition}
+        """
         print("\n📊 Étape 1: Récupération des données FBref...")
         
         try:
-            # Initialiser FBref
-            fbref = sd.FBref(leagues="Big 5 European Leagues Combined", seasons=self.season)
-            
-            # Types de statistiques à récupérer
-            stat_types = ['standard', 'shooting', 'passing', 'defense', 'possession', 'misc']
-            dfs = []
-            
             print("📈 Récupération des statistiques...")
-            for stat in tqdm(stat_types, desc="Statistiques"):
-                df = fbref.read_player_season_stats(stat_type=stat)
-                
-                # Flatten des colonnes MultiIndex
-                df.columns = ['_'.join(col).strip() if isinstance(col, tuple) else col for col in df.columns]
-                
-                # Définir les colonnes de jointure
-                key_cols = [col for col in df.columns if any(k in col.lower() for k in ['player', 'season', 'team', 'comp'])]
-                stat_cols = [col for col in df.columns if col not in key_cols]
-                
-                # Renommer les colonnes de stats
-                df = df[key_cols + stat_cols]
-                df = df.rename(columns={col: f"{col}_{stat}" for col in stat_cols})
-                
-                dfs.append(df)
-            
-            # Fusionner tous les DataFrames
-            print("🔗 Fusion des données...")
-            df_merged = pd.DataFrame()
-            
-            for df_temp in dfs:
-                df_temp = df_temp.reset_index()
-                if df_merged.empty:
-                    df_merged = df_temp
-                else:
-                    df_merged = pd.merge(df_merged, df_temp, how='left', on=['league', 'season', 'team', 'player'])
-            
-            # Nettoyer et sauvegarder
-            df_players = df_merged.reset_index()
-            df_players = df_players.fillna(0)
+            fetched = self.fbref_fetcher.fetch_partitions(
+                [(partition.league, partition.season) for partition in self.partitions],
+                stat_types=STAT_TYPES
+            )
+            print(f"🗄️ Tables FBref: {self.fbref_fetcher.stats['fetched']} téléchargées, "
+                  f"{self.fbref_fetcher.stats['cache_hits']} depuis le cache")
+            self.profiler.count("fbref_tables_fetched", self.fbref_fetcher.stats['fetched'])
+            self.profiler.count("fbref_tables_cached", self.fbref_fetcher.stats['cache_hits'])
             
-            # Sauvegarder les données brutes
-            output_path = self.data_dir / "players_stats.csv"
-            df_players.to_csv(output_path, index=False)
+            datasets = {}
+            for partition in self.partitions:
+                # Nettoyer et sauvegarder
+                df_players = fetched[(partition.league, partition.season)].reset_index(drop=True)
+                df_players = df_players.fillna(0)
+                
+                # Sauvegarder les données brutes (Parquet typé, partitionné par saison/ligue)
+                self.stats_store.write(df_players)
+                leagues = sorted(df_players['league'].astype(str).unique())
+                datasets[partition] = self.stats_store.read(seasons=[partition.season], leagues=leagues)
+                print(f"📊 {partition}: {len(datasets[partition])} joueurs récupérés")
             
-            print(f"✅ Données sauvegardées: {output_path}")
-            print(f"📊 {len(df_players)} joueurs récupérés")
+            print(f"✅ Données sauvegardées: {self.stats_store.root}")
+            self.profiler.add_rows(sum(len(df) for df in datasets.values()))
             
-            return df_players
+            return datasets
             
         except Exception as e:
             print(f"❌ Erreur lors de la récupération des données: {e}")
             raise
     
-    def step_2_generate_summaries(self, df_players):
-        """Étape 2: Génération des résumés de joueurs avec OpenAI"""
-        print("\n🤖 Étape 2: Génération des résumés de joueurs...")
+    @profiled_step
+    def step_2_generate_summaries(self, df_players, partition: Partition | None = None):
+        """
+        Étape 2: Génération des résumés de joueurs avec OpenAI
+        
+        Chaque résumé est écrit dans un journal SQLite dès sa génération : une exécution
+        interrompue reprend là où elle s'était arrêtée, et plusieurs processus peuvent se
+        partager la génération. Le journal est compacté dans player_summaries.json à la fin.
+        Chaque partition a son propre journal et son propre fichier de résumés.
+        """
+        partition = partition or self.partitions[0]
+        print(f"\n🤖 Étape 2: Génération des résumés de joueurs ({partition})...")
+        self.profiler.add_rows(len(df_players))
         
         # Charger les résumés existants s'ils existent
-        summaries_path = self.data_dir / "player_summaries.json"
+        partition_dir = partition.directory(self.data_dir)
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        summaries_path = partition_dir / "player_summaries.json"
         if summaries_path.exists():
             print("📖 Chargement des résumés existants...")
             with open(summaries_path, "r", encoding="utf-8") as f:
                 existing_summaries = json.load(f)
         else:
             existing_summaries = {}
-           
-        if len(existing_summaries) > 1:
-            print("💡 Des données anterieures sont fournies voulez-vous vraiment mettre à jour ? (Durée: ~4h)")
         
-            response = input("Rafraichir les données maintenant ? (o/N): ").strip().lower()
-            if response not in ['o', 'oui', 'y', 'yes']:
-                return existing_summaries
-        
-        # Préparer les données pour la génération
-        players_to_process = []
-        for _, row in df_players.iterrows():
-            player_key = f"{row['player']} ({row['team']})"
-            if player_key not in existing_summaries:
-                print(player_key)
-                players_to_process.append({
-                    'player': row['player'],
-                    'team': row['team'],
-                    'position': row.get('pos__standard', 'Unknown'),
-                    'stats': row.drop(exclude_columns).to_string()
-                })
+        journal = SummaryJournal(
+            partition_dir / "player_summaries.journal.sqlite",
+            sync=config.Config.SUMMARY_JOURNAL_SYNC,
+            lease_seconds=config.Config.SUMMARY_CLAIM_LEASE
+        )
+        try:
+            journaled = journal.completed()
+            if journaled:
+                print(f"📒 {len(journaled)} résumés trouvés dans le journal")
+            existing_summaries = {**existing_summaries, **journaled}
+            
+            refresh = self.refresh
+            if refresh is None:
+                refresh = self._ask_refresh_mode() if existing_summaries else "missing"
+            print(f"🔧 Mode de rafraîchissement: {refresh}")
+            
+            if refresh == "none":
+                return journal.compact(summaries_path) if journaled else existing_summaries
+            
+            # Sélectionner les joueurs à (re)générer
+            previous_fingerprints = journal.fingerprints()
+            prompts, fingerprints = {}, {}
+            adopted = 0
+            for row in df_players.to_dict(orient="records"):
+                key = player_key(row['player'], row['team'])
+                fingerprint = compute_fingerprint(row)
+                fingerprints[key] = fingerprint
+                
+                if key not in existing_summaries or refresh == "all":
+                    prompts[key] = build_summary_prompt(row)
+                elif refresh == "changed":
+                    previous = previous_fingerprints.get(key)
+                    if previous is None:
+                        # Résumé antérieur aux empreintes : les stats actuelles servent de référence
+                        journal.record(key, existing_summaries[key], fingerprint)
+                        adopted += 1
+                    elif has_materially_changed(previous, fingerprint):
+                        prompts[key] = build_summary_prompt(row)
+            
+            if adopted:
+                print(f"📌 {adopted} empreintes de référence enregistrées")
+            
+            if not prompts:
+                print("✅ Tous les résumés sont à jour")
+                return journal.compact(summaries_path)
+            
+            # Un résumé journalisé avec une autre empreinte est à régénérer ;
+            # en mode "all", tout résumé antérieur au lancement l'est aussi
+            claim_filter = {"fingerprints": fingerprints}
+            if refresh == "all":
+                claim_filter["newer_than"] = time.time()
+            
+            print(f"🔄 Génération de {len(prompts)} nouveaux résumés...")
+            
+            if config.Config.SUMMARY_MODE == "batch":
+                new_summaries = self._generate_summaries_batch(
+                    prompts, journal, fingerprints, claim_filter, partition_dir / "batch"
+                )
+            else:
+                new_summaries = self._generate_summaries_async(prompts, journal, fingerprints, claim_filter)
+            
+            others = journal.pending_claims()
+            if others:
+                print(f"⏳ {others} résumés sont en cours de génération par d'autres processus")
+            
+            # Compacter le journal dans le fichier JSON final
+            all_summaries = journal.compact(summaries_path)
+        finally:
+            journal.close()
         
+        print(f"✅ {partition}: {len(new_summaries)} nouveaux résumés générés")
+        print(f"📝 {partition}: {len(all_summaries)} résumés au total")
         
-        exit()
+        return all_summaries
+    
+    def _ask_refresh_mode(self) -> str:
+        """Demande le mode de rafraîchissement (hors terminal interactif : "changed")"""
+        if not sys.stdin.isatty():
+            return "changed"
         
-        if not players_to_process:
-            print("✅ Tous les résumés sont déjà générés")
-            return existing_summaries
+        print("💡 Des résumés existent déjà. Que faut-il (re)générer ?")
+        print("   [m] joueurs sans résumé  [c] joueurs dont les stats ont changé  [t] tous  [N] rien")
+        response = input("Choix (m/c/t/N): ").strip().lower()
+        return {"m": "missing", "c": "changed", "t": "all"}.get(response, "none")
+    
+    def _generate_summaries_async(self, prompts: dict, journal: SummaryJournal,
+                                  fingerprints: dict, claim_filter: dict) -> dict:
+        """Génère les résumés par appels directs concurrents, en journalisant chaque résultat"""
+        generator = AsyncSummaryGenerator(
+            AsyncOpenAI(api_key=config.Config.OPENAI_API_KEY, base_url=config.Config.OPENAI_BASE_URL, max_retries=0),
+            model=config.Config.OPENAI_MODEL,
+            max_concurrency=max(1, config.Config.SUMMARY_CONCURRENCY // self._llm_share),
+            rpm=max(1, config.Config.OPENAI_RPM // self._llm_share),
+            tpm=max(1, config.Config.OPENAI_TPM // self._llm_share),
+            max_retries=config.Config.SUMMARY_MAX_RETRIES
+        )
         
-        print(f"🔄 Génération de {len(players_to_process)} nouveaux résumés...")
+        # Réserver les joueurs par lots : les autres processus prennent les suivants
+        remaining = list(prompts)
+        chunk_size = config.Config.SUMMARY_CONCURRENCY * 4
         
-        # Prompt pour la génération de résumés
-        exclude_columns = ['season', 'team', 'player', 'nation__standard', 'age__standard', 'born__standard', 'nation__shooting', 'pos__shooting', 'age__shooting', 'born__shooting', 'nation__passing', 'pos__passing', 'age__passing', 'born__passing', 'nation__defense', 'pos__defense', 'age__defense', 'born__defense', 'nation__possession', 'pos__possession', 'age__possession', 'born__possession', 'nation__misc', 'pos__misc', 'age__misc', 'born__misc']
+        def next_chunk():
+            nonlocal remaining
+            claimed = journal.claim(remaining, limit=chunk_size, **claim_filter)
+            claimed_set = set(claimed)
+            remaining = [key for key in remaining if key not in claimed_set]
+            return {key: prompts[key] for key in claimed}
         
-        summary_prompt = """
-        Tu es un expert en scouting football, analyste football spécialisé en scouting basé sur les données.
+        with tqdm(total=len(prompts), desc="Génération résumés") as progress:
+            def on_result(key, summary):
+                journal.record(key, summary, fingerprints.get(key))
+                progress.update(1)
         
-        Tu vas recevoir les statistiques détaillées d’un joueur professionnel.  
-        À partir de ces données, rédige une **fiche de scouting complète, claire et neutre**, destinée à alimenter une base de recherche intelligente.
-
-        ---
-
-        ### 🎯 Objectif du texte :
-        Identifier avec précision :
-        - le **rôle du joueur** (poste et sous-rôle)
-        - son **style de jeu** (comportement avec et sans ballon)
-        - ses **principales qualités**
-        - ses **axes d'amélioration**
-        - son **profil-type** en fin de texte
-
-        Le résumé doit permettre à un recruteur ou analyste d’avoir une **vision rapide mais fiable** du profil du joueur.
-
-        ---
+            new_summaries = generator.run_chunks(next_chunk, on_result=on_result, on_failure=journal.release)
         
-        ### ✍️ Structure attendue (fluide, sans titres ni bullets) :
-
-        1. **Style de jeu et rôle** :  
-        Décris le poste principal (DF, MF, FW…) et si possible, deduis des stats disponibles, le sous-rôle (ex : latéral offensif, milieu récupérateur, attaquant mobile).  
-        Mentionne comment il évolue : projections, appels, conservation, pressing, largeur, implication défensive…  
-        Base-toi uniquement sur les statistiques fournies.
-
-        2. **Qualités principales** :  
-        Regroupe par catégories :
-        - **Physique** : volume de jeu, duels gagnés, présence, mobilité…
-        - **Technique** : types de passes, créativité, conduite, finition, dribbles…
-        - **Mental/tactique** : implication, pressing, discipline, concentration…
-
-        3. **Axes d'amélioration** :  
-        Exprime de manière neutre les domaines où il est moins à l’aise ou peut progresser.  
-        Utilise des tournures comme “gagnerait à améliorer…”, “peut encore progresser sur…”, “montre quelques limites dans…”
-
-        4. **Profil-type** :  
-        Termine toujours par une ligne :  
-        **Profil-type :** suivi d’une expression courte (3 à 6 mots) qui résume son profil.  
-        (ex : “Milieu défensif intense”, “Défenseur axial sobre et solide”, “Ailier percutant et créatif”)
-
-        ---
-
-        ### ⚠️ Contraintes essentielles :
-
-        - **Ne fais aucune déduction** à partir de données absentes (taille, puissance, nationalité, âge, etc.)
-        - **N'invente jamais** une information
-        - Ne donne aucun chiffre, pourcentage ou ratio
-        - Texte fluide, sans bullet points, environ 6 à 8 phrases
-        - Ne mentionne jamais le nom, le club, la ligue ou la nationalité du joueur
-
-        ---
+        stats = generator.stats
+        print(f"📈 {stats.completed} succès, {stats.failed} échecs, {stats.rate_limited} réponses 429, {stats.retries} reprises")
+        for name, value in (("llm_summaries", stats.completed), ("llm_failures", stats.failed),
+                            ("llm_rate_limited", stats.rate_limited), ("llm_retries", stats.retries),
+                            ("llm_prompt_tokens", stats.prompt_tokens),
+                            ("llm_completion_tokens", stats.completion_tokens)):
+            self.profiler.count(name, value)
         
-        IMPORTANT :
-        - Ne déduis ni n’invente aucune donnée.
-        - Si une information n’est pas présente dans les statistiques (comme la taille, la vitesse, la puissance, etc.), **n’en parle pas**.
-        - Reste strictement fidèle aux données fournies.
-
-        Voici les données du joueur :
-        {stats}
-
-        Résumé:
+        return new_summaries
+    
+    def _generate_summaries_batch(self, prompts: dict, journal: SummaryJournal,
+                                  fingerprints: dict, claim_filter: dict, work_dir: Path) -> dict:
         """
+        Génère les résumés via l'API Batch (tarif réduit, traitement hors ligne)
         
-        new_summaries = {}
-        for player_data in tqdm(players_to_process, desc="Génération résumés"):
-            try:
-                # Préparer les statistiques pour le prompt
-                stats_text = "\n".join([f"{k}: {v}" for k, v in player_data['stats'].items() 
-                                       if k not in ['player', 'team', 'league', 'season'] and v != 0])
-                
-                prompt = summary_prompt.format(stats=stats_text)
-                
-                # Générer le résumé
-                response = self.openai_client.chat.completions.create(
-                    model=config.Config.OPENAI_MODEL,
-                    messages=[
-                        {"role": "system", "content": "Tu es un expert en analyse footballistique."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=500
-                )
-                
-                summary = response.choices[0].message.content.strip()
-                player_key = f"{player_data['player']} ({player_data['team']})"
-                new_summaries[player_key] = summary
-                
-                # Pause pour éviter de dépasser les limites API
-                time.sleep(0.5)
-                
-            except Exception as e:
-                print(f"⚠️ Erreur pour {player_data['player']}: {e}")
-                continue
+        Le lot soumis est suivi depuis `work_dir` (batch/ de la partition) : si BATCH_WAIT est
+        désactivé, le pipeline rend la main après la soumission et une exécution ultérieure
+        ingère les résultats.
+        """
+        runner = BatchSummaryRunner(
+            self.openai_client,
+            model=config.Config.OPENAI_MODEL,
+            work_dir=work_dir,
+            poll_interval=config.Config.BATCH_POLL_INTERVAL
+        )
         
-        # Fusionner avec les résumés existants
-        all_summaries = {**existing_summaries, **new_summaries}
+        if runner.load_state() is None:
+            # Réserver tous les joueurs du lot pour la durée de la fenêtre de traitement
+            claimed = journal.claim(
+                list(prompts),
+                limit=len(prompts),
+                lease_seconds=config.Config.BATCH_CLAIM_LEASE,
+                **claim_filter
+            )
+            prompts = {key: prompts[key] for key in claimed}
+            if not prompts:
+                print("⏳ Tous les joueurs sont déjà réservés par un autre processus")
+                return {}
         
-        # Sauvegarder
-        with open(summaries_path, "w", encoding="utf-8") as f:
-            json.dump(all_summaries, f, ensure_ascii=False, indent=2)
+        new_summaries = {}
+        def on_result(key, summary):
+            journal.record(key, summary, fingerprints.get(key))
+            new_summaries[key] = summary
         
-        print(f"✅ {len(new_summaries)} nouveaux résumés générés")
-        print(f"📝 Total: {len(all_summaries)} résumés")
+        result = runner.run(prompts, on_result, wait=config.Config.BATCH_WAIT)
+        if result is None:
+            print("⏳ Lot encore en cours de traitement, relancez le pipeline pour ingérer les résultats")
+            return new_summaries
         
-        return all_summaries
+        ingested, failed = result
+        journal.release(failed, any_owner=True)
+        print(f"📥 {ingested} résumés ingérés, {len(failed)} en échec")
+        self.profiler.count("llm_summaries", ingested)
+        self.profiler.count("llm_failures", len(failed))
+        self.profiler.count("llm_prompt_tokens", runner.usage["prompt_tokens"])
+        self.profiler.count("llm_completion_tokens", runner.usage["completion_tokens"])
+        return new_summaries
     
-    def step_3_prepare_data(self, df_players, summaries):
+    @profiled_step
+    def step_3_prepare_data(self, df_players, summaries, partition: Partition | None = None):
         """Étape 3: Préparation des données pour Qdrant"""
-        print("\n🔧 Étape 3: Préparation des données...")
+        partition = partition or self.partitions[0]
+        print(f"\n🔧 Étape 3: Préparation des données ({partition})...")
         
         # Créer DataFrame des résumés
         df_summaries = pd.DataFrame([
@@ -266,8 +376,9 @@ class ScoutRAGPipeline:
             for player, summary in summaries.items()
         ])
         
-        # Fusionner avec les statistiques
-        df_merged = df_summaries.merge(df_players, how='left', on=['player', 'team'])
+        # Fusionner avec les seules colonnes de statistiques utiles
+        df_stats = df_players[['league', 'season', 'player', 'team', 'pos__standard']]
+        df_merged = df_summaries.merge(df_stats, how='left', on=['player', 'team'])
         
         # Sélectionner les colonnes importantes
         df_final = df_merged[[
@@ -277,32 +388,162 @@ class ScoutRAGPipeline:
         df_final.rename(columns={'pos__standard': 'position'}, inplace=True)
         df_final = df_final.dropna(subset=['summary'])  # Supprimer les lignes sans résumé
         
-        print(f"✅ {len(df_final)} joueurs préparés pour Qdrant")
+        # Les résumés de joueurs absents des statistiques n'ont ni ligue ni saison
+        missing_stats = df_final['league'].isna()
+        if missing_stats.any():
+            print(f"⚠️ {int(missing_stats.sum())} résumés sans statistiques ignorés")
+            df_final = df_final[~missing_stats]
+        df_final['season'] = df_final['season'].astype(int)
+        df_final['league'] = df_final['league'].astype(str)
+        df_final['team'] = df_final['team'].astype(str)
+        df_final['partition'] = partition.id
+        
+        print(f"✅ {partition}: {len(df_final)} joueurs préparés pour Qdrant")
+        self.profiler.add_rows(len(df_final))
         
         return df_final
     
+    def _create_collection(self, collection_name: str):
+        """Crée une collection vide avec ses index de payload"""
+        print(f"📦 Création de la collection: {collection_name}")
+        mode = config.Config.QDRANT_QUANTIZATION
+        if mode != "none":
+            print(f"🗜️ Quantification {mode} (originaux {'sur disque' if config.Config.QDRANT_VECTORS_ON_DISK else 'en RAM'})")
+        vectors_config = VectorParams(
+            size=1024,  # Taille des embeddings BAAI/bge-m3
+            distance=Distance.COSINE,
+            on_disk=config.Config.QDRANT_VECTORS_ON_DISK
+        )
+        mini_dim = config.Config.QDRANT_MINI_DIM
+        if mini_dim > 0:
+            # Vecteur réduit toujours en RAM : c'est lui que parcourt la pré-sélection
+            print(f"🪆 Vecteur réduit {MINI_VECTOR} ({mini_dim} dimensions) à côté de {FULL_VECTOR}")
+            vectors_config = {
+                FULL_VECTOR: vectors_config,
+                MINI_VECTOR: VectorParams(size=mini_dim, distance=Distance.COSINE),
+            }
+        self.qdrant_client.create_collection(
+            collection_name=collection_name,
+            vectors_config=vectors_config,
+            quantization_config=quantization_config(mode),
+            on_disk_payload=config.Config.QDRANT_PAYLOAD_ON_DISK
+        )
+        self._create_payload_indexes(collection_name)
+    
+    def _check_vector_layout(self, collection_name: str):
+        """Vérifie que les vecteurs d'une collection existante correspondent à QDRANT_MINI_DIM"""
+        vectors = self.qdrant_client.get_collection(collection_name).config.params.vectors
+        mini_dim = config.Config.QDRANT_MINI_DIM
+        if isinstance(vectors, dict):
+            current = vectors[MINI_VECTOR].size if MINI_VECTOR in vectors else 0
+        else:
+            current = 0
+        if current != mini_dim:
+            raise ValueError(
+                f"La collection {collection_name} a un vecteur réduit de {current} dimensions "
+                f"(QDRANT_MINI_DIM={mini_dim}) : reconstruisez-la avec QDRANT_SYNC_MODE=bluegreen ou recreate"
+            )
+    
+    def _apply_storage_config(self, collection_name: str):
+        """Aligne la quantification et le stockage d'une collection existante sur la configuration"""
+        mode = config.Config.QDRANT_QUANTIZATION
+        self.qdrant_client.update_collection(
+            collection_name=collection_name,
+            vectors_config={
+                dense_vector_name(config.Config.QDRANT_MINI_DIM) or "": VectorParamsDiff(
+                    on_disk=config.Config.QDRANT_VECTORS_ON_DISK
+                )
+            },
+            quantization_config=quantization_config(mode) or Disabled.DISABLED,
+            collection_params=CollectionParamsDiff(on_disk_payload=config.Config.QDRANT_PAYLOAD_ON_DISK)
+        )
+    
+    def _create_payload_indexes(self, collection_name: str):
+        """Crée les index de payload utilisés par les filtres de recherche"""
+        for field_name, schema in [
+            ("position_std", PayloadSchemaType.KEYWORD),
+            ("league", PayloadSchemaType.KEYWORD),
+            ("season", PayloadSchemaType.INTEGER),
+            ("age", PayloadSchemaType.INTEGER),
+            ("age_bucket", PayloadSchemaType.KEYWORD),
+            ("partition", PayloadSchemaType.KEYWORD),
+        ]:
+            self.qdrant_client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=schema,
+            )
+    
+    def _check_bluegreen_partitions(self):
+        """
+        Refuse un run blue/green qui ne reconstruit pas toutes les partitions de la collection en service
+        
+        La nouvelle collection ne contient que les partitions du run : publiée par bascule d'alias,
+        elle ferait disparaître les autres (ex: `--seasons 2526` seul).
+        """
+        if config.Config.QDRANT_SYNC_MODE != "bluegreen":
+            return
+        live = self.collection_sync.resolve_alias()
+        if live is None and self.qdrant_client.collection_exists(self.collection_name):
+            live = self.collection_name
+        if live is None:
+            return
+        
+        # Les points indexés avant les partitions appartiennent à la partition historique
+        legacy_id = Partition(LEGACY_SEASON, LEGACY_LEAGUE).id
+        served = {
+            payload.get("partition") or legacy_id
+            for payload in self.collection_sync.fetch_payloads(live, ["partition"]).values()
+        }
+        missing = sorted(served - {partition.id for partition in self.partitions})
+        if missing:
+            raise ValueError(
+                f"QDRANT_SYNC_MODE=bluegreen reconstruit toute la collection, mais {live} contient "
+                f"des partitions absentes de ce run ({', '.join(missing)}) : listez toutes les partitions, "
+                f"ou utilisez QDRANT_SYNC_MODE=incremental pour n'en construire qu'une partie"
+            )
+    
+    @profiled_step
     def step_4_setup_qdrant(self):
-        """Étape 4: Configuration de Qdrant"""
+        """
+        Étape 4: Configuration de Qdrant
+        
+        Selon `config.Config.QDRANT_SYNC_MODE` :
+        - "recreate" : supprime et recrée la collection
+        - "incremental" : conserve la collection, seuls les points modifiés seront écrits
+        - "bluegreen" : construit une nouvelle collection, publiée par bascule d'alias
+        """
         print("\n🗄️ Étape 4: Configuration de Qdrant...")
+        mode = config.Config.QDRANT_SYNC_MODE
+        print(f"🔧 Mode de synchronisation: {mode}")
         
-        # Vérifier si la collection existe
-        if self.qdrant_client.collection_exists(self.collection_name):
-            print(f"🗑️ Suppression de la collection existante: {self.collection_name}")
-            self.qdrant_client.delete_collection(self.collection_name)
+        if mode == "bluegreen":
+            self.target_collection = self.collection_sync.new_collection_name()
+            self._create_collection(self.target_collection)
         
-        # Créer la nouvelle collection
-        print(f"📦 Création de la collection: {self.collection_name}")
-        self.qdrant_client.create_collection(
-            collection_name=self.collection_name,
-            vectors_config=VectorParams(
-                size=1024,  # Taille des embeddings BAAI/bge-m3
-                distance=Distance.COSINE
-            )
-        )
+        elif mode == "incremental":
+            self.target_collection = self.collection_name
+            if self.qdrant_client.collection_exists(self.collection_name):
+                print(f"♻️ Collection existante conservée: {self.collection_name}")
+                self._check_vector_layout(self.collection_name)
+                self._create_payload_indexes(self.collection_name)
+                self._apply_storage_config(self.collection_name)
+            else:
+                self._create_collection(self.collection_name)
         
-        print("✅ Collection Qdrant configurée")
+        elif mode == "recreate":
+            self.target_collection = self.collection_name
+            if self.qdrant_client.collection_exists(self.collection_name):
+                print(f"🗑️ Suppression de la collection existante: {self.collection_name}")
+                self.qdrant_client.delete_collection(self.collection_name)
+            self._create_collection(self.collection_name)
         
+        else:
+            raise ValueError(f"QDRANT_SYNC_MODE inconnu: {mode}")
         
+        print("✅ Collection Qdrant configurée")
+    
+    
     FBREF_TO_STD = {
         "GK": "GK",
         "DF": "DF",
@@ -332,93 +573,331 @@ class ScoutRAGPipeline:
         if age <= 32: return "U32"
         return "32+"
     
-    def step_5_store_embeddings(self, df_final):
-        """Étape 5: Stockage des embeddings dans Qdrant"""
-        print("\n💾 Étape 5: Stockage des embeddings...")
+    def _build_payload(self, row) -> dict:
+        """Construit le payload Qdrant (avec ses empreintes) à partir d'une ligne préparée"""
+        pos_std = self.normalize_position(row.get("position", ""))
+        nat = row.get("nationality", "")
+        age = row.get("age", None)
+        try:
+            age = int(age) if age is not None and str(age).isdigit() else None
+        except:
+            age = None
+        
+        metadata = {
+            'season': row['season'],
+            'player': row['player'],
+            'position_std': pos_std,
+            'age': age,
+            'age_bucket': self.age_bucket(age),
+            'nationality': nat,
+            'league': row['league'],
+            'team': row['team'],
+            'position': row['position'],
+            'summary': row['summary'],
+            'partition': row.get('partition'),
+        }
+        metadata['vector_hash'] = vector_hash(str(row['summary']), self.model_id)
+        metadata['payload_hash'] = payload_hash(metadata)
+        
+        return metadata
+    
+    def _iter_embedding_batches(self, summaries: list[str]):
+        """
+        Encode les résumés par lots, triés par longueur pour limiter le padding
+        
+        Args:
+            summaries: Liste des résumés à encoder
+            
+        Yields:
+            (indices, vecteurs) pour chaque lot, les indices renvoyant à `summaries`
+        """
+        batch_size = config.Config.EMBEDDING_BATCH_SIZE
+        order = sorted(range(len(summaries)), key=lambda i: len(summaries[i]))
+        
+        pool = None
+        if config.Config.EMBEDDING_MULTI_PROCESS and config.Config.EMBEDDING_WORKERS > 1:
+            print(f"🧵 Pool d'encodage multi-processus ({config.Config.EMBEDDING_WORKERS} workers)")
+            pool = self.embedding_model.start_multi_process_pool(
+                target_devices=["cpu"] * config.Config.EMBEDDING_WORKERS
+            )
+            # Un lot par worker pour occuper tous les coeurs à chaque étape
+            batch_size *= config.Config.EMBEDDING_WORKERS
+        
+        try:
+            for start in range(0, len(order), batch_size):
+                idxs = order[start:start + batch_size]
+                texts = [summaries[i] for i in idxs]
+                encode_start = time.perf_counter()
+                if pool is not None:
+                    vectors = self.embedding_model.encode_multi_process(
+                        texts,
+                        pool,
+                        batch_size=config.Config.EMBEDDING_BATCH_SIZE,
+                        chunk_size=config.Config.EMBEDDING_BATCH_SIZE,
+                        normalize_embeddings=True
+                    )
+                else:
+                    vectors = self.embedding_model.encode(
+                        texts,
+                        batch_size=batch_size,
+                        normalize_embeddings=True,
+                        show_progress_bar=False
+                    )
+                # Temps d'encodage seul (hors insertion), pour le débit en embeddings/s
+                self.profiler.count("embedding_encode_seconds", time.perf_counter() - encode_start)
+                self.profiler.count("embeddings_encoded", len(texts))
+                self.profiler.count("embedding_batches")
+                yield idxs, vectors
+        finally:
+            if pool is not None:
+                self.embedding_model.stop_multi_process_pool(pool)
+    
+    def _iter_vectors(self, summaries: list[str]):
+        """
+        Fournit les embeddings de tous les résumés, en n'encodant que ceux absents du cache
+        
+        Yields:
+            (indices, vecteurs) pour chaque lot, les indices renvoyant à `summaries`
+        """
+        if self.embedding_cache is None:
+            yield from self._iter_embedding_batches(summaries)
+            return
+        
+        found, missing = self.embedding_cache.lookup(summaries)
+        print(f"♻️ {len(found)} embeddings en cache, {len(missing)} à encoder")
+        self.profiler.count("embeddings_cached", len(found))
         
-        points = []
-        print("🔄 Génération des embeddings...")
+        hits = list(found)
+        batch_size = config.Config.QDRANT_UPSERT_BATCH_SIZE
+        for start in range(0, len(hits), batch_size):
+            idxs = hits[start:start + batch_size]
+            yield idxs, np.stack([found[i] for i in idxs])
         
-        for idx, row in tqdm(df_final.iterrows(), total=len(df_final), desc="Embeddings"):
+        missing_texts = [summaries[i] for i in missing]
+        try:
+            for sub_idxs, vectors in self._iter_embedding_batches(missing_texts):
+                self.embedding_cache.add([missing_texts[j] for j in sub_idxs], vectors)
+                yield [missing[j] for j in sub_idxs], vectors
+        finally:
+            self.embedding_cache.flush()
+    
+    @profiled_step
+    def step_5_store_embeddings(self, df_final, partition: Partition | None = None):
+        """
+        Étape 5: Stockage des embeddings dans Qdrant
+        
+        En mode incrémental, le diff est limité aux points de la partition :
+        les autres partitions de la collection ne sont ni relues ni supprimées.
+        """
+        partition = partition or self.partitions[0]
+        print(f"\n💾 Étape 5: Stockage des embeddings ({partition})...")
+        
+        payloads = {}
+        for row in df_final.to_dict(orient="records"):
             try:
-                # Générer l'embedding
-                embedding = self.embedding_model.encode(
-                    row['summary'],
-                    normalize_embeddings=True
-                ).tolist()
-                
-                pos_std = self.normalize_position(getattr(row, "position", ""))
-                nat = getattr(row, "nationality", "")
-                age = getattr(row, "age", None)
-                try:
-                    age = int(age) if age is not None and str(age).isdigit() else None
-                except:
-                    age = None
-                
-                metadata = {
-                    'season': row['season'],
-                    'player': row['player'],
-                    'position_std': pos_std,
-                    'age': age,
-                    'age_bucket': self.age_bucket(age),
-                    'nationality': nat,
-                    'league': row['league'],
-                    'team': row['team'],
-                    'position': row['position'],
-                    'summary': row['summary'],
-                }
-                
-                # Créer le point
-                point = PointStruct(
-                    id=idx,
-                    vector=embedding,
-                    payload=metadata
+                point_id = player_point_id(
+                    row['player'], row['team'], row['season'],
+                    None if partition.is_legacy else partition.id
                 )
-                
-                points.append(point)
-                
+                payloads[point_id] = self._build_payload(row)
             except Exception as e:
                 print(f"⚠️ Erreur pour {row['player']}: {e}")
-                continue
-        
-        # Insérer par batch
-        BATCH_SIZE = 100
-        print("📤 Insertion dans Qdrant...")
         
-        for i in tqdm(range(0, len(points), BATCH_SIZE), desc="Insertion"):
-            batch = points[i:i + BATCH_SIZE]
-            self.qdrant_client.upsert(
-                collection_name=self.collection_name, 
-                points=batch
+        to_upsert = list(payloads)
+        if config.Config.QDRANT_SYNC_MODE == "incremental":
+            # Les points indexés avant les partitions appartiennent à la partition historique
+            existing = self.collection_sync.fetch_state(
+                self.target_collection,
+                scroll_filter=partition_filter(partition.id, include_untagged=partition.is_legacy)
             )
+            desired = {pid: (p['vector_hash'], p['payload_hash']) for pid, p in payloads.items()}
+            plan = self.collection_sync.plan(existing, desired)
+            print(f"🔍 Diff: {plan.summary()}")
             
-        self.qdrant_client.create_payload_index(
-            collection_name="ragscout_players",
-            field_name="position_std",
-            field_schema=PayloadSchemaType.KEYWORD,
-        )
-        self.qdrant_client.create_payload_index(
-            collection_name="ragscout_players",
-            field_name="league",
-            field_schema=PayloadSchemaType.KEYWORD,
-        )
-        self.qdrant_client.create_payload_index(
-            collection_name="ragscout_players",
-            field_name="season",
-            field_schema=PayloadSchemaType.INTEGER,
-        )
-        self.qdrant_client.create_payload_index(
-            collection_name="ragscout_players",
-            field_name="age",
-            field_schema=PayloadSchemaType.INTEGER,
+            to_upsert = plan.to_upsert
+            if plan.to_update_payload:
+                self.collection_sync.update_payloads(
+                    self.target_collection,
+                    {pid: payloads[pid] for pid in plan.to_update_payload},
+                    batch_size=config.Config.QDRANT_UPSERT_BATCH_SIZE
+                )
+                self.profiler.count("qdrant_payloads_updated", len(plan.to_update_payload))
+            if plan.to_delete:
+                self.collection_sync.delete_points(self.target_collection, plan.to_delete)
+                self.profiler.count("qdrant_points_deleted", len(plan.to_delete))
+        
+        summaries = [str(payloads[pid]['summary']) for pid in to_upsert]
+        
+        # L'insertion d'un lot tourne dans un thread pendant que le lot suivant est encodé
+        uploader = ThreadPoolExecutor(max_workers=1)
+        pending = []
+        inserted = 0
+        
+        print("🔄 Génération des embeddings et insertion dans Qdrant...")
+        with tqdm(total=len(to_upsert), desc="Embeddings") as progress:
+            try:
+                for idxs, vectors in self._iter_vectors(summaries):
+                    # Tableau NumPy envoyé tel quel (pas de liste Python par composante)
+                    ids = [to_upsert[i] for i in idxs]
+                    vectors = np.asarray(vectors, dtype=np.float32)
+                    if config.Config.QDRANT_MINI_DIM > 0:
+                        vectors = {
+                            FULL_VECTOR: vectors,
+                            MINI_VECTOR: truncate_vectors(vectors, config.Config.QDRANT_MINI_DIM),
+                        }
+                    pending.append(uploader.submit(
+                        self.qdrant_client.upload_collection,
+                        collection_name=self.target_collection,
+                        vectors=vectors,
+                        payload=[payloads[pid] for pid in ids],
+                        ids=ids,
+                        batch_size=config.Config.QDRANT_UPSERT_BATCH_SIZE,
+                        wait=True
+                    ))
+                    inserted += len(ids)
+                    progress.update(len(idxs))
+                    
+                    # Limiter le nombre de lots en attente (contre-pression sur l'encodage)
+                    while len(pending) > 2:
+                        pending.pop(0).result()
+                
+                for future in pending:
+                    future.result()
+            finally:
+                uploader.shutdown(wait=True)
+        
+        print(f"✅ {partition}: {inserted} joueurs insérés dans Qdrant")
+        self.profiler.add_rows(len(payloads))
+        self.profiler.count("qdrant_points_upserted", inserted)
+    
+    def _compact_embedding_cache(self):
+        """Purge du cache les résumés qui ne sont plus utilisés par aucune partition, s'ils le dominent"""
+        if self.embedding_cache is None:
+            return
+        live_summaries = set()
+        for path in summary_files(self.data_dir):
+            with open(path, "r", encoding="utf-8") as f:
+                live_summaries.update(str(summary) for summary in json.load(f).values())
+        if len(self.embedding_cache) > 2 * len(live_summaries):
+            self.embedding_cache.compact(list(live_summaries))
+    
+    def build_partition(self, partition: Partition, df_players) -> int:
+        """
+        Étapes 2, 3 et 5 pour une partition (résumés, préparation, indexation)
+        
+        Returns:
+            Nombre de joueurs indexés
+        """
+        summaries = self.step_2_generate_summaries(df_players, partition)
+        df_final = self.step_3_prepare_data(df_players, summaries, partition)
+        with self._index_lock:
+            self.step_5_store_embeddings(df_final, partition)
+        return len(df_final)
+    
+    def _resolve_refresh_mode(self):
+        """Fixe le mode de rafraîchissement une seule fois pour toutes les partitions"""
+        if self.refresh is not None:
+            return
+        has_summaries = any(
+            (partition.directory(self.data_dir) / name).exists()
+            for partition in self.partitions
+            for name in ("player_summaries.json", "player_summaries.journal.sqlite")
         )
-        self.qdrant_client.create_payload_index(
-            collection_name="ragscout_players",
-            field_name="age_bucket",
-            field_schema=PayloadSchemaType.KEYWORD,
+        self.refresh = self._ask_refresh_mode() if has_summaries else "missing"
+    
+    @profiled_step
+    def step_6_publish_collection(self):
+        """Étape 6: Publication de la collection (bascule d'alias en mode blue/green)"""
+        print("\n🔀 Étape 6: Publication de la collection...")
+        
+        if config.Config.QDRANT_SYNC_MODE != "bluegreen":
+            print(f"✅ Collection {self.target_collection} déjà en service")
+            return
+        
+        previous = self.collection_sync.swap_alias(self.target_collection)
+        print(f"✅ Alias {self.collection_name} -> {self.target_collection}")
+        
+        # Garder la collection précédente pour un retour arrière rapide
+        keep = [self.target_collection] + ([previous] if previous else [])
+        self.collection_sync.drop_old_collections(keep=keep)
+    
+    @profiled_step
+    def step_7_update_bm25_index(self):
+        """
+        Étape 7: Mise à jour de l'index BM25 sur tout le corpus publié
+        
+        Seuls les résumés nouveaux ou modifiés sont re-tokenisés ; l'application
+        recharge la nouvelle génération de l'index sans redémarrer.
+        """
+        print("\n🔎 Étape 7: Mise à jour de l'index BM25...")
+        payloads = self.collection_sync.fetch_payloads(self.collection_name, ["summary"])
+        documents = {pid: document_text(str(p.get("summary", ""))) for pid, p in payloads.items()}
+        
+        index = BM25Index(Path(config.Config.BM25_INDEX_DIR) / self.collection_name)
+        stats = index.sync(documents)
+        self.profiler.add_rows(len(documents))
+        print(f"✅ Index BM25: {len(index)} documents, {len(index.vocab)} termes "
+              f"({stats['added']} ajoutés, {stats['updated']} modifiés, {stats['deleted']} supprimés)")
+    
+    @profiled_step
+    def step_8_build_vector_indexes(self):
+        """
+        Étape 8: Index dérivés des vecteurs de la collection publiée (une seule lecture)
+        
+        - table des plus proches voisins de chaque joueur (recalculée entièrement, calcul exact)
+        - export vers l'index vectoriel local (VECTOR_BACKEND=numpy ou faiss : recherche
+          en mémoire, sans serveur Qdrant)
+        """
+        print("\n📤 Étape 8: Table des voisins et index vectoriel local...")
+        ids, vectors, payloads = fetch_points(
+            self.qdrant_client,
+            self.collection_name,
+            vector_name=dense_vector_name(config.Config.QDRANT_MINI_DIM)
         )
+        self.profiler.add_rows(len(ids))
         
-        print(f"✅ {len(points)} joueurs insérés dans Qdrant")
+        start = time.time()
+        table = NeighborTable(Path(config.Config.NEIGHBORS_DIR) / self.collection_name)
+        table.load()
+        table.build(ids, vectors, payloads, k=config.Config.NEIGHBORS_K)
+        print(f"✅ Table des voisins: {len(table)} joueurs x {table.manifest['k']} voisins "
+              f"({time.time() - start:.1f}s, {table.generation})")
+        
+        if config.Config.VECTOR_BACKEND != "qdrant":
+            index = LocalVectorIndex(Path(config.Config.VECTOR_INDEX_DIR) / self.collection_name)
+            index.load()
+            index.write(ids, vectors, payloads)
+            print(f"✅ Index vectoriel local: {len(index)} joueurs ({index.generation})")
+    
+    @profiled_step
+    def measure_quantization(self) -> dict | None:
+        """
+        Rappel de la recherche quantifiée face à la recherche exacte float32 sur la collection publiée
+        Rapport écrit dans logs/quantization_recall.json
+        """
+        mode = config.Config.QDRANT_QUANTIZATION
+        if mode == "none":
+            return None
+        print("\n🗜️ Mesure du rappel de la quantification...")
+        report = measure_quantization_recall(
+            self.qdrant_client,
+            self.collection_name,
+            mode,
+            sample_size=config.Config.QUANTIZATION_EVAL_SAMPLES,
+            k=10,
+            oversampling=config.Config.QDRANT_OVERSAMPLING,
+            vector_name=dense_vector_name(config.Config.QDRANT_MINI_DIM)
+        )
+        if not report["queries"]:
+            print("⚠️ Collection vide, rappel non mesuré")
+            return report
+        ram = report["ram_bytes_per_vector"]
+        print(f"✅ {mode}: rappel@{report['k']} {report['recall_quantized']:.3f} sans rescoring, "
+              f"{report['recall_rescored']:.3f} avec rescoring ({report['queries']} requêtes)")
+        print(f"💾 RAM par joueur (vecteur de recherche): {ram[mode]:.0f} o contre {ram['float32']:.0f} o en float32")
+        with open(config.LOGS_DIR / "quantization_recall.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
     
     def run_full_pipeline(self):
         """Exécute le pipeline complet"""
@@ -426,22 +905,39 @@ class ScoutRAGPipeline:
         print("=" * 50)
         
         start_time = time.time()
+        status, error = "success", None
         
         try:
-            # Étape 1: Récupération des données
-            df_players = self.step_1_scrape_data()
+            # Avant le scraping : un run blue/green partiel est refusé
+            self._check_bluegreen_partitions()
             
-            # Étape 2: Génération des résumés
-            summaries = self.step_2_generate_summaries(df_players)
+            # Étape 1: Récupération des données (toutes les partitions en parallèle)
+            datasets = self.step_1_scrape_data()
+            self._resolve_refresh_mode()
             
-            # Étape 3: Préparation des données
-            df_final = self.step_3_prepare_data(df_players, summaries)
-            
-            # Étape 4: Configuration de Qdrant
+            # Étape 4: Configuration de Qdrant (avant les partitions, qui y écrivent chacune)
             self.step_4_setup_qdrant()
             
-            # Étape 5: Stockage des embeddings
-            self.step_5_store_embeddings(df_final)
+            # Étapes 2, 3 et 5 : une partition par worker, limites OpenAI réparties entre elles
+            workers = max(1, min(config.Config.PARTITION_WORKERS, len(datasets)))
+            if self.profiler.profile_dir is not None and workers > 1:
+                # Un seul profileur cProfile à la fois : partitions construites une à une
+                print("🔬 Profilage des étapes : partitions construites une à une")
+                workers = 1
+            self._llm_share = workers
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                counts = list(executor.map(lambda item: self.build_partition(*item), datasets.items()))
+            self._compact_embedding_cache()
+            
+            # Étape 6: Publication de la collection
+            self.step_6_publish_collection()
+            self.measure_quantization()
+            
+            # Étape 7: Index BM25 du corpus
+            self.step_7_update_bm25_index()
+            
+            # Étape 8: Table des voisins et index vectoriel local (backends numpy / faiss)
+            self.step_8_build_vector_indexes()
             
             # Résumé final
             end_time = time.time()
@@ -450,22 +946,103 @@ class ScoutRAGPipeline:
             print("\n" + "=" * 50)
             print("🎉 Pipeline terminé avec succès !")
             print(f"⏱️ Durée totale: {duration:.2f} secondes")
-            print(f"📊 {len(df_final)} joueurs traités")
+            print(f"📊 {sum(counts)} joueurs traités ({len(counts)} partitions)")
             print(f"🗄️ Collection Qdrant: {self.collection_name}")
             print("🚀 L'application Gradio est prête à être utilisée !")
             
         except Exception as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"
             print(f"\n❌ Erreur dans le pipeline: {e}")
             raise
+        finally:
+            self._write_run_report(status, error)
+    
+    def _write_run_report(self, status: str, error: str | None):
+        """Rapport de l'exécution (logs/pipeline_runs/) et régressions face au rapport de référence"""
+        self.profiler.close()
+        report = self.profiler.report(status, error, context={
+            "partitions": [str(p) for p in self.partitions],
+            "refresh": self.refresh,
+            "summary_mode": config.Config.SUMMARY_MODE,
+            "sync_mode": config.Config.QDRANT_SYNC_MODE,
+            "embedding_model": embedding_model_id(),
+            "embedding_batch_size": config.Config.EMBEDDING_BATCH_SIZE,
+            "partition_workers": config.Config.PARTITION_WORKERS,
+        })
+        try:
+            path = self.profiler.save(report)
+        except OSError as e:
+            print(f"⚠️ Rapport d'exécution non écrit: {e}")
+            return
+        print_report(report)
+        if path is not None:
+            print(f"💾 Rapport d'exécution: {path}")
+        if status != "success":
+            return
+        
+        baseline_path = self.baseline or find_baseline(self.profiler.report_dir, before=report["run_id"])
+        if baseline_path is None:
+            return
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print_regressions(
+            compare_reports(
+                report,
+                baseline,
+                threshold=config.Config.PIPELINE_REGRESSION_THRESHOLD,
+                min_seconds=config.Config.PIPELINE_REGRESSION_MIN_SECONDS
+            ),
+            Path(baseline_path)
+        )
+
+def parse_args(argv=None):
+    """Arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Pipeline de données ScoutRAG")
+    parser.add_argument(
+        "--refresh",
+        choices=ScoutRAGPipeline.REFRESH_MODES,
+        default=None,
+        help="Résumés à (re)générer sans question interactive (ex: --refresh changed depuis cron)"
+    )
+    parser.add_argument(
+        "--seasons",
+        default=None,
+        help="Saisons à construire, séparées par des virgules (ex: 2324,2425). Défaut: SEASONS"
+    )
+    parser.add_argument(
+        "--leagues",
+        default=None,
+        help="Ligues FBref à construire, séparées par des virgules. Défaut: LEAGUES"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=None,
+        help="Profil cProfile de chaque étape dans logs/pipeline_profiles/ (défaut: PIPELINE_PROFILE)"
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=None,
+        help="Rapport d'exécution de référence pour les régressions (défaut: le précédent réussi)"
+    )
+    return parser.parse_args(argv)
 
 def main():
     """Fonction principale"""
+    args = parse_args()
     try:
         # Valider la configuration
         config.Config.validate()
         
         # Créer et exécuter le pipeline
-        pipeline = ScoutRAGPipeline()
+        partitions = build_partitions(
+            parse_list(args.seasons) or config.Config.SEASONS,
+            parse_list(args.leagues) or config.Config.LEAGUES
+        )
+        pipeline = ScoutRAGPipeline(
+            refresh=args.refresh, partitions=partitions, profile=args.profile, baseline=args.baseline
+        )
         pipeline.run_full_pipeline()
         
     except Exception as e:
@@ -0,0 +1,158 @@
+"""
+Cache disque des embeddings pour ScoutRAG
+Évite de ré-encoder les résumés inchangés d'une exécution du pipeline à l'autre
+"""
+
+import os
+import re
+import json
+import hashlib
+import numpy as np
+from pathlib import Path
+
+
+class EmbeddingCache:
+    """
+    Cache persistant des embeddings, indexé par hash(modèle + texte)
+
+    Les vecteurs sont stockés dans une matrice float32 brute (`vectors-<n>.f32`)
+    lue par memory-map ; l'index (`index.json`) associe chaque clé à sa ligne et
+    désigne le fichier de matrice courant.
+    """
+
+    def __init__(self, cache_dir: Path, model_name: str, dim: int):
+        """
+        Args:
+            cache_dir: Dossier racine du cache (ex: data/embedding_cache)
+            model_name: Nom du modèle d'embedding (fait partie de la clé)
+            dim: Dimension des vecteurs
+        """
+        self.model_name = model_name
+        self.dim = dim
+        self.cache_dir = Path(cache_dir) / re.sub(r"[^\w.-]+", "_", model_name)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.matrix_path = self.cache_dir / "vectors-0.f32"
+        self.index_path = self.cache_dir / "index.json"
+
+        self.index = {}
+        self._rows = 0
+        self._matrix = None
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        """Charge l'index et aligne la matrice sur le nombre de lignes indexées"""
+        if self.index_path.exists():
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("model") == self.model_name and data.get("dim") == self.dim:
+                self.index = data.get("keys", {})
+                self._rows = int(data.get("rows", 0))
+                self.matrix_path = self.cache_dir / data.get("matrix", self.matrix_path.name)
+
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        if self.matrix_path.exists():
+            # Des lignes écrites sans index (arrêt brutal) sont ignorées
+            if self.matrix_path.stat().st_size > self._rows * row_bytes:
+                with open(self.matrix_path, "r+b") as f:
+                    f.truncate(self._rows * row_bytes)
+        elif self._rows:
+            self.index, self._rows = {}, 0
+
+    def _vectors(self) -> np.ndarray:
+        """Vue memory-map (lecture seule) de la matrice"""
+        if self._rows == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        if self._matrix is None or self._matrix.shape[0] != self._rows:
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(self._rows, self.dim))
+        return self._matrix
+
+    def key(self, text: str) -> str:
+        """Clé de cache d'un texte pour le modèle courant"""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, text: str) -> bool:
+        return self.key(text) in self.index
+
+    def lookup(self, texts: list[str]) -> tuple[dict, list[int]]:
+        """
+        Recherche les textes dans le cache
+
+        Returns:
+            (vecteurs trouvés par position dans `texts`, positions manquantes)
+        """
+        matrix = self._vectors()
+        found, missing = {}, []
+        for i, text in enumerate(texts):
+            row = self.index.get(self.key(text))
+            if row is None:
+                missing.append(i)
+            else:
+                found[i] = np.array(matrix[row])
+        return found, missing
+
+    def add(self, texts: list[str], vectors: np.ndarray):
+        """Ajoute des vecteurs en fin de matrice (l'index est écrit par `flush`)"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        new_rows = []
+        for text, vector in zip(texts, vectors):
+            k = self.key(text)
+            if k in self.index:
+                continue
+            self.index[k] = self._rows + len(new_rows)
+            new_rows.append(vector)
+
+        if not new_rows:
+            return
+        with open(self.matrix_path, "ab") as f:
+            f.write(np.stack(new_rows).tobytes())
+        self._rows += len(new_rows)
+        self._dirty = True
+
+    def flush(self):
+        """Écrit l'index de façon atomique"""
+        if not self._dirty:
+            return
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "model": self.model_name,
+                "dim": self.dim,
+                "rows": self._rows,
+                "matrix": self.matrix_path.name,
+                "keys": self.index,
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def compact(self, live_texts: list[str]):
+        """Réécrit le cache en ne gardant que les textes encore utilisés"""
+        live_keys = {self.key(t) for t in live_texts}
+        keep = [(k, row) for k, row in self.index.items() if k in live_keys]
+        if len(keep) == len(self.index):
+            return
+
+        matrix = self._vectors()
+        rows = np.array([row for _, row in keep], dtype=np.int64)
+        kept = np.array(matrix[rows]) if len(rows) else np.empty((0, self.dim), dtype=np.float32)
+        self._matrix = None
+
+        # Nouvelle matrice dans un nouveau fichier : l'index ne bascule dessus qu'une fois écrite
+        old_path = self.matrix_path
+        generation = int(old_path.stem.rsplit("-", 1)[-1]) + 1
+        self.matrix_path = self.cache_dir / f"vectors-{generation}.f32"
+        with open(self.matrix_path, "wb") as f:
+            f.write(kept.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.index = {k: i for i, (k, _) in enumerate(keep)}
+        self._rows = len(keep)
+        self._dirty = True
+        self.flush()
+        old_path.unlink(missing_ok=True)
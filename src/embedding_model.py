@@ -0,0 +1,250 @@
+"""
+Chargement du modèle d'encodage
+Backends d'exécution (PyTorch fp32 ou int8 dynamique, ONNX Runtime fp32 ou int8), import
+paresseux de sentence-transformers, chargement et chauffe en arrière-plan
+"""
+
+import re
+import json
+import time
+import shutil
+import threading
+import numpy as np
+from pathlib import Path
+
+import config
+
+# torch : modèle d'origine (fp32)
+# torch-int8 : couches linéaires quantifiées dynamiquement en int8 (CPU)
+# onnx / onnx-int8 : export ONNX exécuté par onnxruntime, poids int8 pour onnx-int8
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Rapport de parité des backends (evaluation.py --encoder-parity), consulté avant d'en activer un
+PARITY_REPORT_PATH = config.LOGS_DIR / "encoder_parity.json"
+
+# Requêtes de chauffe : longueurs variées (premières passes du modèle, allocations)
+WARMUP_TEXTS = [
+    "défenseur central",
+    "milieu central polyvalent avec capacité à jouer entre les lignes",
+    "attaquant rapide avec finition, appels en profondeur et pressing haut sur la relance adverse",
+]
+
+
+def embedding_model_id(model_name: str | None = None, backend: str | None = None) -> str:
+    """
+    Identifiant des vecteurs produits (clé du cache d'embeddings, rapport de parité) :
+    nom du modèle, backend hors torch et longueur maximale si elle est limitée
+    """
+    model_name = model_name or config.Config.EMBEDDING_MODEL
+    backend = backend or effective_backend(model_name)
+    model_id = model_name if backend == "torch" else f"{model_name}@{backend}"
+    if config.Config.EMBEDDING_MAX_SEQ_LENGTH > 0:
+        model_id += f"@max{config.Config.EMBEDDING_MAX_SEQ_LENGTH}"
+    return model_id
+
+
+def cosine_drift(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    """Cosinus entre les vecteurs d'un même texte produits par deux backends : moyenne, minimum, 1er centile"""
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    cosines = np.sum(reference * candidate, axis=1) / np.where(norms > 0, norms, 1.0)
+    if not len(cosines):
+        return {"mean": None, "min": None, "p01": None}
+    return {
+        "mean": float(np.mean(cosines)),
+        "min": float(np.min(cosines)),
+        "p01": float(np.percentile(cosines, 1)),
+    }
+
+
+def parity_approved(backend: str, model_name: str | None = None) -> bool:
+    """Vrai si le rapport de parité valide ce backend pour ce modèle (et cette longueur maximale)"""
+    if backend == "torch":
+        return True
+    if not PARITY_REPORT_PATH.exists():
+        return False
+    with open(PARITY_REPORT_PATH, "r", encoding="utf-8") as f:
+        reports = json.load(f)
+    report = reports.get(embedding_model_id(model_name, backend)) or {}
+    return bool(report.get("passed"))
+
+
+def save_parity_report(reports: dict):
+    """Ajoute les rapports {identifiant du modèle: rapport} au rapport de parité (écriture atomique)"""
+    existing = {}
+    if PARITY_REPORT_PATH.exists():
+        with open(PARITY_REPORT_PATH, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+    existing.update({model_id: {**report, "checked_at": time.time()} for model_id, report in reports.items()})
+    tmp_path = PARITY_REPORT_PATH.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(existing, f, ensure_ascii=False, indent=2)
+    tmp_path.replace(PARITY_REPORT_PATH)
+    print(f"💾 Rapport de parité: {PARITY_REPORT_PATH}")
+
+
+def effective_backend(model_name: str | None = None) -> str:
+    """Backend réellement utilisé : EMBEDDING_BACKEND, ou torch s'il n'est pas validé (EMBEDDING_PARITY_REQUIRED)"""
+    backend = config.Config.EMBEDDING_BACKEND
+    if config.Config.EMBEDDING_PARITY_REQUIRED and not parity_approved(backend, model_name):
+        return "torch"
+    return backend
+
+
+def _set_threads():
+    """Threads de calcul de PyTorch (EMBEDDING_THREADS, 0 = valeur par défaut)"""
+    if config.Config.EMBEDDING_THREADS > 0:
+        import torch
+        torch.set_num_threads(config.Config.EMBEDDING_THREADS)
+
+
+def _onnx_kwargs(file_name: str | None = None) -> dict:
+    """Options de la session onnxruntime : CPU, EMBEDDING_THREADS threads, fichier du modèle"""
+    model_kwargs = {"provider": "CPUExecutionProvider"}
+    if config.Config.EMBEDDING_THREADS > 0:
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = config.Config.EMBEDDING_THREADS
+        model_kwargs["session_options"] = options
+    if file_name:
+        model_kwargs["file_name"] = file_name
+    return model_kwargs
+
+
+def _export_onnx_int8(model_name: str, export_dir: Path, file_name: str):
+    """Export ONNX du modèle puis quantification dynamique des poids en int8, publiés d'un bloc"""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    print(f"📦 Export ONNX int8 de {model_name} ({config.Config.EMBEDDING_ONNX_QCONFIG})...")
+    tmp_dir = export_dir.with_name(export_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    model = SentenceTransformer(model_name, backend="onnx")
+    model.save(str(tmp_dir))
+    export_dynamic_quantized_onnx_model(model, config.Config.EMBEDDING_ONNX_QCONFIG, str(tmp_dir))
+    if not (tmp_dir / file_name).exists():
+        raise FileNotFoundError(f"Export ONNX int8 introuvable: {tmp_dir / file_name}")
+    shutil.rmtree(export_dir, ignore_errors=True)
+    tmp_dir.replace(export_dir)
+
+
+def load_sentence_transformer(model_name: str | None = None, backend: str | None = None,
+                              check_parity: bool = True):
+    """
+    SentenceTransformer exécuté par le backend demandé (`config.Config.EMBEDDING_BACKEND` par défaut)
+
+    Avec EMBEDDING_PARITY_REQUIRED, un backend autre que torch n'est utilisé que s'il a été
+    validé par `python evaluation.py --encoder-parity <backend>` ; sinon retour à torch.
+
+    Args:
+        check_parity: Faux pour charger un backend non validé (mesure de parité)
+    """
+    from sentence_transformers import SentenceTransformer
+
+    model_name = model_name or config.Config.EMBEDDING_MODEL
+    backend = backend or config.Config.EMBEDDING_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"EMBEDDING_BACKEND inconnu: {backend}")
+    if check_parity and backend != "torch" and config.Config.EMBEDDING_PARITY_REQUIRED \
+            and not parity_approved(backend, model_name):
+        print(f"⚠️ Backend {backend} non validé pour {model_name} "
+              f"(python evaluation.py --encoder-parity {backend}), encodage avec torch")
+        backend = "torch"
+
+    if backend == "torch":
+        _set_threads()
+        model = SentenceTransformer(model_name)
+    elif backend == "torch-int8":
+        import torch
+        _set_threads()
+        model = SentenceTransformer(model_name, device="cpu")
+        torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    elif backend == "onnx":
+        model = SentenceTransformer(model_name, backend="onnx", model_kwargs=_onnx_kwargs())
+    else:
+        export_dir = Path(config.Config.EMBEDDING_ONNX_DIR) / re.sub(r"[^\w.-]+", "_", model_name)
+        file_name = f"onnx/model_qint8_{config.Config.EMBEDDING_ONNX_QCONFIG}.onnx"
+        if not (export_dir / file_name).exists():
+            _export_onnx_int8(model_name, export_dir, file_name)
+        model = SentenceTransformer(str(export_dir), backend="onnx", model_kwargs=_onnx_kwargs(file_name))
+
+    if config.Config.EMBEDDING_MAX_SEQ_LENGTH > 0:
+        model.max_seq_length = config.Config.EMBEDDING_MAX_SEQ_LENGTH
+    return model
+
+
+class BackgroundModel:
+    """
+    Modèle d'encodage chargé (puis chauffé) dans un thread dès la création
+
+    `encode` et les autres attributs du modèle attendent la fin du chargement : l'application
+    et l'interface démarrent sans attendre le modèle, seules les premières requêtes patientent.
+    """
+
+    def __init__(self, loader=load_sentence_transformer, warmup_texts: list[str] = (), background: bool = True):
+        """
+        Args:
+            loader: Fonction sans argument renvoyant le modèle
+            warmup_texts: Textes encodés (un par un puis en lot) avant de déclarer le modèle prêt
+            background: Faux = chargement immédiat dans le thread appelant
+        """
+        self._loader = loader
+        self._warmup_texts = list(warmup_texts)
+        self._model = None
+        self._error = None
+        self._done = threading.Event()
+        self._status = {"state": "loading", "load_seconds": None, "warmup_seconds": None, "error": None}
+        if background:
+            threading.Thread(target=self._load, name="model-loader", daemon=True).start()
+        else:
+            self._load()
+
+    def _load(self):
+        try:
+            start = time.perf_counter()
+            model = self._loader()
+            self._status["load_seconds"] = round(time.perf_counter() - start, 3)
+
+            if self._warmup_texts:
+                self._status["state"] = "warming"
+                start = time.perf_counter()
+                for text in self._warmup_texts:
+                    model.encode([text], normalize_embeddings=True, show_progress_bar=False)
+                model.encode(self._warmup_texts, normalize_embeddings=True, show_progress_bar=False)
+                self._status["warmup_seconds"] = round(time.perf_counter() - start, 3)
+
+            self._model = model
+            self._status["state"] = "ready"
+            print(f"🧠 Modèle d'encodage prêt (chargement {self._status['load_seconds']}s, "
+                  f"chauffe {self._status['warmup_seconds'] or 0}s)")
+        except BaseException as e:
+            self._error = e
+            self._status.update(state="failed", error=str(e))
+            print(f"❌ Chargement du modèle d'encodage impossible: {e}")
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set() and self._error is None
+
+    def status(self) -> dict:
+        """État ("loading", "warming", "ready", "failed") et durées de chargement et de chauffe (s)"""
+        return dict(self._status)
+
+    def wait(self, timeout: float | None = None):
+        """Le modèle chargé (bloque jusqu'à la fin du chargement)"""
+        if not self._done.wait(timeout):
+            raise TimeoutError("Modèle d'encodage toujours en chargement")
+        if self._error is not None:
+            raise RuntimeError(f"Modèle d'encodage indisponible: {self._error}") from self._error
+        return self._model
+
+    def encode(self, *args, **kwargs):
+        return self.wait().encode(*args, **kwargs)
+
+    def __getattr__(self, name):
+        # Autres méthodes du modèle (dimension, pool multi-processus...)
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.wait(), name)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Évaluation de la recherche sur data/player_queries.json
+Rappel de chaque étape (dense, lexicale, fusion), nDCG du joueur attendu et durées par étape
+
+Usage:
+    python evaluation.py --k 5
+    SEARCH_FUSION=rrf python evaluation.py --k 10
+    python evaluation.py --k 5 --two-stage 2,4,8     # compromis latence/rappel de la recherche en deux temps
+    python evaluation.py --k 5 --encoder-parity onnx-int8,torch-int8   # parité des backends d'encodage
+"""
+
+import sys
+import os
+import json
+import math
+import time
+import random
+import argparse
+import numpy as np
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+import config
+
+
+def load_queries(path: Path) -> list[dict]:
+    """Requêtes d'évaluation : [{"query": ..., "expected_player": ...}]"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [d for d in data if d.get("query") and d.get("expected_player")] if isinstance(data, list) else []
+
+
+def ndcg_at_k(gains: list[int], k: int) -> float:
+    gains = gains[:k]
+    dcg = sum(g / math.log2(i + 2) for i, g in enumerate(gains))
+    ideal = sorted(gains, reverse=True)
+    idcg = sum(g / math.log2(i + 2) for i, g in enumerate(ideal))
+    return (dcg / idcg) if idcg > 0 else 0.0
+
+
+def hit_at_k(names: list[str], expected: str, k: int) -> bool:
+    """Vrai si le joueur attendu figure dans les `k` premiers"""
+    return expected in names[:k]
+
+
+def evaluate_search(app, queries: list[dict], k: int = 5) -> dict:
+    """
+    Évalue `app.search_players_with_trace` sur les requêtes
+
+    Returns:
+        Rappel du joueur attendu par étape (dense et lexicale sur toute leur liste,
+        fusion sur les `k` résultats), nDCG@k exact, durées moyennes et p95 par étape (ms)
+    """
+    hits = {"dense": 0, "sparse": 0, "union": 0, "fused": 0}
+    ndcgs, timings = [], {}
+    evaluated = 0
+
+    for sample in queries:
+        results, trace = app.search_players_with_trace(sample["query"], top_k=k)
+        expected = sample["expected_player"]
+        names = trace["names"]
+
+        dense_names = [names.get(pid) for pid in trace["dense"]]
+        sparse_names = [names.get(pid) for pid in trace["sparse"]]
+        fused_names = [r["name"] for r in results]
+
+        hits["dense"] += expected in dense_names
+        hits["sparse"] += expected in sparse_names
+        hits["union"] += expected in dense_names or expected in sparse_names
+        hits["fused"] += hit_at_k(fused_names, expected, k)
+        ndcgs.append(ndcg_at_k([1 if name == expected else 0 for name in fused_names], k))
+        for stage, ms in trace["timings"].items():
+            timings.setdefault(stage, []).append(ms)
+        evaluated += 1
+
+    if not evaluated:
+        return {"queries": 0}
+
+    return {
+        "queries": evaluated,
+        "fusion": config.Config.SEARCH_FUSION,
+        "weights": {"dense": config.Config.SEARCH_DENSE_WEIGHT, "sparse": config.Config.SEARCH_SPARSE_WEIGHT},
+        "recall": {
+            "dense": hits["dense"] / evaluated,
+            "sparse": hits["sparse"] / evaluated,
+            "union": hits["union"] / evaluated,
+            f"fused@{k}": hits["fused"] / evaluated,
+        },
+        f"nDCG@{k}": float(np.mean(ndcgs)),
+        "timings_ms": {
+            stage: {"mean": float(np.mean(values)), "p95": float(np.percentile(values, 95))}
+            for stage, values in timings.items()
+        },
+    }
+
+
+def compare_two_stage(app, queries: list[dict], k: int, oversamplings: list[float]) -> dict:
+    """
+    Recherche dense en un temps (vecteur complet) puis en deux temps pour chaque sur-échantillonnage
+
+    Returns:
+        Rapport de `evaluate_search` par configuration, avec le recouvrement moyen de la liste
+        dense en deux temps avec celle de la recherche complète
+    """
+    previous = (config.Config.SEARCH_TWO_STAGE, config.Config.SEARCH_TWO_STAGE_OVERSAMPLING)
+    reports, baseline_dense = {}, {}
+    try:
+        for oversampling in [None] + oversamplings:
+            config.Config.SEARCH_TWO_STAGE = oversampling is not None
+            if oversampling is not None:
+                config.Config.SEARCH_TWO_STAGE_OVERSAMPLING = oversampling
+            # Le cache de résultats ne distingue pas les modes de recherche
+            app.result_cache.clear()
+            name = "full" if oversampling is None else f"two_stage_x{oversampling:g}"
+
+            # Premier passage : listes denses à comparer (et chauffe du cache des vecteurs de requête)
+            overlaps = []
+            for sample in queries:
+                _, trace = app.search_players_with_trace(sample["query"], top_k=k)
+                dense = trace["dense"]
+                if oversampling is None:
+                    baseline_dense[sample["query"]] = set(dense)
+                elif baseline_dense.get(sample["query"]):
+                    expected = baseline_dense[sample["query"]]
+                    overlaps.append(len(expected & set(dense)) / len(expected))
+
+            app.result_cache.clear()
+            report = evaluate_search(app, queries, k)
+            if overlaps:
+                report["dense_overlap_with_full"] = float(np.mean(overlaps))
+            reports[name] = report
+    finally:
+        config.Config.SEARCH_TWO_STAGE, config.Config.SEARCH_TWO_STAGE_OVERSAMPLING = previous
+        app.result_cache.clear()
+    return reports
+
+
+def print_two_stage_report(reports: dict, k: int):
+    """Tableau du compromis latence/rappel des recherches en un et deux temps"""
+    print(f"{'mode':<18} {'dense moy':>10} {'dense p95':>10} {'rappel dense':>13} {'recouvr.':>9} "
+          f"{f'fused@{k}':>9} {f'nDCG@{k}':>8}")
+    for name, report in reports.items():
+        if not report.get("queries"):
+            continue
+        dense = report["timings_ms"].get("dense", {})
+        print(f"{name:<18} {dense.get('mean', 0):>8.1f}ms {dense.get('p95', 0):>8.1f}ms "
+              f"{report['recall']['dense']:>13.3f} {report.get('dense_overlap_with_full', 1.0):>9.3f} "
+              f"{report['recall'][f'fused@{k}']:>9.3f} {report[f'nDCG@{k}']:>8.3f}")
+
+
+def compare_encoder_backends(app, queries: list[dict], k: int, backends: list[str], samples: int = 200) -> dict:
+    """
+    Parité des backends d'encodage avec torch (fp32)
+
+    - dérive : cosinus entre les vecteurs torch et ceux du backend, sur les requêtes d'évaluation
+      et sur un échantillon de `samples` résumés du corpus
+    - impact : `evaluate_search` avec les vecteurs de requête du backend (index inchangé),
+      écart de nDCG avec torch
+    - coût : durée d'encodage d'une requête seule et résumés encodés par seconde
+
+    Returns:
+        {identifiant du modèle: rapport de `evaluate_search` complété}, "passed" vrai si le
+        1er centile des cosinus et la perte de nDCG respectent les seuils EMBEDDING_PARITY_*
+    """
+    from batch_encoder import MicroBatchEncoder
+    from embedding_model import load_sentence_transformer, cosine_drift, embedding_model_id, effective_backend
+
+    query_texts = [sample["query"] for sample in queries]
+    payloads = app._collection_sync.fetch_payloads(app.collection_name, ["summary"])
+    summaries = [str(p.get("summary", "")) for p in payloads.values() if p.get("summary")]
+    summaries = random.Random(0).sample(summaries, min(samples, len(summaries)))
+
+    previous_encoder = app.query_encoder
+    reports, reference = {}, None
+    try:
+        for backend in ["torch"] + [b for b in backends if b != "torch"]:
+            # Le modèle de l'application sert de référence s'il tourne déjà avec torch
+            model = app.embedding_model.wait() if backend == effective_backend() == "torch" \
+                else load_sentence_transformer(backend=backend, check_parity=False)
+
+            start = time.perf_counter()
+            document_vectors = model.encode(summaries, batch_size=config.Config.EMBEDDING_BATCH_SIZE,
+                                            normalize_embeddings=True, show_progress_bar=False)
+            documents_per_s = len(summaries) / max(time.perf_counter() - start, 1e-9)
+            latencies = []
+            for text in query_texts[:50]:
+                start = time.perf_counter()
+                model.encode([text], normalize_embeddings=True, show_progress_bar=False)
+                latencies.append((time.perf_counter() - start) * 1000)
+            query_vectors = model.encode(query_texts, normalize_embeddings=True, show_progress_bar=False)
+            if reference is None:
+                reference = (query_vectors, document_vectors)
+
+            # Recherche complète avec les vecteurs de requête du backend
+            app.query_encoder = MicroBatchEncoder(
+                model, config.Config.QUERY_BATCH_MAX_SIZE, config.Config.QUERY_BATCH_MAX_WAIT_MS
+            )
+            app.query_vector_cache.clear()
+            app.result_cache.clear()
+            try:
+                report = evaluate_search(app, queries, k)
+            finally:
+                app.query_encoder.close()
+
+            report["backend"] = backend
+            report["max_seq_length"] = getattr(model, "max_seq_length", None)
+            report["cosine"] = {
+                "queries": cosine_drift(reference[0], query_vectors),
+                "documents": cosine_drift(reference[1], document_vectors),
+            }
+            report["query_encode_ms"] = float(np.mean(latencies)) if latencies else None
+            report["documents_per_s"] = documents_per_s
+            baseline_ndcg = reports[embedding_model_id(backend="torch")].get(f"nDCG@{k}") if reports else None
+            ndcg = report.get(f"nDCG@{k}")
+            report["ndcg_delta"] = ndcg - baseline_ndcg if ndcg is not None and baseline_ndcg is not None else 0.0
+            worst = min((c["p01"] for c in report["cosine"].values() if c["p01"] is not None), default=1.0)
+            report["passed"] = bool(
+                worst >= config.Config.EMBEDDING_PARITY_MIN_COSINE
+                and -report["ndcg_delta"] <= config.Config.EMBEDDING_PARITY_MAX_NDCG_DROP
+            )
+            reports[embedding_model_id(backend=backend)] = report
+            del model
+    finally:
+        app.query_encoder = previous_encoder
+        app.query_vector_cache.clear()
+        app.result_cache.clear()
+    return reports
+
+
+def print_encoder_parity_report(reports: dict, k: int):
+    """Tableau de parité des backends d'encodage (cosinus avec torch, coût, nDCG)"""
+    print(f"{'backend':<11} {'cos moy':>8} {'cos p01':>8} {'requête':>9} {'résumés/s':>10} "
+          f"{f'nDCG@{k}':>8} {'écart':>7}  validé")
+    for report in reports.values():
+        cosine = min((c for c in report["cosine"].values() if c["p01"] is not None),
+                     key=lambda c: c["p01"], default={"mean": 1.0, "p01": 1.0})
+        print(f"{report['backend']:<11} {cosine['mean']:>8.4f} {cosine['p01']:>8.4f} "
+              f"{report['query_encode_ms'] or 0:>7.1f}ms {report['documents_per_s']:>10.1f} "
+              f"{report.get(f'nDCG@{k}', 0):>8.3f} {report['ndcg_delta']:>+7.3f}  "
+              f"{'✅' if report['passed'] else '❌'}")
+
+
+def print_report(report: dict):
+    """Affiche le rapport d'évaluation"""
+    if not report.get("queries"):
+        print("⚠️ Aucune requête évaluée")
+        return
+    print(f"📋 {report['queries']} requêtes | fusion={report['fusion']} | poids={report['weights']}")
+    for stage, value in report["recall"].items():
+        print(f"   rappel {stage:<10} {value:.3f}")
+    for key, value in report.items():
+        if key.startswith("nDCG"):
+            print(f"   {key:<17} {value:.3f}")
+    for stage, values in report["timings_ms"].items():
+        print(f"   ⏱️ {stage:<9} moy={values['mean']:.1f}ms p95={values['p95']:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Évaluation de la recherche ScoutRAG")
+    parser.add_argument("--queries", default=str(config.DATA_DIR / "player_queries.json"))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Fichier JSON du rapport")
+    parser.add_argument(
+        "--two-stage",
+        default=None,
+        help="Comparer la recherche en deux temps pour ces sur-échantillonnages (ex: 2,4,8)"
+    )
+    parser.add_argument(
+        "--encoder-parity",
+        default=None,
+        help="Vérifier la parité de ces backends d'encodage avec torch (ex: onnx-int8,torch-int8) "
+             "et enregistrer le résultat dans logs/encoder_parity.json"
+    )
+    args = parser.parse_args()
+
+    from gradio_app import PlayerSearchApp
+
+    queries = load_queries(Path(args.queries))
+    if args.two_stage:
+        if config.Config.QDRANT_MINI_DIM <= 0:
+            print("⚠️ QDRANT_MINI_DIM=0 : la collection n'a pas de vecteur réduit")
+            return
+        oversamplings = [float(x) for x in args.two_stage.split(",") if x.strip()]
+        report = compare_two_stage(PlayerSearchApp(), queries, args.k, oversamplings)
+        print_two_stage_report(report, args.k)
+    elif args.encoder_parity:
+        from embedding_model import save_parity_report
+        backends = [b.strip() for b in args.encoder_parity.split(",") if b.strip()]
+        report = compare_encoder_backends(
+            PlayerSearchApp(), queries, args.k, backends, config.Config.EMBEDDING_PARITY_SAMPLES
+        )
+        print_encoder_parity_report(report, args.k)
+        save_parity_report(report)
+    else:
+        report = evaluate_search(PlayerSearchApp(), queries, k=args.k)
+        print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
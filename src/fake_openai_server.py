@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Serveur local compatible OpenAI pour tester la génération des résumés sans appel réel
+Endpoints simulés : chat.completions, files (upload/contenu) et batches
+
+Usage:
+    python fake_openai_server.py --port 8001 --latency 0.2 --rate-limit-rpm 120
+    python fake_openai_server.py --rate-limit-rpm 5 --rate-window 1 --error-rate 0.2 --seed 7   # tests rapides et reproductibles
+    OPENAI_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=test python data_pipeline.py
+"""
+
+import re
+import json
+import time
+import email
+import email.policy
+import random
+import argparse
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FAKE_SUMMARY = (
+    "Joueur au volume de jeu important, impliqué dans la circulation du ballon et le pressing. "
+    "Il gagnerait à améliorer son efficacité dans les derniers mètres.\n"
+    "**Profil-type :** Milieu box-to-box intense"
+)
+
+
+class FakeOpenAIState:
+    """État partagé du serveur (fenêtre glissante pour simuler les 429)"""
+
+    def __init__(self, latency: float, rate_limit_rpm: int, error_rate: float,
+                 rate_window: float = 60.0, seed: int | None = None, batch_delay: float = 2.0):
+        """
+        Args:
+            rate_limit_rpm: Requêtes acceptées par fenêtre glissante (0 = illimité)
+            rate_window: Durée de la fenêtre (s, 60 = limite par minute ; plus courte pour les tests)
+            seed: Graine du tirage des erreurs simulées (None = aléatoire)
+        """
+        self.latency = latency
+        self.rate_limit_rpm = rate_limit_rpm
+        self.error_rate = error_rate
+        self.rate_window = rate_window
+        self.batch_delay = batch_delay
+        # Tirages des erreurs sous verrou, dans l'ordre d'arrivée des requêtes : reproductibles avec `seed`
+        self.random = random.Random(seed)
+        self.requests = deque()
+        self.lock = threading.Lock()
+        self.counters = {"completions": 0, "rate_limited": 0, "errors": 0, "batches": 0}
+        self.files = {}
+        self.batches = {}
+
+    def add_file(self, filename: str, content: bytes, purpose: str) -> dict:
+        file_id = f"file-{random.getrandbits(48):012x}"
+        self.files[file_id] = {
+            "meta": {
+                "id": file_id,
+                "object": "file",
+                "bytes": len(content),
+                "created_at": int(time.time()),
+                "filename": filename,
+                "purpose": purpose,
+                "status": "processed",
+            },
+            "content": content,
+        }
+        return self.files[file_id]["meta"]
+
+    def create_batch(self, body: dict) -> dict:
+        batch_id = f"batch_{random.getrandbits(48):012x}"
+        lines = self.files[body["input_file_id"]]["content"].decode("utf-8").splitlines()
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body.get("endpoint"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "metadata": body.get("metadata"),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": len([l for l in lines if l.strip()]), "completed": 0, "failed": 0},
+        }
+        self.batches[batch_id] = {"batch": batch, "ready_at": time.monotonic() + self.batch_delay, "lines": lines}
+        self.counters["batches"] += 1
+        return batch
+
+    def get_batch(self, batch_id: str) -> dict:
+        """Termine le lot (résultats + erreurs) une fois le délai simulé écoulé"""
+        entry = self.batches[batch_id]
+        batch = entry["batch"]
+        if batch["status"] == "in_progress" and time.monotonic() >= entry["ready_at"]:
+            outputs, errors = [], []
+            for line in entry["lines"]:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                if self.fail():
+                    errors.append({
+                        "id": f"batch_req_{random.getrandbits(32):08x}",
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 500, "body": {"error": {"message": "Simulated server error"}}},
+                        "error": None,
+                    })
+                    continue
+                outputs.append({
+                    "id": f"batch_req_{random.getrandbits(32):08x}",
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": chat_completion(request["body"])},
+                    "error": None,
+                })
+            to_bytes = lambda rows: "".join(json.dumps(r) + "\n" for r in rows).encode("utf-8")
+            batch["output_file_id"] = self.add_file("output.jsonl", to_bytes(outputs), "batch_output")["id"]
+            if errors:
+                batch["error_file_id"] = self.add_file("errors.jsonl", to_bytes(errors), "batch_output")["id"]
+            batch["request_counts"].update({"completed": len(outputs), "failed": len(errors)})
+            batch["status"] = "completed"
+            batch["completed_at"] = int(time.time())
+        return batch
+
+    def allow(self) -> float | None:
+        """None si la requête passe la limite RPM simulée, sinon l'attente avant la prochaine place (s)"""
+        if not self.rate_limit_rpm:
+            return None
+        now = time.monotonic()
+        with self.lock:
+            while self.requests and now - self.requests[0] > self.rate_window:
+                self.requests.popleft()
+            if len(self.requests) >= self.rate_limit_rpm:
+                self.counters["rate_limited"] += 1
+                return self.requests[0] + self.rate_window - now
+            self.requests.append(now)
+            return None
+
+    def fail(self) -> bool:
+        """Tirage d'une erreur simulée (proportion `error_rate`)"""
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+
+def chat_completion(body: dict) -> dict:
+    """Réponse chat.completions factice"""
+    prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+    prompt_tokens = prompt_chars // 3
+    completion_tokens = len(FAKE_SUMMARY) // 3
+    return {
+        "id": f"chatcmpl-{random.getrandbits(48):012x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": FAKE_SUMMARY},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Gestionnaire HTTP des endpoints OpenAI simulés"""
+
+    protocol_version = "HTTP/1.1"
+    state: FakeOpenAIState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict | None = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length)
+
+    def _read_json(self) -> dict:
+        return json.loads(self._read_body() or b"{}")
+
+    def _read_multipart(self) -> dict:
+        """Champs d'un formulaire multipart : {nom: (nom de fichier, contenu)}"""
+        raw = b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + self._read_body()
+        message = email.message_from_bytes(raw, policy=email.policy.HTTP)
+        fields = {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            fields[name] = (part.get_filename(), part.get_payload(decode=True))
+        return fields
+
+    def do_POST(self):
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            body = self._read_json()
+            wait = self.state.allow()
+            if wait is not None:
+                self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                                headers={"Retry-After": f"{max(wait, 0.01):.2f}"})
+                return
+            if self.state.fail():
+                self.state.counters["errors"] += 1
+                self._send_json(500, {"error": {"message": "Simulated server error", "type": "server_error"}})
+                return
+            time.sleep(self.state.latency)
+            self.state.counters["completions"] += 1
+            self._send_json(200, chat_completion(body))
+            return
+        if self.path.rstrip("/").endswith("/files"):
+            fields = self._read_multipart()
+            filename, content = fields["file"]
+            purpose = fields.get("purpose", (None, b"batch"))[1].decode()
+            self._send_json(200, self.state.add_file(filename or "upload.jsonl", content, purpose))
+            return
+        if self.path.rstrip("/").endswith("/batches"):
+            body = self._read_json()
+            if body.get("input_file_id") not in self.state.files:
+                self._send_json(404, {"error": {"message": "Unknown input file"}})
+                return
+            self._send_json(200, self.state.create_batch(body))
+            return
+        self._send_json(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/stats":
+            self._send_json(200, self.state.counters)
+            return
+        m = re.search(r"/files/([^/]+)/content$", path)
+        if m and m.group(1) in self.state.files:
+            content = self.state.files[m.group(1)]["content"]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+        m = re.search(r"/files/([^/]+)$", path)
+        if m and m.group(1) in self.state.files:
+            self._send_json(200, self.state.files[m.group(1)]["meta"])
+            return
+        m = re.search(r"/batches/([^/]+)$", path)
+        if m and m.group(1) in self.state.batches:
+            self._send_json(200, self.state.get_batch(m.group(1)))
+            return
+        self._send_json(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8001, latency: float = 0.2,
+                rate_limit_rpm: int = 0, error_rate: float = 0.0, rate_window: float = 60.0,
+                seed: int | None = None, batch_delay: float = 2.0) -> ThreadingHTTPServer:
+    """
+    Crée le serveur (utilisable depuis un script de test, via serve_forever dans un thread)
+
+    Avec port=0, le système choisit un port libre (`server.server_address[1]`).
+    """
+    handler = type("Handler", (FakeOpenAIHandler,), {
+        "state": FakeOpenAIState(latency, rate_limit_rpm, error_rate, rate_window, seed, batch_delay)
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur OpenAI factice pour ScoutRAG")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="Latence simulée par réponse (s)")
+    parser.add_argument("--rate-limit-rpm", type=int, default=0, help="Renvoie 429 au-delà de ce RPM (0 = illimité)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses 500")
+    parser.add_argument("--rate-window", type=float, default=60.0, help="Fenêtre de la limite --rate-limit-rpm (s)")
+    parser.add_argument("--seed", type=int, default=None, help="Graine des erreurs simulées (reproductibles)")
+    parser.add_argument("--batch-delay", type=float, default=2.0, help="Durée de traitement simulée d'un lot (s)")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.rate_limit_rpm, args.error_rate,
+                         args.rate_window, args.seed, args.batch_delay)
+    print(f"🧪 Serveur OpenAI factice sur http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Récupération parallèle et mise en cache des statistiques FBref
+Les types de stats, saisons et ligues sont récupérés en parallèle sous une limite polie par hôte
+"""
+
+import time
+import threading
+import itertools
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+STAT_TYPES = ['standard', 'shooting', 'passing', 'defense', 'possession', 'misc']
+INDEX_COLUMNS = ['league', 'season', 'team', 'player']
+FBREF_HOST = "fbref.com"
+
+
+def flatten_stat_table(df: pd.DataFrame, stat: str) -> pd.DataFrame:
+    """
+    Aplatit les colonnes MultiIndex et suffixe les colonnes de stats par leur type
+
+    Returns:
+        Table indexée par (league, season, team, player), colonnes `<colonne>_<type>`
+    """
+    df = df.copy()
+    df.columns = ['_'.join(col).strip() if isinstance(col, tuple) else col for col in df.columns]
+
+    # Les identifiants éventuellement présents en colonnes rejoignent l'index
+    if not set(INDEX_COLUMNS).issubset(df.index.names):
+        df = df.reset_index()
+        df = df.set_index([col for col in INDEX_COLUMNS if col in df.columns])
+    # Les colonnes d'identification restantes gardent leur nom, les stats sont suffixées
+    key_cols = [col for col in df.columns if any(k in col.lower() for k in ['player', 'season', 'team', 'comp'])]
+    df = df.rename(columns={col: f"{col}_{stat}" for col in df.columns if col not in key_cols})
+    return df[~df.index.duplicated(keep='first')]
+
+
+class HostLimiter:
+    """Limite polie par hôte : requêtes simultanées bornées et intervalle minimal entre deux départs"""
+
+    def __init__(self, max_concurrent: int = 2, min_interval: float = 3.0):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self._semaphores = {}
+        self._last_start = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_concurrent)
+            return self._semaphores[host]
+
+    def acquire(self, host: str):
+        self._semaphore(host).acquire()
+        while True:
+            with self._lock:
+                wait = self._last_start.get(host, 0.0) + self.min_interval - time.monotonic()
+                if wait <= 0:
+                    self._last_start[host] = time.monotonic()
+                    return
+            time.sleep(wait)
+
+    def release(self, host: str):
+        self._semaphore(host).release()
+
+
+class TableCache:
+    """Cache disque des tables de stats aplaties, avec durée de validité"""
+
+    def __init__(self, cache_dir: Path, ttl_hours: float):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_hours * 3600
+
+    def _path(self, league: str, season: str, stat: str) -> Path:
+        safe_league = "".join(c if c.isalnum() else "_" for c in league)
+        return self.cache_dir / safe_league / str(season) / f"{stat}.pkl"
+
+    def _fresh(self, path: Path) -> bool:
+        if not path.exists():
+            return False
+        return self.ttl_seconds <= 0 or time.time() - path.stat().st_mtime < self.ttl_seconds
+
+    def get(self, league: str, season: str, stat: str) -> pd.DataFrame | None:
+        path = self._path(league, season, stat)
+        return pd.read_pickle(path) if self._fresh(path) else None
+
+    def put(self, league: str, season: str, stat: str, df: pd.DataFrame):
+        path = self._path(league, season, stat)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        df.to_pickle(tmp_path)
+        tmp_path.replace(path)
+
+
+class FBrefFetcher:
+    """
+    Couche de récupération FBref
+
+    - une tâche par (ligue, saison, type de stat), exécutées en parallèle
+    - limite polie par hôte partagée entre les tâches
+    - cache des pages brutes (dossier de données soccerdata) et des tables aplaties, avec TTL
+
+    `reader_factory(league, season)` doit renvoyer un objet exposant
+    `read_player_season_stats(stat_type=...)` ; par défaut un lecteur soccerdata.
+    Il peut être remplacé pour travailler hors ligne sur des pages enregistrées.
+    """
+
+    def __init__(self, cache_dir: Path, ttl_hours: float = 24.0, max_workers: int = 6,
+                 per_host_limit: int = 2, min_interval: float = 3.0, reader_factory=None):
+        """
+        Args:
+            cache_dir: Racine du cache (pages brutes dans html/, tables dans tables/)
+            ttl_hours: Durée de validité du cache (0 = jamais expiré)
+            max_workers: Nombre de tâches simultanées
+            per_host_limit: Requêtes simultanées maximales vers FBref
+            min_interval: Intervalle minimal entre deux requêtes vers FBref (s)
+            reader_factory: Fabrique de lecteurs (league, season) -> lecteur
+        """
+        self.cache_dir = Path(cache_dir)
+        self.html_dir = self.cache_dir / "html"
+        self.ttl_hours = ttl_hours
+        self.max_workers = max_workers
+        self.tables = TableCache(self.cache_dir / "tables", ttl_hours)
+        self.limiter = HostLimiter(per_host_limit, min_interval)
+        self.reader_factory = reader_factory or self._soccerdata_reader
+        self.stats = {"cache_hits": 0, "fetched": 0}
+        self._stats_lock = threading.Lock()
+
+    def _soccerdata_reader(self, league: str, season: str):
+        import soccerdata as sd
+        return sd.FBref(leagues=league, seasons=season, data_dir=self.html_dir)
+
+    def expire_raw_cache(self):
+        """Supprime les pages brutes plus anciennes que le TTL (elles seront re-téléchargées)"""
+        if self.ttl_hours <= 0 or not self.html_dir.exists():
+            return
+        limit = time.time() - self.ttl_hours * 3600
+        for path in self.html_dir.rglob("*"):
+            if path.is_file() and path.stat().st_mtime < limit:
+                path.unlink()
+
+    def fetch_table(self, league: str, season: str, stat: str) -> pd.DataFrame:
+        """Table d'un type de stat pour une ligue et une saison (cache d'abord)"""
+        cached = self.tables.get(league, season, stat)
+        if cached is not None:
+            with self._stats_lock:
+                self.stats["cache_hits"] += 1
+            return cached
+
+        self.limiter.acquire(FBREF_HOST)
+        try:
+            raw = self.reader_factory(league, season).read_player_season_stats(stat_type=stat)
+        finally:
+            self.limiter.release(FBREF_HOST)
+
+        df = flatten_stat_table(raw, stat)
+        self.tables.put(league, season, stat, df)
+        with self._stats_lock:
+            self.stats["fetched"] += 1
+        return df
+
+    def fetch_partitions(self, pairs: list[tuple[str, str]], stat_types: list[str] = STAT_TYPES) -> dict:
+        """
+        Récupère tous les types de stats de plusieurs (ligue, saison) en parallèle
+
+        Returns:
+            {(ligue, saison): DataFrame}, une ligne par (league, season, team, player) :
+            joueurs de la table `standard` (premier type de stat) complétés par les autres types
+        """
+        self.expire_raw_cache()
+        tasks = [(league, season, stat) for league, season in pairs for stat in stat_types]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            tables = list(executor.map(lambda task: self.fetch_table(*task), tasks))
+
+        by_partition = {}
+        for (league, season, stat), table in zip(tasks, tables):
+            by_partition.setdefault((league, season), []).append(table)
+
+        partitions = {}
+        for pair, frames in by_partition.items():
+            # Concaténation alignée sur l'index, restreinte aux joueurs du premier type de stat
+            merged = pd.concat(frames, axis=1, join='outer').reindex(frames[0].index)
+            merged = merged.loc[:, ~merged.columns.duplicated()]
+            partitions[pair] = merged.reset_index()
+        return partitions
+
+    def fetch_all(self, leagues: list[str], seasons: list[str], stat_types: list[str] = STAT_TYPES) -> pd.DataFrame:
+        """Toutes les combinaisons (ligue, saison) réunies dans une seule table"""
+        partitions = self.fetch_partitions(list(itertools.product(leagues, seasons)), stat_types)
+        return pd.concat(partitions.values(), axis=0, ignore_index=True)
@@ -0,0 +1,160 @@
+"""
+Planification des filtres de la recherche
+Compile les contraintes déduites de la requête (poste, ligues, âge, saison) en conditions Qdrant
+sur les champs indexés, puis choisit d'après leur sélectivité (comptages mis en cache) celles
+appliquées en pré-filtre strict et celles laissées en simples boosts
+"""
+
+from qdrant_client.models import Filter, FieldCondition, MatchAny, MatchValue, Range
+
+from search_cache import TTLCache
+from vector_store import PayloadColumns, filter_mask
+
+# Contraintes reconnues et boost appliqué aux candidats qui les vérifient
+CONSTRAINT_BOOSTS = {
+    "position_std": 0.03,
+    "league": 0.02,
+    "age": 0.02,
+    "season": 0.02,
+}
+
+# Contraintes appliquées en filtre strict quand les comptages sont indisponibles
+FALLBACK_HARD = ("position_std",)
+
+
+def constraint_conditions(intent: dict) -> dict:
+    """Conditions Qdrant (champs indexés) des contraintes présentes dans l'intention : {nom: condition}"""
+    conditions = {}
+    if intent.get("position_std"):
+        conditions["position_std"] = FieldCondition(key="position_std", match=MatchAny(any=[intent["position_std"]]))
+    if intent.get("leagues"):
+        conditions["league"] = FieldCondition(key="league", match=MatchAny(any=list(intent["leagues"])))
+    if intent.get("age_min") is not None or intent.get("age_max") is not None:
+        conditions["age"] = FieldCondition(key="age", range=Range(gte=intent.get("age_min"), lte=intent.get("age_max")))
+    if intent.get("season") is not None:
+        conditions["season"] = FieldCondition(key="season", match=MatchValue(value=int(intent["season"])))
+    return conditions
+
+
+def make_filter(intent: dict, names=None) -> Filter | None:
+    """Filtre Qdrant des contraintes `names` (toutes par défaut), None sans contrainte"""
+    conditions = constraint_conditions(intent)
+    must = [condition for name, condition in conditions.items() if names is None or name in names]
+    return Filter(must=must) if must else None
+
+
+def constraint_masks(payloads: list[dict], intent: dict) -> dict:
+    """{contrainte: masque booléen des payloads qui la vérifient}, mêmes règles que le filtre Qdrant"""
+    columns = PayloadColumns(payloads, [str(i) for i in range(len(payloads))])
+    return {
+        name: filter_mask(Filter(must=[condition]), columns)
+        for name, condition in constraint_conditions(intent).items()
+    }
+
+
+def matches(payload: dict, intent: dict, names=None) -> bool:
+    """Vrai si le payload vérifie les contraintes `names` (toutes par défaut)"""
+    masks = constraint_masks([payload], intent)
+    return all(bool(mask[0]) for name, mask in masks.items() if names is None or name in names)
+
+
+class FilterPlanner:
+    """
+    Choix des contraintes appliquées en pré-filtre
+
+    Les contraintes sont essayées de la plus sélective à la moins sélective ; chacune rejoint
+    le filtre strict tant que le filtre cumulé garde au moins `min_matches` joueurs, sinon elle
+    reste un boost (filtre trop étroit, ou valeur absente du corpus). Les comptages (index de
+    payload) et les identifiants des petits sous-ensembles sont mis en cache par version du corpus.
+    """
+
+    def __init__(self, client, collection_name: str, min_matches: int = 20, id_list_max: int = 2000,
+                 cache_size: int = 1024, cache_ttl: float = 3600.0):
+        """
+        Args:
+            client: Client Qdrant (ou index vectoriel local)
+            min_matches: Joueurs à garder au minimum sous filtre strict
+            id_list_max: Au plus ce nombre de joueurs filtrés, leurs identifiants sont listés
+                (recherche lexicale restreinte au sous-ensemble au lieu d'un filtrage après coup)
+        """
+        self.client = client
+        self.collection_name = collection_name
+        self.min_matches = min_matches
+        self.id_list_max = id_list_max
+        self.counts = TTLCache("filter_counts", maxsize=cache_size, ttl=cache_ttl)
+        self.id_lists = TTLCache("filter_ids", maxsize=max(cache_size // 8, 1), ttl=cache_ttl)
+
+    @staticmethod
+    def _key(conditions: list) -> tuple:
+        return tuple(sorted(condition.model_dump_json(exclude_none=True) for condition in conditions))
+
+    def count(self, conditions: list, version) -> int:
+        """Nombre exact de joueurs vérifiant toutes les conditions (mis en cache)"""
+        return self.counts.get_or_compute(
+            (self._key(conditions), version),
+            lambda: self.client.count(
+                collection_name=self.collection_name,
+                count_filter=Filter(must=conditions) if conditions else None,
+                exact=True
+            ).count
+        )
+
+    def matching_ids(self, conditions: list, version) -> list[str]:
+        """Identifiants des joueurs vérifiant toutes les conditions (mis en cache)"""
+        def scroll_all():
+            ids, offset = [], None
+            while True:
+                records, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=Filter(must=conditions),
+                    limit=1000,
+                    offset=offset,
+                    with_payload=False,
+                    with_vectors=False
+                )
+                ids.extend(str(record.id) for record in records)
+                if offset is None:
+                    return ids
+
+        return self.id_lists.get_or_compute((self._key(conditions), version), scroll_all)
+
+    def plan(self, intent: dict, version, min_matches: int | None = None) -> dict:
+        """
+        Returns:
+            {"filter": filtre strict ou None, "hard": [contraintes filtrées], "soft": [contraintes
+            en boost], "counts": {contrainte: joueurs}, "matches": joueurs sous filtre strict,
+            "total": taille du corpus, "allowed_ids": identifiants filtrés si peu nombreux, sinon None}
+        """
+        conditions = constraint_conditions(intent)
+        plan = {"filter": None, "hard": [], "soft": [], "counts": {}, "matches": None,
+                "total": None, "allowed_ids": None}
+        if not conditions:
+            return plan
+        min_matches = max(min_matches or 0, self.min_matches)
+
+        try:
+            total = self.count([], version)
+            counts = {name: self.count([condition], version) for name, condition in conditions.items()}
+            hard, matched = [], total
+            for name in sorted(conditions, key=lambda n: counts[n]):
+                n = self.count([conditions[h] for h in hard] + [conditions[name]], version)
+                if n >= min_matches:
+                    hard.append(name)
+                    matched = n
+            plan.update(counts=counts, total=total, matches=matched)
+        except Exception as e:
+            print(f"⚠️ Comptages des filtres indisponibles: {e}")
+            hard = [name for name in FALLBACK_HARD if name in conditions]
+
+        plan["hard"] = [name for name in conditions if name in hard]
+        plan["soft"] = [name for name in conditions if name not in hard]
+        plan["filter"] = make_filter(intent, plan["hard"])
+        if plan["hard"] and plan["matches"] is not None and plan["matches"] <= self.id_list_max:
+            try:
+                plan["allowed_ids"] = self.matching_ids([conditions[h] for h in plan["hard"]], version)
+            except Exception as e:
+                print(f"⚠️ Identifiants filtrés indisponibles: {e}")
+        return plan
+
+    def stats(self) -> dict:
+        return {cache.name: cache.stats() for cache in (self.counts, self.id_lists)}
@@ -0,0 +1,130 @@
+"""
+Générations d'un index publiées sur disque
+Cycle de vie commun de l'index BM25, de l'index vectoriel local et de la table des voisins :
+chaque mise à jour écrit un dossier `gen-<n>/` puis bascule `manifest.json` de manière atomique ;
+un lecteur charge une génération en un instantané immuable, remplacé d'un seul bloc
+"""
+
+import json
+import time
+import shutil
+import threading
+from pathlib import Path
+
+
+class GenerationStore:
+    """
+    Génération courante d'un index et publication des suivantes
+
+    L'instantané chargé (objet renvoyé par `reader`) est remplacé par une seule affectation,
+    sous verrou : un lecteur qui prend `snapshot` une fois par requête ne voit jamais un
+    mélange de deux générations, même si un autre thread recharge l'index pendant sa lecture.
+    """
+
+    def __init__(self, root: Path, format_version: int, reader):
+        """
+        Args:
+            root: Dossier de l'index (manifest.json et dossiers gen-<n>/)
+            format_version: Version du format ; un manifeste d'une autre version est ignoré
+            reader: Fonction (dossier de la génération, manifeste) -> instantané immuable
+        """
+        self.root = Path(root)
+        self.manifest_path = self.root / "manifest.json"
+        self.format_version = format_version
+        self._reader = reader
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._manifest = None
+        self._manifest_mtime = None
+
+    @property
+    def snapshot(self):
+        """Instantané de la génération chargée (None avant le premier chargement)"""
+        return self._snapshot
+
+    @property
+    def manifest(self) -> dict | None:
+        return self._manifest
+
+    def _mtime(self) -> int | None:
+        try:
+            return self.manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load_locked(self) -> bool:
+        while True:
+            mtime = self._mtime()
+            if mtime is None:
+                return False
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") != self.format_version:
+                return False
+            try:
+                snapshot = self._reader(self.root / manifest["generation"], manifest)
+                break
+            except FileNotFoundError:
+                # Génération supprimée par une publication plus récente : relire le manifeste
+                if self._mtime() == mtime:
+                    raise
+        # Une seule référence lue par les requêtes : la bascule est atomique pour elles
+        self._snapshot = snapshot
+        self._manifest = manifest
+        self._manifest_mtime = mtime
+        return True
+
+    def load(self) -> bool:
+        """Charge la génération courante. Faux si l'index n'existe pas (ou format différent)."""
+        with self._lock:
+            return self._load_locked()
+
+    def reload_if_changed(self) -> bool:
+        """Recharge si une nouvelle génération a été publiée. Vrai si rechargé."""
+        mtime = self._mtime()
+        if mtime is None or mtime == self._manifest_mtime:
+            return False
+        with self._lock:
+            # Un autre thread a pu recharger pendant l'attente du verrou
+            if self._mtime() == self._manifest_mtime:
+                return False
+            return self._load_locked()
+
+    def publish(self, write, **fields) -> dict:
+        """
+        Écrit une nouvelle génération, bascule le manifeste puis la charge
+
+        Args:
+            write: Fonction (dossier de la génération) écrivant ses fichiers
+            fields: Champs ajoutés au manifeste (tailles, paramètres)
+
+        Returns:
+            Manifeste publié
+        """
+        previous = (self._manifest or {}).get("generation")
+        counter = (self._manifest or {}).get("counter", 0) + 1
+        generation = f"gen-{counter}"
+        gen_dir = self.root / generation
+        if gen_dir.exists():
+            shutil.rmtree(gen_dir)
+        gen_dir.mkdir(parents=True)
+        write(gen_dir)
+
+        manifest = {
+            "version": self.format_version,
+            "generation": generation,
+            "counter": counter,
+            **fields,
+            "built_at": time.time(),
+        }
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        tmp_path.replace(self.manifest_path)
+
+        # Garder la génération précédente : un processus peut encore la lire
+        for old_dir in self.root.glob("gen-*"):
+            if old_dir.name not in (generation, previous):
+                shutil.rmtree(old_dir, ignore_errors=True)
+        self.load()
+        return manifest
@@ -1,14 +1,15 @@
 import sys
 import os
-import gradio as gr
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, MatchAny, FieldCondition
+from qdrant_client.models import Filter, Prefetch
 import re
 import unicodedata
 import numpy as np
-from rank_bm25 import BM25Okapi
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Ajouter le répertoire parent au path pour importer config
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -16,39 +17,130 @@ if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
 import config
+from bm25_index import BM25Index, BM25Snapshot, document_text
+from qdrant_sync import (
+    CollectionSync, quantized_search_params, dense_vector_name, truncate_vectors, point_vector, MINI_VECTOR
+)
+from search_cache import TTLCache, normalize_query
+from batch_encoder import MicroBatchEncoder
+from neighbors import NeighborTable, player_identity
+from search_telemetry import SearchTelemetry
+from embedding_model import BackgroundModel, WARMUP_TEXTS, embedding_model_id
+from filter_planner import FilterPlanner, CONSTRAINT_BOOSTS, constraint_masks, make_filter, matches
+from vector_store import (
+    LocalVectorIndex, VECTOR_BACKENDS, create_qdrant_client, create_async_qdrant_client, export_collection
+)
 
 class PlayerSearchApp:
     def __init__(self):
-        """Initialise l'application de recherche de joueurs"""
+        """
+        Initialise l'application de recherche de joueurs
+
+        Le modèle d'encodage se charge en arrière-plan (EMBEDDING_BACKGROUND_LOAD) pendant la
+        connexion à Qdrant, le chargement des index et le démarrage de l'interface ; `readiness()`
+        indique quand il est chauffé.
+        """
         # Initialiser les clients et modèles
-        self.qdrant_client = QdrantClient(url='localhost')
-        self.embedding_model = SentenceTransformer("BAAI/bge-m3")
         self.collection_name = 'ragscout_players'
+        self.embedding_model = BackgroundModel(
+            warmup_texts=WARMUP_TEXTS if config.Config.EMBEDDING_WARMUP else (),
+            background=config.Config.EMBEDDING_BACKGROUND_LOAD
+        )
+        # Client non bloquant du chemin asynchrone (interface Gradio), None sans serveur Qdrant
+        self.qdrant_client, self.async_qdrant_client = self._create_vector_clients()
         
         # Valider la configuration
         config.Config.validate()
         
+        # Index BM25 pré-calculé sur tout le corpus
+        self.bm25_index = self._load_bm25_index()
+        
+        # Voisins pré-calculés de chaque joueur ("joueurs similaires")
+        self.neighbor_table = NeighborTable(Path(config.Config.NEIGHBORS_DIR) / self.collection_name)
+        self.neighbor_table.load()
+        
+        # Exécuteur borné des étapes CPU (encodage, BM25) et des recherches synchrones
+        self._cpu_executor = ThreadPoolExecutor(
+            max_workers=config.Config.SEARCH_CPU_WORKERS, thread_name_prefix="search-cpu"
+        )
+        # Étapes dense et lexicale de la recherche synchrone : exécuteur distinct, sinon une
+        # recherche lancée depuis `_cpu_executor` attendrait des workers de son propre exécuteur
+        # (interblocage dès qu'ils sont tous occupés). Ces étapes ne soumettent rien elles-mêmes.
+        self._stage_executor = ThreadPoolExecutor(
+            max_workers=2 * config.Config.SEARCH_CPU_WORKERS, thread_name_prefix="search-stage"
+        )
+        
+        # Encodage des requêtes par micro-lots (une passe du modèle pour les requêtes simultanées)
+        self.query_encoder = MicroBatchEncoder(
+            self.embedding_model,
+            max_batch_size=config.Config.QUERY_BATCH_MAX_SIZE,
+            max_wait_ms=config.Config.QUERY_BATCH_MAX_WAIT_MS
+        )
+        
+        # Caches des vecteurs de requête et des résultats complets
+        self.query_vector_cache = TTLCache(
+            "query_vectors", maxsize=config.Config.QUERY_CACHE_SIZE, ttl=config.Config.QUERY_CACHE_TTL
+        )
+        self.result_cache = TTLCache(
+            "results", maxsize=config.Config.RESULT_CACHE_SIZE, ttl=config.Config.RESULT_CACHE_TTL
+        )
+        self._collection_sync = CollectionSync(self.qdrant_client, self.collection_name)
+        
+        # Métriques de chaque requête (GET /metrics) et journal JSON optionnel dans LOGS_DIR
+        self.telemetry = SearchTelemetry(
+            log_path=Path(config.Config.SEARCH_LOG_PATH) if config.Config.SEARCH_LOG_ENABLED else None,
+            slow_ms=config.Config.SEARCH_LOG_SLOW_MS,
+            max_bytes=config.Config.SEARCH_LOG_MAX_BYTES,
+            backups=config.Config.SEARCH_LOG_BACKUPS
+        )
+        
+        # Collection quantifiée : sur-échantillonnage puis rescoring sur les vecteurs originaux
+        self._search_params = quantized_search_params(
+            config.Config.QDRANT_QUANTIZATION,
+            rescore=config.Config.QDRANT_RESCORE,
+            oversampling=config.Config.QDRANT_OVERSAMPLING
+        )
+        # Vecteur complet nommé "full" quand la collection stocke aussi le vecteur réduit
+        self._vector_name = dense_vector_name(config.Config.QDRANT_MINI_DIM)
+        self._version = None
+        self._version_checked_at = 0.0
+        
         self._WORD_RE = re.compile(r"\w+", re.UNICODE)
 
         # Patterns simples pour déduire l'intention (position/ligue/âge)
         self.POS_PATTERNS = [
             (r"\b(gardien|goalkeeper|keeper|gb)\b", "GK"),
-            (r"\b(défenseur central|defenseur central|central defender|centre[- ]back|dc)\b", "DF"),
+            (r"\b(d[eé]fenseur|central defender|centre[- ]back|defender|dc)\b", "DF"),
             (r"\b(lat[eé]ral|lateral|full[- ]?back|back)\b", "DF"),
             (r"\b(milieu d[eé]fensif|6\b|defensive midfielder|dm)\b", "DM"),
             (r"\b(milieu (central|relayeur)|8\b|central midfielder|cm)\b", "CM"),
             (r"\b(meneur|num[eé]ro 10|numero 10|playmaker|am)\b", "AM"),
             (r"\b(ailier|wing(er)?|wide)\b", "AM"),
-            (r"\b(avant[- ]centre|but(e)ur|buteur|striker|9\b|st)\b", "ST"),
+            (r"\b(avant[- ]centre|attaquant|but(e)ur|buteur|striker|forward|9\b|st)\b", "ST"),
         ]
+        # Libellés de ligue possibles dans les payloads (nom seul ou identifiant FBref)
         self.LEAGUE_MAP = {
-            "premier league": "Premier League",
-            "ligue 1": "Ligue 1",
-            "la liga": "La Liga",
-            "bundesliga": "Bundesliga",
-            "serie a": "Serie A",
+            r"premier league|\bepl\b": ("Premier League", "ENG-Premier League"),
+            r"ligue 1\b": ("Ligue 1", "FRA-Ligue 1"),
+            r"la liga|\bliga\b": ("La Liga", "ESP-La Liga"),
+            r"bundesliga": ("Bundesliga", "GER-Bundesliga"),
+            r"serie a\b": ("Serie A", "ITA-Serie A"),
         }
         
+        # Choix pré-filtre strict / boost selon le nombre de joueurs vérifiant chaque contrainte
+        self.filter_planner = FilterPlanner(
+            self.qdrant_client,
+            self.collection_name,
+            min_matches=config.Config.FILTER_MIN_MATCHES,
+            id_list_max=config.Config.FILTER_ID_LIST_MAX,
+            cache_ttl=config.Config.FILTER_COUNT_CACHE_TTL
+        )
+        
+        # Première recherche complète dès que le modèle est prêt, avant de se déclarer prêt
+        self._warm = threading.Event()
+        self._warmup_seconds = None
+        threading.Thread(target=self._warm_up, name="search-warmup", daemon=True).start()
+        
     def extract_profil_type(self, summary: str) -> str | None:
         """Extrait le profil-type d'un résumé de joueur"""
         if not summary:
@@ -75,11 +167,6 @@ class PlayerSearchApp:
         s = s.replace("duels aeriens", "aerien").replace("jeu entre les lignes", "entre-lignes")
         return set(s.split())
     
-    def _bm25_scores(self, query: str, docs: list[str]) -> np.ndarray:
-        corpus_tokens = [self._tok(d) for d in docs]
-        bm25 = BM25Okapi(corpus_tokens)
-        return np.array(bm25.get_scores(self._tok(query)))
-    
     def soft_label(self, ref_profil: str | None, cand_profil: str | None) -> int:
         """
         Calcule un score de similarité entre deux profils
@@ -94,7 +181,7 @@ class PlayerSearchApp:
         return 1 if len(self.canonical_tokens(ref_profil) & self.canonical_tokens(cand_profil)) >= 2 else 0
 
     def _infer_intent_from_query(self, query: str) -> dict:
-        """Déduit des contraintes légères à partir de la requête (position, ligue, âge max)."""
+        """Déduit les contraintes de la requête (position, ligues, tranche d'âge, saison)."""
         q = (query or "").lower()
 
         # position
@@ -104,42 +191,48 @@ class PlayerSearchApp:
                 pos = code
                 break
 
-        # âge max (U23, U21, "moins de 25", "<= 25")
-        age_max = None
-        m = re.search(r"u(\d{2})", q)
+        # tranche d'âge ("entre 20 et 24 ans", "20-24 ans", U21, "moins de 25", "plus de 30")
+        age_min = age_max = None
+        m = re.search(r"(?:entre|between)\s*(\d{2})\s*(?:et|and|-)\s*(\d{2})\b", q) \
+            or re.search(r"\b(\d{2})\s*(?:-|à|a)\s*(\d{2})\s*ans\b", q)
         if m:
-            age_max = int(m.group(1))
+            age_min, age_max = sorted((int(m.group(1)), int(m.group(2))))
         else:
-            m = re.search(r"(?:moins de|under|<=)\s*(\d{2})", q)
+            m = re.search(r"\bu(\d{2})\b", q) or re.search(r"(?:moins de|under|<=)\s*(\d{2})", q)
             if m:
                 age_max = int(m.group(1))
+            elif m := re.search(r"<\s*(\d{2})", q):
+                age_max = int(m.group(1)) - 1
+            m = re.search(r"(?:plus de|over|au moins|>=)\s*(\d{2})", q)
+            if m:
+                age_min = int(m.group(1))
+            elif m := re.search(r">\s*(\d{2})", q):
+                age_min = int(m.group(1)) + 1
 
-        # ligue
-        league = None
-        for k, v in self.LEAGUE_MAP.items():
-            if k in q:
-                league = v
-                break
+        # ligues (toutes celles citées)
+        leagues = []
+        for pattern, names in self.LEAGUE_MAP.items():
+            if re.search(pattern, q):
+                leagues.extend(names)
+
+        # saison ("2024-25", "2024/2025", "saison 24/25") -> 2425 comme dans les payloads
+        season = None
+        m = re.search(r"\b20(\d{2})\s*[-/]\s*(?:20)?(\d{2})\b", q) \
+            or re.search(r"(?:saison|season)\s*(\d{2})\s*[-/]?\s*(\d{2})\b", q)
+        if m and (int(m.group(1)) + 1) % 100 == int(m.group(2)):
+            season = int(m.group(1) + m.group(2))
 
         return {
             "position_std": pos,
+            "age_min": age_min,
             "age_max": age_max,
-            "league": league,
+            "leagues": leagues,
+            "season": season,
         }
 
-    def _make_qdrant_filter(self, intent: dict) -> Filter | None:
-        """Construit un filtre Qdrant léger (actuellement sur position_std si détectée)."""
-        must = []
-        if intent.get("position_std"):
-            must.append(
-                FieldCondition(
-                    key="position_std",
-                    match=MatchAny(any=[intent["position_std"]])
-                )
-            )
-        if not must:
-            return None
-        return Filter(must=must)
+    def _make_qdrant_filter(self, intent: dict, names=None) -> Filter | None:
+        """Filtre Qdrant des contraintes `names` de l'intention (toutes par défaut)."""
+        return make_filter(intent, names)
 
     def _tok(self, s: str):
         return self._WORD_RE.findall((s or "").lower())
@@ -153,10 +246,52 @@ class PlayerSearchApp:
             return np.zeros_like(arr)  # tous égaux => neutre
         return (arr - mn) / (mx - mn + 1e-9)
 
-    def _bm25_scores(self, query: str, docs: list[str]) -> np.ndarray:
-        corpus_tokens = [self._tok(d) for d in docs]
-        bm25 = BM25Okapi(corpus_tokens)
-        return np.array(bm25.get_scores(self._tok(query)))
+    def _create_vector_clients(self) -> tuple:
+        """
+        Clients de la recherche dense selon `config.Config.VECTOR_BACKEND`
+
+        - "qdrant" : clients synchrone et asynchrone (serveur, ou embarqué avec QDRANT_PATH)
+        - "numpy" / "faiss" : index local exporté par le pipeline, utilisé à la place du client ;
+          exporté depuis Qdrant au premier lancement s'il n'existe pas encore
+        """
+        backend = config.Config.VECTOR_BACKEND
+        if backend not in VECTOR_BACKENDS:
+            raise ValueError(f"VECTOR_BACKEND inconnu: {backend}")
+        if backend == "qdrant":
+            return create_qdrant_client(), create_async_qdrant_client()
+
+        index = LocalVectorIndex(Path(config.Config.VECTOR_INDEX_DIR) / self.collection_name, backend=backend)
+        if not index.load():
+            print("📤 Index vectoriel local absent, export depuis Qdrant...")
+            export_collection(
+                create_qdrant_client(),
+                self.collection_name,
+                index,
+                vector_name=dense_vector_name(config.Config.QDRANT_MINI_DIM)
+            )
+        print(f"🧮 Index vectoriel local ({backend}): {len(index)} joueurs")
+        return index, None
+
+    async def _avector_call(self, method: str, **kwargs):
+        """Appel au stockage vectoriel sans bloquer la boucle (exécuteur borné sans client asynchrone)"""
+        if self.async_qdrant_client is not None:
+            return await getattr(self.async_qdrant_client, method)(**kwargs)
+        call = functools.partial(getattr(self.qdrant_client, method), **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._cpu_executor, call)
+
+    def _load_bm25_index(self) -> BM25Index:
+        """Index BM25 du corpus (memory-map) ; construit depuis la collection s'il n'existe pas encore"""
+        index = BM25Index(Path(config.Config.BM25_INDEX_DIR) / self.collection_name)
+        if index.load():
+            return index
+        try:
+            print("🔎 Index BM25 absent, construction depuis la collection...")
+            sync = CollectionSync(self.qdrant_client, self.collection_name)
+            payloads = sync.fetch_payloads(self.collection_name, ["summary"])
+            index.sync({pid: document_text(str(p.get("summary", ""))) for pid, p in payloads.items()})
+        except Exception as e:
+            print(f"⚠️ Index BM25 indisponible: {e}")
+        return index
 
     def extract_profil_type(self, summary: str) -> str | None:
         if not summary:
@@ -165,120 +300,668 @@ class PlayerSearchApp:
         m = re.search(r"Profil-type\s*:\s*(.+)", summary, flags=re.IGNORECASE)
         return m.group(1).strip() if m else None
     
+    def _encode_query(self, query: str, trace: dict | None = None) -> np.ndarray:
+        """
+        Vecteur de la requête, mis en cache par texte normalisé (encodages simultanés coalescés)
+
+        Args:
+            trace: Reçoit "query_cache" ("hit" ou "miss")
+        """
+        computed = []
+
+        def encode():
+            computed.append(True)
+            return self.query_encoder.encode(query)
+
+        vector = self.query_vector_cache.get_or_compute(normalize_query(query), encode)
+        if trace is not None:
+            trace["query_cache"] = "miss" if computed else "hit"
+        return vector
+
+    def _collection_version(self) -> tuple:
+        """
+        Version du corpus interrogé : collection désignée par l'alias (ou génération de l'index
+        vectoriel local), générations de l'index BM25 et de la table des voisins
+        (vérifiée au plus toutes les COLLECTION_VERSION_INTERVAL secondes)
+        """
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at > config.Config.COLLECTION_VERSION_INTERVAL:
+            if isinstance(self.qdrant_client, LocalVectorIndex):
+                self.qdrant_client.reload_if_changed()
+                collection = f"{self.collection_name}@{self.qdrant_client.generation}"
+            else:
+                try:
+                    collection = self._collection_sync.resolve_alias() or self.collection_name
+                except Exception:
+                    collection = self.collection_name
+            self.bm25_index.reload_if_changed()
+            self.neighbor_table.reload_if_changed()
+            generation = (self.bm25_index.manifest or {}).get("generation")
+            self._version = (collection, generation, self.neighbor_table.generation)
+            self._version_checked_at = now
+        return self._version
+
+    def _warm_up(self):
+        """
+        Recherche hors cache une fois le modèle chargé : connexion Qdrant, pages de l'index BM25
+        et comptages des filtres sont en place avant la première vraie requête
+        """
+        try:
+            self.embedding_model.wait()
+            if config.Config.EMBEDDING_WARMUP:
+                start = time.perf_counter()
+                self._search_uncached(WARMUP_TEXTS[-1], 5)
+                self._warmup_seconds = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            print(f"⚠️ Chauffe de la recherche incomplète: {e}")
+        finally:
+            self._warm.set()
+
+    def readiness(self) -> dict:
+        """Prête quand le modèle est chargé et la recherche chauffée (sonde de disponibilité)"""
+        return {
+            "ready": self._warm.is_set() and self.embedding_model.ready,
+            "model": self.embedding_model.status(),
+            "encoder": embedding_model_id(),
+            "search_warmup_seconds": self._warmup_seconds,
+        }
+
+    def cache_stats(self) -> dict:
+        """Taux de succès et latences de chaque cache, et remplissage des micro-lots d'encodage"""
+        stats = {
+            cache.name: cache.stats()
+            for cache in (self.query_vector_cache, self.result_cache)
+        }
+        stats["query_encoder"] = self.query_encoder.stats()
+        stats.update(self.filter_planner.stats())
+        return stats
+
+    def _dense_query(self, query_vector: np.ndarray, qdrant_filter: Filter | None, limit: int) -> dict:
+        """
+        Arguments de `query_points` pour la recherche dense
+
+        En deux temps (SEARCH_TWO_STAGE, collection avec QDRANT_MINI_DIM > 0) : pré-sélection
+        large sur le vecteur réduit, puis reclassement de ce seul vivier sur le vecteur complet.
+        """
+        request = {
+            "collection_name": self.collection_name,
+            "query": query_vector.tolist(),
+            "using": self._vector_name,
+            "limit": limit,
+            "query_filter": qdrant_filter,
+            "search_params": self._search_params,
+            "with_payload": True,
+        }
+        if config.Config.SEARCH_TWO_STAGE and config.Config.QDRANT_MINI_DIM > 0:
+            request["prefetch"] = Prefetch(
+                query=truncate_vectors(query_vector, config.Config.QDRANT_MINI_DIM).tolist(),
+                using=MINI_VECTOR,
+                limit=int(limit * config.Config.SEARCH_TWO_STAGE_OVERSAMPLING),
+                filter=qdrant_filter,
+                params=self._search_params
+            )
+        return request
+
+    def _dense_search(self, query: str, qdrant_filter: Filter | None, limit: int,
+                      trace: dict) -> tuple[np.ndarray, list]:
+        """Recherche dense : (vecteur de la requête, points Qdrant classés) ; durées "encode" et "qdrant" """
+        t0 = time.perf_counter()
+        query_vector = self._encode_query(query, trace)
+        trace["timings"]["encode"] = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        results = self.qdrant_client.query_points(**self._dense_query(query_vector, qdrant_filter, limit))
+        trace["timings"]["qdrant"] = (time.perf_counter() - t0) * 1000
+        return query_vector, results.points
+
+    def _sparse_search(self, query: str, limit: int,
+                       allowed_ids: list | None = None) -> tuple[BM25Snapshot, np.ndarray, list]:
+        """
+        Recherche lexicale sur l'index BM25 : (génération lue, scores de tout le corpus, [(id, score)] classés)
+
+        Les scores sont indexés par les positions de cette génération : la fusion doit les relire
+        sur le même instantané, même si l'index est rechargé entre-temps.
+
+        Args:
+            allowed_ids: Sous-ensemble pré-filtré (classement limité à ces joueurs)
+        """
+        self.bm25_index.reload_if_changed()
+        bm25 = self.bm25_index.snapshot()
+        scores = bm25.scores(query)
+        if allowed_ids is None:
+            return bm25, scores, bm25.search(query, limit, scores=scores)
+        subset = bm25.scores_for(query, allowed_ids, scores=scores)
+        top = np.argsort(-subset, kind="stable")[:limit]
+        return bm25, scores, [(allowed_ids[i], float(subset[i])) for i in top if subset[i] > 0]
+
+    def _matches_intent(self, payload: dict, intent: dict, names=None) -> bool:
+        """Équivalent local du filtre Qdrant des contraintes `names` (toutes par défaut)"""
+        return matches(payload, intent, names)
+
+    def _fuse(self, dense_scores: np.ndarray, bm25_scores: np.ndarray,
+              dense_ranks: np.ndarray, sparse_ranks: np.ndarray) -> np.ndarray:
+        """
+        Fusionne les deux listes selon `config.Config.SEARCH_FUSION`
+
+        - "normalized" : somme pondérée des scores normalisés [0, 1]
+        - "rrf" : reciprocal rank fusion pondérée (rang absent = aucune contribution),
+          ramenée à [0, 1]
+        """
+        w_dense = config.Config.SEARCH_DENSE_WEIGHT
+        w_sparse = config.Config.SEARCH_SPARSE_WEIGHT
+        if config.Config.SEARCH_FUSION == "rrf":
+            k = config.Config.SEARCH_RRF_K
+            fused = np.zeros(len(dense_ranks), dtype=float)
+            has_dense, has_sparse = dense_ranks >= 0, sparse_ranks >= 0
+            fused[has_dense] += w_dense / (k + dense_ranks[has_dense] + 1)
+            fused[has_sparse] += w_sparse / (k + sparse_ranks[has_sparse] + 1)
+            return fused * (k + 1) / max(w_dense + w_sparse, 1e-9)
+        return w_dense * self._normalize_0_1(dense_scores) + w_sparse * self._normalize_0_1(bm25_scores)
+
     def search_players(self, query: str, top_k: int = 5) -> list:
         """
         Recherche des joueurs basée sur une requête textuelle
-        
+
         Args:
             query: Description du joueur recherché
             top_k: Nombre de résultats à retourner
-            
+
         Returns:
             Liste des joueurs trouvés avec leurs informations
         """
+        ranked, _ = self.search_players_with_trace(query, top_k)
+        return ranked
+
+    def search_players_with_trace(self, query: str, top_k: int = 5) -> tuple[list, dict]:
+        """
+        Recherche hybride : recherches dense et lexicale en parallèle, puis fusion
+
+        Les résultats sont mis en cache par (requête normalisée, top_k, version de la
+        collection) ; des recherches identiques simultanées n'en exécutent qu'une.
+
+        Returns:
+            (joueurs classés, trace) ; la trace contient la durée de chaque étape (ms)
+            et les identifiants retenus par chaque recherche (avec le nom des joueurs),
+            pour mesurer leur rappel
+        """
         if not query.strip():
-            return []
-        
+            return [], self._empty_trace()
+
+        start = time.perf_counter()
+        request = {"query": query, "top_k": int(top_k)}
+        computed = []
+
+        def search():
+            computed.append(True)
+            return self._search_uncached(query, top_k)
+
         try:
-            # Encoder la requête
-            query_vector = self.embedding_model.encode(query).tolist()
-            
-            # Intention et filtre (optionnel)
-            intent = self._infer_intent_from_query(query)
-            qdrant_filter = self._make_qdrant_filter(intent)
+            key = (normalize_query(query), int(top_k), self._collection_version())
+            ranked, trace = self.result_cache.get_or_compute(key, search)
+        except Exception as e:
+            return [], self._failed("search", request, start, e)
+        return self._served("search", request, start, ranked, trace, computed)
+
+    async def asearch_players(self, query: str, top_k: int = 5) -> list:
+        """Variante asynchrone de `search_players`"""
+        ranked, _ = await self.asearch_players_with_trace(query, top_k)
+        return ranked
+
+    async def asearch_players_with_trace(self, query: str, top_k: int = 5) -> tuple[list, dict]:
+        """
+        Variante asynchrone de `search_players_with_trace` : la boucle d'événements n'est
+        jamais bloquée (Qdrant en asynchrone, encodage et BM25 dans l'exécuteur borné)
+
+        Le cache de résultats et la coalescence sont partagés avec le chemin synchrone.
+        """
+        if not query.strip():
+            return [], self._empty_trace()
+
+        start = time.perf_counter()
+        request = {"query": query, "top_k": int(top_k)}
+        computed = []
+
+        async def search():
+            computed.append(True)
+            return await self._asearch_uncached(query, top_k)
+
+        try:
+            # La vérification de version peut interroger Qdrant et relire le manifeste BM25
+            version = await asyncio.get_running_loop().run_in_executor(self._cpu_executor, self._collection_version)
+            key = (normalize_query(query), int(top_k), version)
+            ranked, trace = await self.result_cache.aget_or_compute(key, search)
+        except Exception as e:
+            return [], self._failed("search", request, start, e)
+        return self._served("search", request, start, ranked, trace, computed)
+
+    @staticmethod
+    def _empty_trace() -> dict:
+        return {"timings": {}, "dense": [], "sparse": [], "fused": [], "names": {}}
+
+    def _served(self, kind: str, request: dict, start: float, ranked: list, trace: dict,
+                computed: list) -> tuple[list, dict]:
+        """Copies du résultat (l'entrée en cache est partagée), durée de service et télémétrie"""
+        trace = {**trace, "timings": dict(trace["timings"])}
+        trace["timings"]["served"] = (time.perf_counter() - start) * 1000
+        self.telemetry.record(kind, request, trace, cache="miss" if computed else "hit")
+        return [dict(r) for r in ranked], trace
+
+    def _failed(self, kind: str, request: dict, start: float, error: Exception) -> dict:
+        """Trace d'une recherche en erreur ("error"), comptée et journalisée avec sa pile d'appels"""
+        trace = self._empty_trace()
+        trace["timings"]["served"] = (time.perf_counter() - start) * 1000
+        trace["error"] = f"{type(error).__name__}: {error}"
+        self.telemetry.record(kind, request, trace, cache="miss", error=error)
+        print(f"❌ Erreur lors de la recherche ({kind}): {trace['error']}")
+        return trace
+
+    def _plan_search(self, query: str, top_k: int) -> dict:
+        """
+        Intention, filtre Qdrant et tailles des listes dense/lexicale
+
+        Les contraintes assez peu sélectives pour laisser FILTER_MIN_MATCHES joueurs (et au moins
+        `top_k`) sont appliquées en pré-filtre des deux recherches ; les autres restent des boosts.
+        """
+        t0 = time.perf_counter()
+        intent = self._infer_intent_from_query(query)
+        t1 = time.perf_counter()
+        filters = self.filter_planner.plan(intent, self._collection_version(), min_matches=top_k)
+        timings = {"intent": (t1 - t0) * 1000, "filter_plan": (time.perf_counter() - t1) * 1000}
+        sparse_keep = max(top_k * 5, config.Config.SEARCH_SPARSE_TOP_N)
+        if filters["filter"] is None or filters["allowed_ids"] is not None:
+            sparse_top_n = sparse_keep
+        else:
+            # Sous-ensemble trop grand pour être listé : filtre appliqué après coup, sur-échantillonner
+            sparse_top_n = sparse_keep * 4
+        return {
+            "intent": intent,
+            "filter": filters["filter"],
+            "hard": filters["hard"],
+            "soft": filters["soft"],
+            "matches": filters["matches"],
+            "allowed_ids": filters["allowed_ids"],
+            "dense_top_n": max(top_k * 5, config.Config.SEARCH_DENSE_TOP_N),
+            "sparse_keep": sparse_keep,
+            "sparse_top_n": sparse_top_n,
+            "timings": timings,
+        }
+
+    def _dense_candidates(self, dense_points: list, trace: dict) -> dict:
+        """Candidats issus de la recherche dense"""
+        candidates = {}
+        for rank, point in enumerate(dense_points):
+            candidates[str(point.id)] = {
+                "payload": point.payload or {},
+                "dense_raw": float(point.score),
+                "dense_rank": rank,
+                "sparse_rank": -1,
+            }
+        trace["dense"] = list(candidates)
+        return candidates
+
+    def _add_sparse_candidates(self, candidates: dict, sparse_hits: list, hydrated: dict,
+                               query_vector: np.ndarray, plan: dict, trace: dict):
+        """Ajoute les candidats lexicaux (rang lexical, et score dense recalculé pour les nouveaux)"""
+        sparse_rank = 0
+        for pid, _ in sparse_hits:
+            if sparse_rank >= plan["sparse_keep"]:
+                break
+            if pid in candidates:
+                candidates[pid]["sparse_rank"] = sparse_rank
+            elif pid in hydrated and self._matches_intent(hydrated[pid].payload or {}, plan["intent"], plan["hard"]):
+                point = hydrated[pid]
+                vector = np.asarray(point_vector(point, self._vector_name), dtype=np.float32)
+                candidates[pid] = {
+                    "payload": point.payload or {},
+                    "dense_raw": float(np.dot(vector, query_vector) / (np.linalg.norm(vector) or 1.0)),
+                    "dense_rank": -1,
+                    "sparse_rank": sparse_rank,
+                }
+            else:
+                continue
+            trace["sparse"].append(pid)
+            sparse_rank += 1
+        trace["names"] = {pid: c["payload"].get("player") for pid, c in candidates.items()}
+
+    def _rank_candidates(self, query: str, top_k: int, candidates: dict, bm25: BM25Snapshot,
+                         all_bm25: np.ndarray, intent: dict, trace: dict) -> list:
+        """Fusion des scores, boosts d'intention et mise en forme des `top_k` meilleurs (durées "fusion" et "format")"""
+        t0 = time.perf_counter()
+        ids = list(candidates)
+        bm25_scores = bm25.scores_for(query, ids, scores=all_bm25).astype(float)
+        dense_scores = np.array([candidates[pid]["dense_raw"] for pid in ids], dtype=float)
+        dense_ranks = np.array([candidates[pid]["dense_rank"] for pid in ids])
+        sparse_ranks = np.array([candidates[pid]["sparse_rank"] for pid in ids])
+
+        dense_norm = self._normalize_0_1(dense_scores)
+        bm25_norm = self._normalize_0_1(bm25_scores)
+        fused = self._fuse(dense_scores, bm25_scores, dense_ranks, sparse_ranks)
+
+        # Boosts en fonction de l'intention (seuls ceux des contraintes non filtrées départagent)
+        boosts = np.zeros_like(fused)
+        for name, mask in constraint_masks([candidates[pid]["payload"] for pid in ids], intent).items():
+            boosts[mask] += CONSTRAINT_BOOSTS[name]
+
+        fused = fused + boosts
+
+        # Ordonnancement par score fusionné
+        order = np.argsort(-fused)
+        t1 = time.perf_counter()
+        trace["timings"]["fusion"] = (t1 - t0) * 1000
+        ranked = []
+        for idx in order[:top_k]:
+            pid = ids[idx]
+            payload = candidates[pid]["payload"]
+            full_summary = payload.get('summary', 'Aucune description disponible')
+            short_summary = full_summary[:300] + "..." if len(full_summary) > 300 else full_summary
+            ranked.append({
+                'id': pid,
+                'name': payload.get('player', 'Nom inconnu'),
+                'profil_type': self.extract_profil_type(full_summary) or 'Profil non spécifié',
+                'short_summary': short_summary,
+                'summary': full_summary,
+                'similarity_score': float(candidates[pid]["dense_raw"]),
+                'bm25_score': float(bm25_norm[idx]),
+                'fused_score': float(fused[idx]),
+                'dense_score': float(dense_norm[idx]),
+                'dense_rank': int(dense_ranks[idx]),
+                'sparse_rank': int(sparse_ranks[idx]),
+                'position_std': payload.get('position_std', ''),
+                'league': payload.get('league'),
+                'age': payload.get('age'),
+            })
+        trace["fused"] = [r['id'] for r in ranked]
+        trace["timings"]["format"] = (time.perf_counter() - t1) * 1000
+        return ranked
 
-            # Rechercher dans Qdrant (pool élargi pour reranking hybride)
-            dense_top_n = max(top_k * 5, 50)
-            results = self.qdrant_client.query_points(
+    def _finish_trace(self, trace: dict, start: float, n_candidates: int):
+        trace["timings"]["total"] = (time.perf_counter() - start) * 1000
+        trace["candidates"] = {"dense": len(trace["dense"]), "sparse": len(trace["sparse"]), "union": n_candidates}
+        if config.Config.DEBUG:
+            timings = " | ".join(f"{k}={v:.1f}ms" for k, v in trace["timings"].items())
+            print(f"⏱️ {timings} | dense={len(trace['dense'])} sparse={len(trace['sparse'])} "
+                  f"candidats={n_candidates}")
+
+    def _trace_plan(self, plan: dict, trace: dict):
+        """Durées de l'analyse de la requête, contraintes filtrées / en boost et nombre de joueurs sous filtre"""
+        trace["timings"].update(plan["timings"])
+        trace["filters"] = {"hard": plan["hard"], "soft": plan["soft"], "matches": plan["matches"]}
+
+    def _search_uncached(self, query: str, top_k: int) -> tuple[list, dict]:
+        """Exécute la recherche hybride (voir `search_players_with_trace`)"""
+        trace = self._empty_trace()
+        start = time.perf_counter()
+        plan = self._plan_search(query, top_k)
+        self._trace_plan(plan, trace)
+
+        def timed(stage, fn, *args):
+            t0 = time.perf_counter()
+            result = fn(*args)
+            trace["timings"][stage] = (time.perf_counter() - t0) * 1000
+            return result
+
+        # Recherches dense et lexicale en parallèle, chacune sur tout le corpus
+        dense_future = self._stage_executor.submit(
+            timed, "dense", self._dense_search, query, plan["filter"], plan["dense_top_n"], trace
+        )
+        sparse_future = self._stage_executor.submit(
+            timed, "sparse", self._sparse_search, query, plan["sparse_top_n"], plan["allowed_ids"]
+        )
+        query_vector, dense_points = dense_future.result()
+        bm25, all_bm25, sparse_hits = sparse_future.result()
+
+        # Candidats : union des deux listes
+        t0 = time.perf_counter()
+        candidates = self._dense_candidates(dense_points, trace)
+        sparse_only = [pid for pid, _ in sparse_hits if pid not in candidates]
+        hydrated = {}
+        if sparse_only:
+            # Payload et vecteur des candidats lexicaux absents de la liste dense
+            for point in self.qdrant_client.retrieve(
                 collection_name=self.collection_name,
-                query=query_vector,
-                limit=dense_top_n,
-                query_filter=qdrant_filter,
-                with_payload=True
+                ids=sparse_only,
+                with_payload=True,
+                with_vectors=[self._vector_name] if self._vector_name else True
+            ):
+                hydrated[str(point.id)] = point
+        self._add_sparse_candidates(candidates, sparse_hits, hydrated, query_vector, plan, trace)
+        trace["timings"]["hydrate"] = (time.perf_counter() - t0) * 1000
+
+        ranked = []
+        if candidates:
+            # Fusion (méthode et poids configurables)
+            ranked = self._rank_candidates(query, top_k, candidates, bm25, all_bm25, plan["intent"], trace)
+
+        self._finish_trace(trace, start, len(candidates))
+        return ranked, trace
+
+    async def _aencode_query(self, query: str, trace: dict | None = None) -> np.ndarray:
+        """Variante asynchrone de `_encode_query` (encodage déporté dans l'exécuteur borné)"""
+        loop = asyncio.get_running_loop()
+        computed = []
+
+        def encode():
+            computed.append(True)
+            return loop.run_in_executor(self._cpu_executor, self.query_encoder.encode, query)
+
+        vector = await self.query_vector_cache.aget_or_compute(normalize_query(query), encode)
+        if trace is not None:
+            trace["query_cache"] = "miss" if computed else "hit"
+        return vector
+
+    async def _asearch_uncached(self, query: str, top_k: int) -> tuple[list, dict]:
+        """
+        Recherche hybride asynchrone : appels Qdrant non bloquants (AsyncQdrantClient, ou
+        exécuteur borné pour Qdrant embarqué et l'index local), encodage et BM25 dans l'exécuteur
+        """
+        trace = self._empty_trace()
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        # Comptages des filtres (mis en cache) : appels bloquants, dans l'exécuteur
+        plan = await loop.run_in_executor(self._cpu_executor, self._plan_search, query, top_k)
+        self._trace_plan(plan, trace)
+
+        async def dense():
+            t0 = time.perf_counter()
+            query_vector = await self._aencode_query(query, trace)
+            t1 = time.perf_counter()
+            results = await self._avector_call(
+                "query_points", **self._dense_query(query_vector, plan["filter"], plan["dense_top_n"])
             )
-            
-            candidates = []
-            for point in results.points:
-                payload = point.payload or {}
-                name = payload.get('player', 'Nom inconnu')
-                summary = payload.get('summary', 'Aucune description disponible')
-                short_summary = summary[:300] + "..." if len(summary) > 300 else summary
-                profil_type = self.extract_profil_type(summary) or ""
-                candidates.append({
-                    "name": name,
-                    "profil_type": profil_type,
-                    "short_summary": short_summary,
-                    "summary": summary,
-                    "similarity_score_raw": float(point.score),
-                    "position_std": payload.get("position_std", "UNK"),
-                    "league": payload.get("league"),
-                    "age": payload.get("age"),
-                    "age_bucket": payload.get("age_bucket")
-                })
-
-            if not candidates:
-                return []
-
-            # BM25 sur (profil_type + résumé)
-            bm25_docs = [
-                f"{c['profil_type']} {c['summary']}".strip() for c in candidates
-            ]
-            bm25_scores = self._bm25_scores(query, bm25_docs)
-
-            # Normalisation des signaux
-            dense_scores = np.array([c['similarity_score_raw'] for c in candidates], dtype=float)
-            dense_norm = self._normalize_0_1(dense_scores)
-            bm25_norm = self._normalize_0_1(bm25_scores)
-
-            # Fusion (alpha réglable)
-            alpha = 0.75
-            fused = alpha * dense_norm + (1.0 - alpha) * bm25_norm
-
-            # Boosts en fonction de l'intention
-            boosts = np.zeros_like(fused)
-            for i, c in enumerate(candidates):
-                b = 0.0
-                if intent.get('position_std') and c.get('position_std') == intent['position_std']:
-                    b += 0.03
-                if intent.get('league') and c.get('league') == intent['league']:
-                    b += 0.02
-                if intent.get('age_max') and c.get('age') is not None:
-                    try:
-                        if int(c['age']) <= int(intent['age_max']):
-                            b += 0.02
-                    except Exception:
-                        pass
-                boosts[i] = b
-
-            fused = fused + boosts
-
-            # Ordonnancement par score fusionné
-            order = np.argsort(-fused)
-            ranked = []
-            for idx in order[:top_k]:
-                c = candidates[idx]
-                full_summary = c['summary']
-                short_summary = full_summary[:300] + "..." if len(full_summary) > 300 else full_summary
-                ranked.append({
-                    'name': c['name'],
-                    'profil_type': c['profil_type'] or 'Profil non spécifié',
-                    'short_summary': short_summary,
-                    'summary': full_summary,
-                    'similarity_score': float(c['similarity_score_raw']),
-                    'bm25_score': float(bm25_norm[idx]),
-                    'fused_score': float(fused[idx]),
-                    'dense_score': float(dense_norm[idx]),
-                    'position_std': c.get('position_std', ''),
-                    'league': c.get('league'),
-                    'age': c.get('age'),
-                })
-
-            return ranked
-            
+            t2 = time.perf_counter()
+            trace["timings"]["encode"] = (t1 - t0) * 1000
+            trace["timings"]["qdrant"] = (t2 - t1) * 1000
+            trace["timings"]["dense"] = (t2 - t0) * 1000
+            return query_vector, results.points
+
+        async def sparse():
+            t0 = time.perf_counter()
+            result = await loop.run_in_executor(
+                self._cpu_executor, self._sparse_search, query, plan["sparse_top_n"], plan["allowed_ids"]
+            )
+            trace["timings"]["sparse"] = (time.perf_counter() - t0) * 1000
+            return result
+
+        (query_vector, dense_points), (bm25, all_bm25, sparse_hits) = await asyncio.gather(dense(), sparse())
+
+        t0 = time.perf_counter()
+        candidates = self._dense_candidates(dense_points, trace)
+        sparse_only = [pid for pid, _ in sparse_hits if pid not in candidates]
+        hydrated = {}
+        if sparse_only:
+            points = await self._avector_call(
+                "retrieve",
+                collection_name=self.collection_name,
+                ids=sparse_only,
+                with_payload=True,
+                with_vectors=[self._vector_name] if self._vector_name else True
+            )
+            hydrated = {str(point.id): point for point in points}
+        self._add_sparse_candidates(candidates, sparse_hits, hydrated, query_vector, plan, trace)
+        trace["timings"]["hydrate"] = (time.perf_counter() - t0) * 1000
+
+        ranked = []
+        if candidates:
+            ranked = self._rank_candidates(query, top_k, candidates, bm25, all_bm25, plan["intent"], trace)
+
+        self._finish_trace(trace, start, len(candidates))
+        return ranked, trace
+
+    def player_choices(self) -> list[tuple[str, str]]:
+        """(libellé, identifiant) des joueurs de la table des voisins, triés par nom"""
+        table = self.neighbor_table.snapshot()
+        choices = [
+            (f"{p.get('player')} ({p.get('team')}, {p.get('season')})", point_id)
+            for point_id, p in zip(table.ids, table.players)
+        ]
+        return sorted(choices, key=lambda choice: choice[0])
+
+    def similar_players(self, player_id: str, top_k: int = 5, position_std: str | None = None) -> list:
+        """Joueurs les plus proches d'un joueur du corpus (voir `similar_players_with_trace`)"""
+        ranked, _ = self.similar_players_with_trace(player_id, top_k, position_std)
+        return ranked
+
+    def similar_players_with_trace(self, player_id: str, top_k: int = 5,
+                                   position_std: str | None = None) -> tuple[list, dict]:
+        """
+        Joueurs les plus proches d'un joueur du corpus, sans encodage ni recherche vectorielle
+
+        Les voisins sont lus dans la table pré-calculée à l'indexation, puis passent par le même
+        filtre, les mêmes boosts et la même fusion dense/BM25 que `search_players` (requête
+        lexicale : profil-type du joueur de référence). Les autres saisons du joueur (même nom, même club) sont exclues.
+        Si le joueur n'est pas dans la table ou que le filtre laisse trop peu de voisins,
+        recherche vectorielle à partir de son vecteur stocké.
+
+        Returns:
+            (joueurs classés, trace), comme `search_players_with_trace`
+        """
+        if not player_id:
+            return [], self._empty_trace()
+
+        start = time.perf_counter()
+        intent = {"position_std": position_std or None}
+        request = {"player_id": str(player_id), "top_k": int(top_k), "position_std": position_std or None}
+        computed = []
+
+        def similar():
+            computed.append(True)
+            return self._similar_uncached(str(player_id), top_k, intent)
+
+        try:
+            key = ("similar", str(player_id), int(top_k), position_std or None, self._collection_version())
+            ranked, trace = self.result_cache.get_or_compute(key, similar)
         except Exception as e:
-            print(f"Erreur lors de la recherche: {e}")
-            return []
-    
+            return [], self._failed("similar", request, start, e)
+        return self._served("similar", request, start, ranked, trace, computed)
+
+    def _similar_uncached(self, player_id: str, top_k: int, intent: dict) -> tuple[list, dict]:
+        """Exécute la recherche de joueurs similaires (voir `similar_players_with_trace`)"""
+        trace = self._empty_trace()
+        start = time.perf_counter()
+        pool_size = max(top_k * 5, config.Config.SEARCH_DENSE_TOP_N)
+
+        # Voisins pré-calculés vérifiant le filtre (autres saisons du même joueur exclues, homonymes gardés)
+        t0 = time.perf_counter()
+        table = self.neighbor_table.snapshot()
+        reference = table.player(player_id)
+        entries = table.lookup(player_id) if reference else []
+        keep = np.ones(len(entries), dtype=bool)
+        for mask in constraint_masks([fields for _, _, fields in entries], intent).values():
+            keep &= mask
+        identity = player_identity(reference) if reference else None
+        neighbors = [
+            (pid, score) for (pid, score, fields), kept in zip(entries, keep)
+            if kept and player_identity(fields) != identity
+        ][:pool_size]
+
+        # Payloads complets (résumés) : une seule lecture par identifiants
+        records = {
+            str(point.id): point for point in self.qdrant_client.retrieve(
+                collection_name=self.collection_name,
+                ids=[player_id] + [pid for pid, _ in neighbors],
+                with_payload=True,
+                with_vectors=False
+            )
+        }
+        if player_id not in records:
+            self._finish_trace(trace, start, 0)
+            return [], trace
+        reference_payload = records[player_id].payload or {}
+        trace["reference"] = reference_payload.get("player")
+        trace["timings"]["lookup"] = (time.perf_counter() - t0) * 1000
+
+        if len(neighbors) < top_k:
+            # Joueur absent de la table ou filtre trop sélectif : recherche depuis le vecteur stocké
+            t0 = time.perf_counter()
+            reference_point = self.qdrant_client.retrieve(
+                collection_name=self.collection_name,
+                ids=[player_id],
+                with_payload=False,
+                with_vectors=[self._vector_name] if self._vector_name else True
+            )[0]
+            vector = np.asarray(point_vector(reference_point, self._vector_name), dtype=np.float32)
+            points = self.qdrant_client.query_points(
+                **self._dense_query(vector, self._make_qdrant_filter(intent), pool_size + 10)
+            ).points
+            neighbors = []
+            for point in points:
+                payload = point.payload or {}
+                if str(point.id) == player_id or player_identity(payload) == player_identity(reference_payload):
+                    continue
+                records[str(point.id)] = point
+                neighbors.append((str(point.id), float(point.score)))
+            neighbors = neighbors[:pool_size]
+            trace["timings"]["dense"] = (time.perf_counter() - t0) * 1000
+
+        candidates = {}
+        for rank, (pid, score) in enumerate(neighbors):
+            if pid in records:
+                candidates[pid] = {
+                    "payload": records[pid].payload or {},
+                    "dense_raw": score,
+                    "dense_rank": rank,
+                    "sparse_rank": -1,
+                }
+        trace["dense"] = list(candidates)
+
+        # Lexical : profil-type du joueur de référence, classement parmi les voisins
+        t0 = time.perf_counter()
+        summary = str(reference_payload.get("summary", ""))
+        query = self.extract_profil_type(summary) or summary
+        self.bm25_index.reload_if_changed()
+        bm25 = self.bm25_index.snapshot()
+        all_bm25 = bm25.scores(query)
+        ids = list(candidates)
+        bm25_scores = bm25.scores_for(query, ids, scores=all_bm25)
+        for sparse_rank, idx in enumerate(np.argsort(-bm25_scores, kind="stable")):
+            if bm25_scores[idx] > 0:
+                candidates[ids[idx]]["sparse_rank"] = sparse_rank
+                trace["sparse"].append(ids[idx])
+        trace["names"] = {pid: c["payload"].get("player") for pid, c in candidates.items()}
+        trace["timings"]["sparse"] = (time.perf_counter() - t0) * 1000
+
+        ranked = []
+        if candidates:
+            ranked = self._rank_candidates(query, top_k, candidates, bm25, all_bm25, intent, trace)
+
+        self._finish_trace(trace, start, len(candidates))
+        return ranked, trace
+
+    async def asimilar_players_with_trace(self, player_id: str, top_k: int = 5,
+                                          position_std: str | None = None) -> tuple[list, dict]:
+        """Variante asynchrone de `similar_players_with_trace` (exécutée dans l'exécuteur borné)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._cpu_executor, self.similar_players_with_trace, player_id, int(top_k), position_std or None
+        )
+
+    async def asimilar_interface(self, player_id: str, top_k: int, position_std: str | None = None) -> str:
+        """Joueurs similaires formatés pour Gradio"""
+        if not player_id:
+            return "Choisissez un joueur de référence."
+        
+        players, trace = await self.asimilar_players_with_trace(player_id, top_k, position_std)
+        return self._format_results(players, f"Joueurs similaires à *{trace.get('reference') or player_id}*", trace)
+
     def format_player_result(self, player: dict, index: int) -> str:
         """Formate un résultat de joueur pour l'affichage"""
         s = player.get("fused_score", 0.0)
@@ -312,12 +995,25 @@ class PlayerSearchApp:
         if not query.strip():
             return "Veuillez entrer une description de joueur pour commencer la recherche."
         
-        players = self.search_players(query, top_k)
+        players, trace = self.search_players_with_trace(query, top_k)
+        return self._format_results(players, f"Résultats de recherche pour: *{query}*", trace)
+
+    async def asearch_interface(self, query: str, top_k: int) -> str:
+        """Variante asynchrone de `search_interface` (utilisée par l'interface Gradio)"""
+        if not query.strip():
+            return "Veuillez entrer une description de joueur pour commencer la recherche."
         
+        players, trace = await self.asearch_players_with_trace(query, top_k)
+        return self._format_results(players, f"Résultats de recherche pour: *{query}*", trace)
+
+    def _format_results(self, players: list, title: str, trace: dict | None = None) -> str:
+        """Résultats formatés en markdown (message d'erreur si la recherche a échoué)"""
+        if trace and trace.get("error"):
+            return f"❌ La recherche a échoué ({trace['error']}). Réessayez dans un instant."
         if not players:
             return "Aucun joueur trouvé pour cette requête. Essayez de reformuler votre description."
         
-        result_text = f"## Résultats de recherche pour: *{query}*\n\n"
+        result_text = f"## {title}\n\n"
         result_text += f"**{len(players)} joueur(s) trouvé(s)**\n\n"
         
         for i, player in enumerate(players, 1):
@@ -325,9 +1021,17 @@ class PlayerSearchApp:
         
         return result_text
 
-def create_gradio_interface():
-    """Crée et lance l'interface Gradio"""
-    app = PlayerSearchApp()
+def create_gradio_interface(app: PlayerSearchApp | None = None):
+    """
+    Crée et lance l'interface Gradio
+
+    Args:
+        app: Application de recherche déjà chargée (partagée avec l'API JSON), créée sinon
+    """
+    # Import tardif : le modèle se charge en arrière-plan pendant l'import de Gradio
+    import gradio as gr
+    
+    app = app or PlayerSearchApp()
     
     # Interface Gradio
     with gr.Blocks(
@@ -400,16 +1104,51 @@ def create_gradio_interface():
         
         # Événements
         search_btn.click(
-            fn=app.search_interface,
+            fn=app.asearch_interface,
             inputs=[query_input, top_k_slider],
             outputs=results_output
         )
         
         query_input.submit(
-            fn=app.search_interface,
+            fn=app.asearch_interface,
             inputs=[query_input, top_k_slider],
             outputs=results_output
         )
+        
+        # Joueurs similaires à un joueur du corpus (table des voisins pré-calculée)
+        with gr.Accordion("👥 Joueurs similaires", open=False):
+            with gr.Row():
+                reference_input = gr.Dropdown(
+                    choices=app.player_choices(),
+                    label="Joueur de référence",
+                    filterable=True,
+                    scale=3
+                )
+                similar_position = gr.Dropdown(
+                    choices=[("Tous les postes", "")] + [(p, p) for p in ("GK", "DF", "DM", "CM", "AM", "ST")],
+                    value="",
+                    label="Poste"
+                )
+                similar_top_k = gr.Slider(minimum=1, maximum=10, value=5, step=1, label="Nombre de résultats")
+            similar_btn = gr.Button("👥 Trouver des joueurs similaires")
+            similar_output = gr.Markdown()
+        similar_btn.click(
+            fn=app.asimilar_interface,
+            inputs=[reference_input, similar_top_k, similar_position],
+            outputs=similar_output
+        )
+        
+        # Statistiques des caches (taux de succès, latences)
+        with gr.Accordion("📈 Statistiques des caches", open=False):
+            cache_stats_output = gr.JSON()
+            cache_stats_btn = gr.Button("Actualiser")
+        cache_stats_btn.click(fn=app.cache_stats, inputs=None, outputs=cache_stats_output)
+    
+    # File d'attente : recherches simultanées bornées, requêtes refusées au-delà de la taille maximale
+    interface.queue(
+        default_concurrency_limit=config.Config.GRADIO_CONCURRENCY,
+        max_size=config.Config.GRADIO_QUEUE_MAX_SIZE
+    )
     
     return interface
 
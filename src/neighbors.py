@@ -0,0 +1,170 @@
+"""
+Table des plus proches voisins de chaque joueur du corpus
+Calculée à l'indexation, lue en O(1) par l'application ("joueurs similaires à X")
+"""
+
+import json
+import numpy as np
+from pathlib import Path
+from dataclasses import dataclass, field
+
+from generations import GenerationStore
+
+FORMAT_VERSION = 1
+
+# Champs de payload gardés dans la table (libellés et filtres, sans le résumé)
+PLAYER_FIELDS = ("player", "team", "season", "league", "position_std", "age")
+
+
+def player_identity(fields: dict) -> tuple:
+    """
+    Identité d'un joueur d'une saison à l'autre : (nom, club)
+
+    Le nom seul confondrait des homonymes ; le club distingue deux joueurs du même nom
+    (un même joueur après un transfert n'est en revanche pas reconnu).
+    """
+    return fields.get("player"), fields.get("team")
+
+
+def top_k_neighbors(vectors: np.ndarray, k: int, block_size: int = 1024) -> tuple[np.ndarray, np.ndarray]:
+    """
+    `k` plus proches voisins (cosinus) de chaque vecteur, lui-même exclu
+
+    Calcul exact par blocs de lignes (un produit matriciel par bloc).
+
+    Returns:
+        (positions des voisins (n, k) int32, similarités (n, k) float32), triées par similarité décroissante
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms > 0, norms, 1.0)
+    n = len(vectors)
+    k = max(0, min(k, n - 1))
+    positions = np.zeros((n, k), dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if k == 0:
+        return positions, scores
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        sims = vectors[start:stop] @ vectors.T
+        sims[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        positions[start:stop] = np.take_along_axis(top, order, axis=1)
+        scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+    return positions, scores
+
+
+@dataclass(frozen=True)
+class NeighborSnapshot:
+    """Génération chargée de la table (memory-map), en lecture seule"""
+    manifest: dict | None = None
+    ids: list = field(default_factory=list)
+    players: list = field(default_factory=list)
+    neighbors: np.ndarray | None = None
+    scores: np.ndarray | None = None
+    position: dict = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def player(self, point_id) -> dict | None:
+        """Champs de payload du joueur (sans le résumé)"""
+        i = self.position.get(str(point_id))
+        return None if i is None else self.players[i]
+
+    def lookup(self, point_id) -> list[tuple[str, float, dict]]:
+        """[(id, similarité, champs du joueur)] des voisins pré-calculés, du plus proche au plus lointain"""
+        i = self.position.get(str(point_id))
+        if i is None:
+            return []
+        return [
+            (self.ids[j], float(score), self.players[j])
+            for j, score in zip(self.neighbors[i], self.scores[i])
+        ]
+
+
+_EMPTY = NeighborSnapshot()
+
+
+class NeighborTable:
+    """
+    Voisins pré-calculés : `neighbors[i]` = positions des k joueurs les plus proches du joueur i
+
+    Même cycle de vie que l'index BM25 (`GenerationStore`) : générations `gen-<n>/` publiées
+    par bascule atomique de `manifest.json`, chargées par memory-map en un `NeighborSnapshot`.
+    """
+
+    def __init__(self, root: Path):
+        """
+        Args:
+            root: Dossier de la table (ex: data/neighbors/ragscout_players)
+        """
+        self.root = Path(root)
+        self._generations = GenerationStore(self.root, FORMAT_VERSION, self._read_generation)
+
+    @staticmethod
+    def _read_generation(gen_dir: Path, manifest: dict) -> NeighborSnapshot:
+        with open(gen_dir / "players.json", "r", encoding="utf-8") as f:
+            players = json.load(f)
+        return NeighborSnapshot(
+            manifest=manifest,
+            ids=players["ids"],
+            players=players["players"],
+            neighbors=np.load(gen_dir / "neighbors.npy", mmap_mode="r"),
+            scores=np.load(gen_dir / "scores.npy", mmap_mode="r"),
+            position={point_id: i for i, point_id in enumerate(players["ids"])},
+        )
+
+    def load(self) -> bool:
+        """Charge la génération courante (memory-map). Faux si la table n'existe pas."""
+        return self._generations.load()
+
+    def reload_if_changed(self) -> bool:
+        """Recharge la table si une nouvelle génération a été publiée. Vrai si rechargée."""
+        return self._generations.reload_if_changed()
+
+    def snapshot(self) -> NeighborSnapshot:
+        """Génération chargée (vide avant le premier chargement)"""
+        return self._generations.snapshot or _EMPTY
+
+    @property
+    def manifest(self) -> dict | None:
+        return self.snapshot().manifest
+
+    @property
+    def generation(self) -> str | None:
+        return (self.manifest or {}).get("generation")
+
+    def __len__(self) -> int:
+        return len(self.snapshot())
+
+    def __contains__(self, point_id) -> bool:
+        return str(point_id) in self.snapshot().position
+
+    def player(self, point_id) -> dict | None:
+        """Champs de payload du joueur (sans le résumé)"""
+        return self.snapshot().player(point_id)
+
+    def lookup(self, point_id) -> list[tuple[str, float, dict]]:
+        """[(id, similarité, champs du joueur)] des voisins pré-calculés, du plus proche au plus lointain"""
+        return self.snapshot().lookup(point_id)
+
+    def build(self, ids: list[str], vectors: np.ndarray, payloads: list[dict], k: int = 100):
+        """Calcule les voisins de tout le corpus et publie une nouvelle génération"""
+        positions, scores = top_k_neighbors(vectors, k) if len(ids) else (
+            np.zeros((0, 0), dtype=np.int32), np.zeros((0, 0), dtype=np.float32)
+        )
+
+        def write(gen_dir: Path):
+            np.save(gen_dir / "neighbors.npy", positions)
+            np.save(gen_dir / "scores.npy", scores)
+            with open(gen_dir / "players.json", "w", encoding="utf-8") as f:
+                json.dump({
+                    "ids": [str(i) for i in ids],
+                    "players": [{name: p.get(name) for name in PLAYER_FIELDS} for p in payloads],
+                }, f, ensure_ascii=False, default=str)
+
+        self._generations.publish(write, players=len(ids), k=int(positions.shape[1]))
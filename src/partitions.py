@@ -0,0 +1,59 @@
+"""
+Partitions d'ingestion (saison, ligue FBref)
+Chaque partition a ses statistiques, son journal de résumés et ses points Qdrant
+"""
+
+import itertools
+from pathlib import Path
+from dataclasses import dataclass
+
+# Partition historique : ses fichiers restent à la racine de data/ (player_summaries.json...)
+LEGACY_SEASON = "2425"
+LEGACY_LEAGUE = "Big 5 European Leagues Combined"
+
+
+def _slug(value: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in value)
+
+
+@dataclass(frozen=True)
+class Partition:
+    """Une saison d'une ligue (ou d'un ensemble de ligues) FBref"""
+    season: str
+    league: str
+
+    @property
+    def id(self) -> str:
+        """Identifiant stable, stocké dans le payload Qdrant (`partition`)"""
+        return f"{self.season}/{_slug(self.league)}"
+
+    @property
+    def is_legacy(self) -> bool:
+        return self.season == LEGACY_SEASON and self.league == LEGACY_LEAGUE
+
+    def directory(self, data_dir: Path) -> Path:
+        """Dossier des fichiers propres à la partition (résumés, journal, lot en cours)"""
+        if self.is_legacy:
+            return Path(data_dir)
+        return Path(data_dir) / "partitions" / f"season={self.season}" / f"league={_slug(self.league)}"
+
+    def __str__(self) -> str:
+        return f"{self.league} {self.season}"
+
+
+def parse_list(value: str | None) -> list[str]:
+    """Liste séparée par des virgules ("2324,2425") -> ["2324", "2425"]"""
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def build_partitions(seasons: list[str], leagues: list[str]) -> list[Partition]:
+    """Toutes les combinaisons saison x ligue"""
+    return [Partition(str(season), league) for season, league in itertools.product(seasons, leagues)]
+
+
+def summary_files(data_dir: Path) -> list[Path]:
+    """Fichiers de résumés de toutes les partitions présentes sur disque"""
+    data_dir = Path(data_dir)
+    files = sorted((data_dir / "partitions").glob("season=*/league=*/player_summaries.json"))
+    legacy = data_dir / "player_summaries.json"
+    return ([legacy] if legacy.exists() else []) + files
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Profilage du pipeline de données
+Mesure chaque étape (durée, débit, mémoire, octets lus et écrits, compteurs LLM et embeddings),
+écrit un rapport JSON par exécution et signale les régressions face à une exécution précédente
+
+Usage:
+    python pipeline_profiler.py                       # dernier rapport face au précédent
+    python pipeline_profiler.py run.json --baseline ref.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import cProfile
+import platform
+import argparse
+import threading
+import functools
+import inspect
+from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Ajouter le répertoire parent au path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+import config
+
+# Régressions mémoire ignorées en dessous de cet écart
+MIN_RSS_REGRESSION_BYTES = 64 * 1024 * 1024
+# Débit d'encodage comparé seulement au-delà de ce nombre d'embeddings dans les deux rapports
+MIN_ENCODED_FOR_COMPARISON = 100
+
+
+def _current_rss_bytes() -> int | None:
+    """Mémoire résidente actuelle du processus (Linux), None ailleurs"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss_bytes() -> int | None:
+    """Pic de mémoire résidente du processus depuis son lancement"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kio sous Linux, octets sous macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _io_bytes() -> dict | None:
+    """Octets lus et écrits sur le stockage par le processus (Linux, /proc/self/io), None ailleurs"""
+    try:
+        with open("/proc/self/io", "r") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return {"read_bytes": int(fields["read_bytes"]), "write_bytes": int(fields["write_bytes"])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class PipelineProfiler:
+    """
+    Mesures des étapes d'une exécution du pipeline
+
+    Chaque étape (`stage` ou méthode décorée par `profiled_step`) relève sa durée, son temps CPU,
+    le pic de mémoire résidente pendant l'étape (échantillonné), les octets lus et écrits et les
+    compteurs ajoutés par `count` depuis le thread de l'étape. CPU, mémoire et E/S sont ceux du
+    processus : avec plusieurs partitions construites en parallèle, ils incluent les étapes voisines.
+    """
+
+    def __init__(self, report_dir: Path | None = None, profile_dir: Path | None = None,
+                 sample_interval: float = 0.2):
+        """
+        Args:
+            report_dir: Dossier des rapports d'exécution (None = pas de rapport écrit)
+            profile_dir: Dossier des profils cProfile, un fichier .prof par étape (None = pas de profil)
+            sample_interval: Intervalle d'échantillonnage de la mémoire résidente (s)
+        """
+        self.report_dir = Path(report_dir) if report_dir else None
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.sample_interval = sample_interval
+        self.started_at = time.time()
+        # Horodatage en tête : l'ordre alphabétique des rapports est leur ordre chronologique
+        self.run_id = (f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))}"
+                       f"{int(self.started_at * 1000) % 1000:03d}-{os.getpid()}")
+        self._start = time.perf_counter()
+        self.stages = []
+        self.counters = {}
+        self._open = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Un seul profileur cProfile actif à la fois dans le processus
+        self._profile_lock = threading.Lock()
+        self._sampler = None
+        self._stop = threading.Event()
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _sample(self):
+        rss = _current_rss_bytes()
+        if rss is None:
+            return
+        with self._lock:
+            for record in self._open:
+                record["peak_rss_bytes"] = max(record["peak_rss_bytes"] or 0, rss)
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.sample_interval):
+            self._sample()
+
+    def _ensure_sampler(self):
+        if self._sampler is None and _current_rss_bytes() is not None:
+            self._sampler = threading.Thread(target=self._sample_loop, name="rss-sampler", daemon=True)
+            self._sampler.start()
+
+    @contextmanager
+    def stage(self, name: str, partition=None):
+        """
+        Mesure une étape ; `add_rows` et `count` appelés depuis ce thread lui sont attribués
+
+        Yields:
+            Enregistrement de l'étape (complété à la sortie)
+        """
+        record = {
+            "name": name,
+            "partition": None if partition is None else str(getattr(partition, "id", partition)),
+            "offset_seconds": round(time.perf_counter() - self._start, 3),
+            "wall_seconds": None,
+            "cpu_seconds": None,
+            "rows": 0,
+            "rows_per_second": None,
+            "peak_rss_bytes": _current_rss_bytes(),
+            "max_rss_bytes": None,
+            "read_bytes": None,
+            "write_bytes": None,
+            "counters": {},
+            "profile": None,
+            "error": None,
+        }
+        with self._lock:
+            self._open.append(record)
+        self._ensure_sampler()
+        self._stack().append(record)
+
+        profiler = None
+        if self.profile_dir is not None and self._profile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Autre profileur actif (sys.setprofile, débogueur)
+                profiler = None
+                self._profile_lock.release()
+
+        io_start = _io_bytes()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            wall = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                self._profile_lock.release()
+                record["profile"] = str(self._dump_profile(profiler, record))
+            self._sample()
+            io_end = _io_bytes()
+            record.update(
+                wall_seconds=round(wall, 4),
+                cpu_seconds=round(time.process_time() - cpu_start, 4),
+                rows_per_second=round(record["rows"] / wall, 2) if record["rows"] and wall > 0 else None,
+                max_rss_bytes=_max_rss_bytes(),
+            )
+            if io_start is not None and io_end is not None:
+                record["read_bytes"] = io_end["read_bytes"] - io_start["read_bytes"]
+                record["write_bytes"] = io_end["write_bytes"] - io_start["write_bytes"]
+            self._stack().pop()
+            with self._lock:
+                self._open.remove(record)
+                self.stages.append(record)
+
+    def _dump_profile(self, profiler: cProfile.Profile, record: dict) -> Path:
+        """Profil de l'étape au format pstats (snakeviz, `python -m pstats`, gprof2dot)"""
+        run_dir = self.profile_dir / self.run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+        suffix = "-" + re.sub(r"[^\w.-]+", "_", record["partition"]) if record["partition"] else ""
+        path = run_dir / f"{record['name']}{suffix}.prof"
+        profiler.dump_stats(str(path))
+        return path
+
+    def add_rows(self, rows: int):
+        """Lignes traitées par l'étape en cours du thread appelant (débit en lignes/s)"""
+        stack = self._stack()
+        if stack:
+            stack[-1]["rows"] += int(rows)
+
+    def count(self, name: str, amount: float = 1):
+        """Ajoute `amount` au compteur `name` de l'exécution et de l'étape en cours du thread appelant"""
+        stack = self._stack()
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+            if stack:
+                stack[-1]["counters"][name] = stack[-1]["counters"].get(name, 0) + amount
+
+    def report(self, status: str = "success", error: str | None = None, context: dict | None = None) -> dict:
+        """Rapport de l'exécution (étapes dans l'ordre de leur fin, totaux et compteurs)"""
+        counters = dict(self.counters)
+        encode_seconds = counters.get("embedding_encode_seconds", 0)
+        peaks = [s["peak_rss_bytes"] for s in self.stages if s["peak_rss_bytes"]]
+        return {
+            "run_id": self.run_id,
+            "status": status,
+            "error": error,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "duration_seconds": round(time.perf_counter() - self._start, 3),
+            "host": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+            },
+            "context": context or {},
+            "stages": list(self.stages),
+            "totals": {
+                "peak_rss_bytes": max(peaks) if peaks else None,
+                "max_rss_bytes": _max_rss_bytes(),
+                "embeddings_per_second": (
+                    round(counters.get("embeddings_encoded", 0) / encode_seconds, 2) if encode_seconds else None
+                ),
+                "counters": counters,
+            },
+        }
+
+    def save(self, report: dict) -> Path | None:
+        """Écrit le rapport dans `report_dir` (écriture atomique)"""
+        if self.report_dir is None:
+            return None
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        path = self.report_dir / f"run-{report['run_id']}.json"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        tmp_path.replace(path)
+        return path
+
+    def close(self):
+        self._stop.set()
+
+
+def profiled_step(method):
+    """
+    Mesure une méthode du pipeline comme une étape (profileur `self.profiler`)
+    Le paramètre `partition` de la méthode, s'il est fourni, distingue les étapes de chaque partition.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = getattr(self, "profiler", None)
+        if profiler is None:
+            return method(self, *args, **kwargs)
+        partition = signature.bind(self, *args, **kwargs).arguments.get("partition")
+        with profiler.stage(method.__name__, partition):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _aggregate(report: dict) -> dict:
+    """Étapes regroupées par nom (somme sur les partitions) : durée, lignes, pic de mémoire"""
+    stages = {}
+    for stage in report.get("stages", []):
+        entry = stages.setdefault(stage["name"], {"wall_seconds": 0.0, "rows": 0, "peak_rss_bytes": 0})
+        entry["wall_seconds"] += stage["wall_seconds"] or 0.0
+        entry["rows"] += stage["rows"] or 0
+        entry["peak_rss_bytes"] = max(entry["peak_rss_bytes"], stage["peak_rss_bytes"] or 0)
+    return stages
+
+
+def compare_reports(current: dict, baseline: dict, threshold: float = 0.2, min_seconds: float = 2.0) -> list[dict]:
+    """
+    Régressions de `current` face à `baseline`
+
+    Par étape (partitions cumulées) : débit en lignes/s en baisse de plus de `threshold` si les
+    deux exécutions ont traité des lignes, sinon durée en hausse de plus de `threshold` ; dans les
+    deux cas, seulement si l'écart de durée dépasse `min_seconds`. Aussi : pic de mémoire en hausse
+    de plus de `threshold` (et de 64 Mio) et débit d'encodage des embeddings en baisse.
+
+    Returns:
+        [{"stage", "metric", "baseline", "current", "change"}], change = variation relative
+    """
+    regressions = []
+
+    def flag(stage, metric, before, after, worse_when_lower=False):
+        if not before or after is None:
+            return
+        change = (after - before) / before
+        if (-change if worse_when_lower else change) > threshold:
+            regressions.append({
+                "stage": stage, "metric": metric, "baseline": before, "current": after, "change": round(change, 3)
+            })
+
+    before_stages, after_stages = _aggregate(baseline), _aggregate(current)
+    for name, after in after_stages.items():
+        before = before_stages.get(name)
+        if before is None:
+            continue
+        if abs(after["wall_seconds"] - before["wall_seconds"]) >= min_seconds:
+            if before["rows"] and after["rows"]:
+                flag(name, "rows_per_second", before["rows"] / (before["wall_seconds"] or 1e-9),
+                     after["rows"] / (after["wall_seconds"] or 1e-9), worse_when_lower=True)
+            else:
+                flag(name, "wall_seconds", before["wall_seconds"], after["wall_seconds"])
+        if after["peak_rss_bytes"] - before["peak_rss_bytes"] >= MIN_RSS_REGRESSION_BYTES:
+            flag(name, "peak_rss_bytes", before["peak_rss_bytes"], after["peak_rss_bytes"])
+
+    before_totals, after_totals = baseline.get("totals", {}), current.get("totals", {})
+    encoded = [t.get("counters", {}).get("embeddings_encoded", 0) for t in (before_totals, after_totals)]
+    if min(encoded) >= MIN_ENCODED_FOR_COMPARISON:
+        flag("embeddings", "embeddings_per_second", before_totals.get("embeddings_per_second"),
+             after_totals.get("embeddings_per_second"), worse_when_lower=True)
+    return regressions
+
+
+def find_baseline(report_dir: Path, before: str | None = None) -> Path | None:
+    """Rapport réussi le plus récent de `report_dir`, antérieur à l'exécution `before` si elle est donnée"""
+    for path in sorted(Path(report_dir).glob("run-*.json"), reverse=True):
+        if before and path.name >= f"run-{before}.json":
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                if json.load(f).get("status") == "success":
+                    return path
+        except (OSError, json.JSONDecodeError):
+            continue
+    return None
+
+
+def _mib(n: int | None) -> str:
+    return "-" if not n else f"{n / (1024 * 1024):.0f}"
+
+
+def print_report(report: dict):
+    """Tableau des étapes et compteurs de l'exécution"""
+    print(f"\n📊 Profil de l'exécution {report['run_id']} ({report['duration_seconds']:.1f}s)")
+    print(f"{'étape':<34} {'durée (s)':>10} {'CPU (s)':>9} {'lignes':>8} {'lignes/s':>10} "
+          f"{'RSS max':>8} {'lu Mio':>7} {'écrit Mio':>9}")
+    for stage in report["stages"]:
+        label = stage["name"] + (f" [{stage['partition']}]" if stage["partition"] else "")
+        rate = f"{stage['rows_per_second']:.1f}" if stage["rows_per_second"] else "-"
+        print(f"{label:<34} {stage['wall_seconds']:>10.2f} {stage['cpu_seconds']:>9.2f} {stage['rows']:>8} "
+              f"{rate:>10} {_mib(stage['peak_rss_bytes']):>8} {_mib(stage['read_bytes']):>7} "
+              f"{_mib(stage['write_bytes']):>9}")
+    totals = report["totals"]
+    if totals["counters"]:
+        print("🔢 " + " | ".join(f"{k}={v:g}" for k, v in sorted(totals["counters"].items())))
+    if totals["embeddings_per_second"]:
+        print(f"🧠 Encodage: {totals['embeddings_per_second']:.1f} embeddings/s")
+
+
+def print_regressions(regressions: list[dict], baseline_path: Path):
+    if not regressions:
+        print(f"✅ Pas de régression face à {baseline_path.name}")
+        return
+    print(f"⚠️ {len(regressions)} régression(s) face à {baseline_path.name}:")
+    for r in regressions:
+        print(f"   - {r['stage']} {r['metric']}: {r['baseline']:.4g} -> {r['current']:.4g} ({r['change']:+.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparaison de rapports d'exécution du pipeline")
+    parser.add_argument("report", nargs="?", default=None, help="Rapport à examiner (défaut: le plus récent)")
+    parser.add_argument("--baseline", default=None, help="Rapport de référence (défaut: le précédent)")
+    parser.add_argument("--threshold", type=float, default=config.Config.PIPELINE_REGRESSION_THRESHOLD)
+    parser.add_argument("--min-seconds", type=float, default=config.Config.PIPELINE_REGRESSION_MIN_SECONDS)
+    args = parser.parse_args()
+
+    report_dir = Path(config.Config.PIPELINE_REPORT_DIR)
+    reports = sorted(report_dir.glob("run-*.json"))
+    report_path = Path(args.report) if args.report else (reports[-1] if reports else None)
+    if report_path is None:
+        print(f"❌ Aucun rapport dans {report_dir}")
+        sys.exit(1)
+    with open(report_path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    print_report(report)
+
+    baseline_path = Path(args.baseline) if args.baseline else find_baseline(report_dir, before=report["run_id"])
+    if baseline_path is None:
+        print("ℹ️ Aucun rapport de référence")
+        return
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare_reports(report, baseline, args.threshold, args.min_seconds)
+    print_regressions(regressions, baseline_path)
+    if regressions:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
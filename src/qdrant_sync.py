@@ -0,0 +1,325 @@
+"""
+Synchronisation incrémentale de la collection Qdrant
+Identifiants stables, diff avec l'existant et bascule d'alias (blue/green)
+"""
+
+import json
+import time
+import uuid
+import hashlib
+import numpy as np
+from dataclasses import dataclass, field
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    PointIdsList,
+    SetPayload,
+    OverwritePayloadOperation,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Filter,
+    FieldCondition,
+    MatchValue,
+    IsEmptyCondition,
+    PayloadField,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    SearchParams,
+    QuantizationSearchParams,
+)
+
+# Espace de noms fixe : un même (joueur, club, saison) donne toujours le même identifiant
+POINT_ID_NAMESPACE = uuid.UUID("6f1c1d0e-3b6a-4f5e-9a57-2c4b8d9e7a10")
+
+
+def player_point_id(player: str, team: str, season, partition: str | None = None) -> str:
+    """
+    Identifiant de point déterministe dérivé de (joueur, club, saison, partition)
+
+    Deux partitions peuvent couvrir les mêmes joueurs (ex: "Big 5 European Leagues Combined"
+    et "ENG-Premier League" pour une même saison) : la partition fait partie de la clé pour
+    que chacune garde ses propres points.
+
+    Args:
+        partition: Identifiant de la partition (None = partition historique, identifiants
+            d'avant les partitions conservés)
+    """
+    key = f"{player}|{team}|{season}"
+    if partition is not None:
+        key += f"|{partition}"
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, key))
+
+
+def vector_hash(text: str, model_name: str) -> str:
+    """Empreinte de l'entrée du vecteur (texte encodé + modèle)"""
+    return hashlib.sha1(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+def payload_hash(payload: dict) -> str:
+    """Empreinte du payload (hors champs d'empreinte)"""
+    content = {k: v for k, v in payload.items() if k not in ("vector_hash", "payload_hash")}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def partition_filter(partition_id: str, include_untagged: bool = False) -> Filter:
+    """
+    Filtre des points d'une partition (champ `partition` du payload)
+
+    Args:
+        include_untagged: Inclure aussi les points sans partition (indexés avant les partitions)
+    """
+    condition = FieldCondition(key="partition", match=MatchValue(value=partition_id))
+    if include_untagged:
+        return Filter(should=[condition, IsEmptyCondition(is_empty=PayloadField(key="partition"))])
+    return Filter(must=[condition])
+
+
+# Vecteurs nommés quand la collection stocke aussi un vecteur réduit
+FULL_VECTOR = "full"
+MINI_VECTOR = "mini"
+
+
+def dense_vector_name(mini_dim: int) -> str | None:
+    """Nom du vecteur complet (None = vecteur unique, sans vecteur réduit)"""
+    return FULL_VECTOR if mini_dim > 0 else None
+
+
+def truncate_vectors(vectors: np.ndarray, dim: int) -> np.ndarray:
+    """Premières `dim` composantes de chaque vecteur, renormalisées (troncature de type Matryoshka)"""
+    truncated = np.asarray(vectors, dtype=np.float32)[..., :dim]
+    norms = np.linalg.norm(truncated, axis=-1, keepdims=True)
+    return truncated / np.where(norms > 0, norms, 1.0)
+
+
+def point_vector(point, vector_name: str | None):
+    """Vecteur d'un point lu avec `with_vectors` (nommé ou unique)"""
+    if isinstance(point.vector, dict):
+        return point.vector[vector_name]
+    return point.vector
+
+
+# Octets par composante du vecteur gardé en RAM pour la recherche
+QUANTIZATION_BYTES_PER_DIM = {"none": 4.0, "int8": 1.0, "binary": 1 / 8}
+
+
+def quantization_config(mode: str):
+    """
+    Configuration de quantification d'une collection (None = vecteurs float32 seuls)
+
+    Les vecteurs quantifiés restent en RAM ; les originaux servent au rescoring
+    et peuvent être stockés sur disque.
+    """
+    if mode == "none":
+        return None
+    if mode == "int8":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    raise ValueError(f"QDRANT_QUANTIZATION inconnu: {mode}")
+
+
+def quantized_search_params(mode: str, rescore: bool = True, oversampling: float = 2.0) -> SearchParams | None:
+    """Paramètres de recherche sur une collection quantifiée (None si pas de quantification)"""
+    if mode == "none":
+        return None
+    return SearchParams(quantization=QuantizationSearchParams(rescore=rescore, oversampling=oversampling))
+
+
+def measure_quantization_recall(client: QdrantClient, collection_name: str, mode: str,
+                                sample_size: int = 100, k: int = 10, oversampling: float = 2.0,
+                                vector_name: str | None = None) -> dict:
+    """
+    Rappel@k de la recherche quantifiée (sans et avec rescoring) face à la recherche exacte float32
+
+    Les requêtes sont les vecteurs (`vector_name`) d'un échantillon de points de la collection.
+    """
+    points, _ = client.scroll(
+        collection_name=collection_name,
+        limit=sample_size,
+        with_payload=False,
+        with_vectors=[vector_name] if vector_name else True
+    )
+    vectors = [point_vector(point, vector_name) for point in points]
+    baseline_params = SearchParams(exact=True, quantization=QuantizationSearchParams(ignore=True))
+    variants = {
+        "quantized": SearchParams(quantization=QuantizationSearchParams(rescore=False)),
+        "rescored": SearchParams(quantization=QuantizationSearchParams(rescore=True, oversampling=oversampling)),
+    }
+    recalls = {name: [] for name in variants}
+    for vector in vectors:
+        expected = {
+            p.id for p in client.query_points(
+                collection_name=collection_name, query=vector, using=vector_name, limit=k,
+                search_params=baseline_params
+            ).points
+        }
+        if not expected:
+            continue
+        for name, params in variants.items():
+            found = {
+                p.id for p in client.query_points(
+                    collection_name=collection_name, query=vector, using=vector_name, limit=k,
+                    search_params=params
+                ).points
+            }
+            recalls[name].append(len(found & expected) / len(expected))
+
+    dim = len(vectors[0]) if vectors else 0
+    return {
+        "mode": mode,
+        "queries": len(recalls["quantized"]),
+        "k": k,
+        "recall_quantized": float(np.mean(recalls["quantized"])) if recalls["quantized"] else None,
+        "recall_rescored": float(np.mean(recalls["rescored"])) if recalls["rescored"] else None,
+        "ram_bytes_per_vector": {
+            "float32": dim * QUANTIZATION_BYTES_PER_DIM["none"],
+            mode: dim * QUANTIZATION_BYTES_PER_DIM[mode],
+        },
+    }
+
+
+@dataclass
+class SyncPlan:
+    """Opérations nécessaires pour aligner la collection sur les données"""
+    to_upsert: list = field(default_factory=list)
+    to_update_payload: list = field(default_factory=list)
+    to_delete: list = field(default_factory=list)
+    unchanged: int = 0
+
+    def summary(self) -> str:
+        return (f"{len(self.to_upsert)} à insérer/ré-encoder, "
+                f"{len(self.to_update_payload)} payloads à mettre à jour, "
+                f"{len(self.to_delete)} à supprimer, {self.unchanged} inchangés")
+
+
+class CollectionSync:
+    """Opérations de synchronisation sur une collection (ou l'alias qui la désigne)"""
+
+    def __init__(self, client: QdrantClient, alias_name: str):
+        self.client = client
+        self.alias_name = alias_name
+
+    def fetch_state(self, collection_name: str, scroll_filter=None) -> dict:
+        """Empreintes (vector_hash, payload_hash) de tous les points stockés"""
+        state = {}
+        next_page = None
+        while True:
+            points, next_page = self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=scroll_filter,
+                with_payload=["vector_hash", "payload_hash"],
+                with_vectors=False,
+                limit=1000,
+                offset=next_page
+            )
+            for p in points:
+                payload = p.payload or {}
+                state[str(p.id)] = (payload.get("vector_hash"), payload.get("payload_hash"))
+            if not next_page:
+                break
+        return state
+
+    def fetch_payloads(self, collection_name: str, fields: list[str]) -> dict:
+        """Champs de payload demandés de tous les points : {id: payload}"""
+        payloads = {}
+        next_page = None
+        while True:
+            points, next_page = self.client.scroll(
+                collection_name=collection_name,
+                with_payload=fields,
+                with_vectors=False,
+                limit=1000,
+                offset=next_page
+            )
+            for p in points:
+                payloads[str(p.id)] = p.payload or {}
+            if not next_page:
+                break
+        return payloads
+
+    def plan(self, existing: dict, desired: dict) -> SyncPlan:
+        """
+        Compare l'existant aux données voulues
+
+        Args:
+            existing: {id: (vector_hash, payload_hash)} stocké dans Qdrant
+            desired: {id: (vector_hash, payload_hash)} calculé depuis les données
+        """
+        plan = SyncPlan()
+        for point_id, (vhash, phash) in desired.items():
+            current = existing.get(point_id)
+            if current is None or current[0] != vhash:
+                plan.to_upsert.append(point_id)
+            elif current[1] != phash:
+                plan.to_update_payload.append(point_id)
+            else:
+                plan.unchanged += 1
+        plan.to_delete = [point_id for point_id in existing if point_id not in desired]
+        return plan
+
+    def update_payloads(self, collection_name: str, payloads: dict, batch_size: int = 100):
+        """Remplace le payload des points sans toucher aux vecteurs"""
+        items = list(payloads.items())
+        for i in range(0, len(items), batch_size):
+            self.client.batch_update_points(
+                collection_name=collection_name,
+                update_operations=[
+                    OverwritePayloadOperation(overwrite_payload=SetPayload(payload=payload, points=[point_id]))
+                    for point_id, payload in items[i:i + batch_size]
+                ]
+            )
+
+    def delete_points(self, collection_name: str, point_ids: list, batch_size: int = 1000):
+        """Supprime les points obsolètes"""
+        for i in range(0, len(point_ids), batch_size):
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=PointIdsList(points=point_ids[i:i + batch_size])
+            )
+
+    def resolve_alias(self) -> str | None:
+        """Collection actuellement désignée par l'alias (None si pas d'alias)"""
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == self.alias_name:
+                return alias.collection_name
+        return None
+
+    def new_collection_name(self) -> str:
+        """Nom d'une nouvelle collection versionnée pour le mode blue/green"""
+        return f"{self.alias_name}_{time.strftime('%Y%m%d%H%M%S')}"
+
+    def swap_alias(self, collection_name: str) -> str | None:
+        """
+        Fait pointer l'alias sur `collection_name` en une seule opération atomique
+
+        Returns:
+            Le nom de la collection précédemment désignée par l'alias
+        """
+        previous = self.resolve_alias()
+        if previous is None and self.client.collection_exists(self.alias_name):
+            # Migration : une collection physique porte le nom de l'alias
+            print(f"⚠️ Suppression de la collection physique {self.alias_name} pour créer l'alias")
+            self.client.delete_collection(self.alias_name)
+
+        operations = []
+        if previous is not None:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=self.alias_name)))
+        operations.append(CreateAliasOperation(
+            create_alias=CreateAlias(collection_name=collection_name, alias_name=self.alias_name)
+        ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        return previous
+
+    def drop_old_collections(self, keep: list[str]):
+        """Supprime les anciennes collections versionnées, sauf celles de `keep`"""
+        prefix = f"{self.alias_name}_"
+        for collection in self.client.get_collections().collections:
+            if collection.name.startswith(prefix) and collection.name not in keep:
+                print(f"🗑️ Suppression de l'ancienne collection: {collection.name}")
+                self.client.delete_collection(collection.name)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+API JSON de recherche de joueurs (FastAPI)
+Partage le modèle, les clients Qdrant et les caches avec l'interface Gradio, montée sur /ui
+
+Endpoints:
+    GET  /health           Processus en vie (sonde de vivacité)
+    GET  /ready            200 quand le modèle est chargé et chauffé, 503 avant (sonde de disponibilité)
+    POST /search           Une requête -> joueurs classés
+    POST /search/batch     Plusieurs requêtes traitées ensemble
+    POST /search/stream    Plusieurs requêtes, une ligne NDJSON par requête dès qu'elle est prête
+    POST /similar          Joueurs les plus proches d'un joueur du corpus (table des voisins)
+    GET  /stats            Statistiques des caches et des micro-lots
+    GET  /metrics          Compteurs et histogrammes de la recherche (format texte Prometheus)
+
+Usage:
+    python search_api.py                 # API + interface Gradio sur /ui
+    python search_api.py --no-ui         # API seule (mesures de débit)
+"""
+
+import sys
+import os
+import json
+import asyncio
+import argparse
+from typing import Any
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+
+# Ajouter le répertoire parent au path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+import config
+from gradio_app import PlayerSearchApp
+
+
+class SearchRequest(BaseModel):
+    query: str
+    top_k: int = Field(5, ge=1, le=50)
+    trace: bool = False
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[str]
+    top_k: int = Field(5, ge=1, le=50)
+    trace: bool = False
+
+
+class SimilarRequest(BaseModel):
+    player_id: str
+    top_k: int = Field(5, ge=1, le=50)
+    position_std: str | None = None
+    trace: bool = False
+
+
+class PlayerResult(BaseModel):
+    id: str
+    name: str
+    profil_type: str
+    short_summary: str
+    summary: str
+    position_std: str | None = None
+    league: str | None = None
+    age: Any = None
+    fused_score: float
+    similarity_score: float
+    dense_score: float
+    bm25_score: float
+    dense_rank: int
+    sparse_rank: int
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: list[PlayerResult]
+    timings: dict[str, float]
+    trace: dict | None = None
+    error: str | None = None
+
+
+class BatchSearchResponse(BaseModel):
+    responses: list[SearchResponse]
+
+
+def _response(query: str, results: list, trace: dict, with_trace: bool) -> SearchResponse:
+    return SearchResponse(
+        query=query,
+        results=results,
+        timings=trace.get("timings", {}),
+        trace={k: v for k, v in trace.items() if k != "timings"} if with_trace else None,
+        error=trace.get("error")
+    )
+
+
+def _raise_on_error(trace: dict):
+    """Recherche en erreur : 500 plutôt qu'une liste vide indiscernable d'une absence de résultat"""
+    if trace.get("error"):
+        raise HTTPException(status_code=500, detail=f"Erreur de recherche: {trace['error']}")
+
+
+def add_monitoring_routes(api: FastAPI, app: PlayerSearchApp):
+    """
+    Sondes de l'orchestrateur et métriques : /health répond dès le démarrage, /ready seulement
+    une fois le modèle chargé et la recherche chauffée, /metrics au format texte de Prometheus
+    """
+    @api.get("/health")
+    async def health():
+        return {"status": "ok", "collection": app.collection_name}
+
+    @api.get("/ready")
+    async def ready():
+        readiness = app.readiness()
+        return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+    @api.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(app.telemetry.render(), media_type="text/plain; version=0.0.4")
+
+
+def create_api(app: PlayerSearchApp) -> FastAPI:
+    """
+    Crée l'API JSON autour d'une application de recherche déjà chargée
+
+    Les requêtes d'un lot sont lancées ensemble : leurs encodages partagent les micro-lots
+    et les requêtes identiques sont coalescées par le cache de résultats.
+    """
+    api = FastAPI(title="ScoutRAG Search API")
+    add_monitoring_routes(api, app)
+
+    def check_batch(queries: list[str]):
+        if not queries:
+            raise HTTPException(status_code=400, detail="Aucune requête")
+        if len(queries) > config.Config.API_MAX_BATCH:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Lot trop grand ({len(queries)} > {config.Config.API_MAX_BATCH})"
+            )
+
+    @api.get("/stats")
+    async def stats():
+        return app.cache_stats()
+
+    @api.post("/search", response_model=SearchResponse)
+    async def search(request: SearchRequest):
+        results, trace = await app.asearch_players_with_trace(request.query, request.top_k)
+        _raise_on_error(trace)
+        return _response(request.query, results, trace, request.trace)
+
+    @api.post("/search/batch", response_model=BatchSearchResponse)
+    async def search_batch(request: BatchSearchRequest):
+        check_batch(request.queries)
+        outputs = await asyncio.gather(*[
+            app.asearch_players_with_trace(query, request.top_k) for query in request.queries
+        ])
+        return BatchSearchResponse(responses=[
+            _response(query, results, trace, request.trace)
+            for query, (results, trace) in zip(request.queries, outputs)
+        ])
+
+    @api.post("/search/stream")
+    async def search_stream(request: BatchSearchRequest):
+        check_batch(request.queries)
+
+        async def run(index: int, query: str):
+            results, trace = await app.asearch_players_with_trace(query, request.top_k)
+            return index, _response(query, results, trace, request.trace)
+
+        async def lines():
+            # Ordre d'achèvement : "index" renvoie à la position de la requête dans le lot
+            for next_done in asyncio.as_completed([run(i, q) for i, q in enumerate(request.queries)]):
+                index, response = await next_done
+                yield json.dumps({"index": index, **response.model_dump()}, ensure_ascii=False) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @api.post("/similar", response_model=SearchResponse)
+    async def similar(request: SimilarRequest):
+        results, trace = await app.asimilar_players_with_trace(
+            request.player_id, request.top_k, request.position_std
+        )
+        _raise_on_error(trace)
+        if not results and request.player_id not in app.neighbor_table:
+            raise HTTPException(status_code=404, detail=f"Joueur inconnu: {request.player_id}")
+        return _response(request.player_id, results, trace, request.trace)
+
+    return api
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API JSON de recherche ScoutRAG")
+    parser.add_argument("--host", default=config.Config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.Config.API_PORT)
+    parser.add_argument("--no-ui", action="store_true", help="Ne pas monter l'interface Gradio sur /ui")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    app = PlayerSearchApp()
+    api = create_api(app)
+    if not args.no_ui:
+        import gradio as gr
+        from gradio_app import create_gradio_interface
+        # Même instance : un seul modèle chargé, mêmes clients Qdrant et mêmes caches
+        api = gr.mount_gradio_app(api, create_gradio_interface(app), path="/ui")
+
+    print(f"🌐 API disponible sur http://{args.host}:{args.port}" + ("" if args.no_ui else " (interface sur /ui)"))
+    if not app.readiness()["ready"]:
+        print("⏳ Modèle en cours de chargement : GET /ready répond 200 une fois chauffé")
+    # HTTP/1.1 keep-alive : les clients réutilisent leurs connexions entre requêtes
+    uvicorn.run(api, host=args.host, port=args.port, timeout_keep_alive=config.Config.API_KEEPALIVE_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
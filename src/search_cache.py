@@ -0,0 +1,155 @@
+"""
+Caches de la recherche : LRU borné avec expiration et coalescence des calculs en cours
+"""
+
+import time
+import asyncio
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def normalize_query(query: str) -> str:
+    """Clé de cache d'une requête : minuscules, Unicode NFC, espaces réduits"""
+    return " ".join(unicodedata.normalize("NFC", query or "").lower().split())
+
+
+class TTLCache:
+    """
+    Cache LRU borné dont les entrées expirent après `ttl` secondes
+
+    `get_or_compute` coalesce les appels identiques : tant qu'un calcul est en cours
+    pour une clé, les autres appelants attendent son résultat au lieu de le refaire.
+    Une exception n'est jamais mise en cache (elle est transmise à tous les appelants).
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 3600.0):
+        """
+        Args:
+            name: Nom du cache (statistiques)
+            maxsize: Nombre maximal d'entrées (0 = cache désactivé, coalescence conservée)
+            ttl: Durée de vie d'une entrée (s, 0 = sans expiration)
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0, "errors": 0}
+        self._hit_seconds = 0.0
+        self._miss_seconds = 0.0
+
+    def _get_fresh(self, key):
+        """Entrée valide (sous verrou), None sinon"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if self.ttl and time.monotonic() - stored_at > self.ttl:
+            del self._data[key]
+            self._stats["expired"] += 1
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def _lookup(self, key, start: float) -> tuple:
+        """(entrée valide, calcul en cours, vrai si l'appelant doit calculer)"""
+        with self._lock:
+            entry = self._get_fresh(key)
+            if entry is not None:
+                self._stats["hits"] += 1
+                self._hit_seconds += time.perf_counter() - start
+                return entry, None, False
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+            return None, future, owner
+
+    def get_or_compute(self, key, compute):
+        """Valeur en cache, ou résultat de `compute()` (calculé une seule fois pour les appels simultanés)"""
+        start = time.perf_counter()
+        entry, future, owner = self._lookup(key, start)
+        if entry is not None:
+            return entry[0]
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+
+        self._store(key, value, start)
+        future.set_result(value)
+        return value
+
+    async def aget_or_compute(self, key, compute):
+        """
+        Variante asynchrone : `compute()` renvoie un awaitable
+
+        Les calculs en cours sont partagés avec `get_or_compute` (appelants synchrones).
+        """
+        start = time.perf_counter()
+        entry, future, owner = self._lookup(key, start)
+        if entry is not None:
+            return entry[0]
+
+        if not owner:
+            return await asyncio.wrap_future(future)
+
+        try:
+            value = await compute()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+
+        self._store(key, value, start)
+        future.set_result(value)
+        return value
+
+    def _fail(self, key, future: Future, error: BaseException):
+        """Transmet l'erreur aux appelants en attente, sans rien mettre en cache"""
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._stats["errors"] += 1
+        future.set_exception(error)
+
+    def _store(self, key, value, start: float):
+        """Enregistre un calcul terminé et libère les appelants en attente"""
+        with self._lock:
+            self._inflight.pop(key, None)
+            if self.maxsize > 0:
+                self._data[key] = (value, time.monotonic())
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self._stats["evictions"] += 1
+            self._miss_seconds += time.perf_counter() - start
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Compteurs, taux de succès et latences moyennes (ms) des succès et des calculs"""
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+            stats["size"] = len(self._data)
+            stats["maxsize"] = self.maxsize
+            stats["hit_rate"] = round((stats["hits"] + stats["coalesced"]) / lookups, 4) if lookups else 0.0
+            stats["mean_hit_ms"] = round(1000 * self._hit_seconds / stats["hits"], 3) if stats["hits"] else 0.0
+            stats["mean_miss_ms"] = round(1000 * self._miss_seconds / stats["misses"], 3) if stats["misses"] else 0.0
+        return stats
@@ -0,0 +1,213 @@
+"""
+Télémétrie de la recherche
+Compteurs et histogrammes au format texte Prometheus (GET /metrics), journal JSON optionnel
+d'une ligne par requête dans LOGS_DIR
+"""
+
+import json
+import time
+import logging
+import threading
+import traceback
+from pathlib import Path
+from logging.handlers import RotatingFileHandler
+
+# Bornes des histogrammes de durée (s) et de nombre de candidats
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """Compteur croissant par combinaison d'étiquettes"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {value:g}" for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Histogramme cumulatif (buckets, somme, nombre) par combinaison d'étiquettes"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']:g}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Ensemble de métriques rendu au format d'exposition texte de Prometheus"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        metric = Counter(name, help_text)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def _json_logger(path: Path, max_bytes: int, backups: int) -> logging.Logger:
+    """Logger écrivant une ligne JSON par requête (rotation par taille)"""
+    logger = logging.getLogger(f"scoutrag.search.{path}")
+    if not logger.handlers:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class SearchTelemetry:
+    """
+    Mesures de chaque requête de recherche : durée de chaque étape, nombre de candidats,
+    contraintes filtrées ou en boost, succès des caches et erreurs
+
+    Les durées d'étapes ne sont comptées que pour les requêtes réellement calculées
+    (une réponse servie par le cache de résultats ne compte que sa durée totale).
+    """
+
+    def __init__(self, log_path: Path | None = None, slow_ms: float = 0.0,
+                 max_bytes: int = 50 * 1024 * 1024, backups: int = 5):
+        """
+        Args:
+            log_path: Journal JSON (une ligne par requête), None = pas de journal
+            slow_ms: Seules les requêtes plus lentes sont journalisées (0 = toutes) ; erreurs toujours
+        """
+        self.registry = MetricsRegistry()
+        self.requests = self.registry.counter(
+            "scoutrag_search_requests_total", "Requêtes de recherche par type et résultat du cache de résultats")
+        self.errors = self.registry.counter(
+            "scoutrag_search_errors_total", "Recherches en erreur par type et classe d'exception")
+        self.latency = self.registry.histogram(
+            "scoutrag_search_latency_seconds", "Durée de service d'une requête (cache compris)")
+        self.stages = self.registry.histogram(
+            "scoutrag_search_stage_seconds", "Durée de chaque étape des recherches calculées")
+        self.candidates = self.registry.histogram(
+            "scoutrag_search_candidates", "Candidats par liste (dense, lexicale, union)", COUNT_BUCKETS)
+        self.constraints = self.registry.counter(
+            "scoutrag_search_constraints_total", "Contraintes de requête appliquées en filtre strict ou en boost")
+        self.query_cache = self.registry.counter(
+            "scoutrag_query_vector_cache_total", "Vecteurs de requête servis par le cache ou encodés")
+        self.slow_ms = slow_ms
+        self._logger = _json_logger(Path(log_path), max_bytes, backups) if log_path else None
+
+    def record(self, kind: str, request: dict, trace: dict, cache: str, error: BaseException | None = None):
+        """
+        Enregistre une requête servie
+
+        Args:
+            kind: "search" ou "similar"
+            request: Paramètres de la requête (journal)
+            trace: Trace de la recherche (durées en ms, listes de candidats, filtres)
+            cache: "hit" (cache de résultats) ou "miss" (recherche calculée)
+        """
+        timings = trace.get("timings", {})
+        self.requests.inc(kind=kind, cache=cache if error is None else "error")
+        if "served" in timings:
+            self.latency.observe(timings["served"] / 1000, kind=kind)
+        if error is not None:
+            self.errors.inc(kind=kind, error=type(error).__name__)
+        elif cache == "miss":
+            for stage, ms in timings.items():
+                if stage != "served":
+                    self.stages.observe(ms / 1000, kind=kind, stage=stage)
+            candidates = trace.get("candidates", {})
+            for source, count in candidates.items():
+                self.candidates.observe(count, kind=kind, source=source)
+            filters = trace.get("filters") or {}
+            for mode in ("hard", "soft"):
+                for name in filters.get(mode, []):
+                    self.constraints.inc(constraint=name, mode=mode)
+            if trace.get("query_cache"):
+                self.query_cache.inc(result=trace["query_cache"])
+
+        if self._logger is None:
+            return
+        if error is None and self.slow_ms and timings.get("served", 0.0) < self.slow_ms:
+            return
+        record = {
+            "ts": time.time(),
+            "kind": kind,
+            **request,
+            "cache": cache,
+            "timings_ms": {stage: round(ms, 3) for stage, ms in timings.items()},
+            "candidates": trace.get("candidates"),
+            "filters": trace.get("filters"),
+            "query_cache": trace.get("query_cache"),
+            "results": trace.get("fused", []),
+        }
+        if error is not None:
+            record["error"] = f"{type(error).__name__}: {error}"
+            record["traceback"] = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        self._logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+    def render(self) -> str:
+        """Métriques au format texte de Prometheus"""
+        return self.registry.render()
@@ -0,0 +1,94 @@
+"""
+Empreintes des statistiques joueurs
+Détecte les joueurs dont le profil statistique a réellement évolué depuis la génération de leur résumé
+"""
+
+import json
+import math
+import hashlib
+
+MINUTES_COLUMN = "Playing Time_Min_standard"
+NINETIES_COLUMN = "Playing Time_90s_standard"
+
+# Métriques clés : (type, tolérance absolue, tolérance relative)
+# - "rate" : déjà exprimée par 90 minutes
+# - "count" : total saison, ramené à 90 minutes avant comparaison
+# - "pct" : pourcentage, comparé en points
+KEY_METRICS = {
+    "Per 90 Minutes_Gls_standard": ("rate", 0.10, 0.25),
+    "Per 90 Minutes_Ast_standard": ("rate", 0.08, 0.25),
+    "Per 90 Minutes_xG_standard": ("rate", 0.08, 0.25),
+    "Per 90 Minutes_xAG_standard": ("rate", 0.06, 0.25),
+    "Progression_PrgC_standard": ("count", 0.50, 0.20),
+    "Progression_PrgP_standard": ("count", 0.80, 0.20),
+    "Progression_PrgR_standard": ("count", 1.00, 0.20),
+    "Standard_Sh/90_shooting": ("rate", 0.40, 0.20),
+    "Total_Cmp%_passing": ("pct", 3.0, 0.0),
+    "KP__passing": ("count", 0.30, 0.25),
+    "Tackles_TklW_defense": ("count", 0.40, 0.25),
+    "Int__defense": ("count", 0.30, 0.25),
+    "Take-Ons_Succ_possession": ("count", 0.30, 0.25),
+    "Aerial Duels_Won%_misc": ("pct", 5.0, 0.0),
+}
+
+# Au-delà de cette hausse relative du temps de jeu, le profil est réévalué
+MINUTES_REL_TOLERANCE = 0.30
+
+
+def _as_float(value) -> float | None:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def compute_fingerprint(stats: dict) -> dict:
+    """
+    Empreinte d'une ligne de statistiques
+
+    Returns:
+        {"hash": empreinte de toutes les colonnes numériques, "metrics": métriques clés par 90 minutes}
+    """
+    numeric = {}
+    for column, value in stats.items():
+        value = _as_float(value)
+        if value is not None:
+            numeric[column] = round(value, 3)
+    digest = hashlib.sha1(json.dumps(numeric, sort_keys=True).encode("utf-8")).hexdigest()
+
+    nineties = numeric.get(NINETIES_COLUMN) or 0.0
+    metrics = {}
+    if MINUTES_COLUMN in numeric:
+        metrics[MINUTES_COLUMN] = numeric[MINUTES_COLUMN]
+    for column, (kind, _, _) in KEY_METRICS.items():
+        if column not in numeric:
+            continue
+        if kind == "count":
+            metrics[column] = round(numeric[column] / nineties, 4) if nineties > 0 else 0.0
+        else:
+            metrics[column] = numeric[column]
+
+    return {"hash": digest, "metrics": metrics}
+
+
+def has_materially_changed(old: dict, new: dict) -> bool:
+    """Vrai si le temps de jeu ou une métrique clé a bougé au-delà des tolérances"""
+    if old.get("hash") == new.get("hash"):
+        return False
+
+    old_metrics, new_metrics = old.get("metrics", {}), new.get("metrics", {})
+
+    old_minutes = old_metrics.get(MINUTES_COLUMN)
+    new_minutes = new_metrics.get(MINUTES_COLUMN)
+    if old_minutes is not None and new_minutes is not None:
+        if new_minutes - old_minutes > MINUTES_REL_TOLERANCE * max(old_minutes, 90.0):
+            return True
+
+    for column, (_, abs_tol, rel_tol) in KEY_METRICS.items():
+        if column not in old_metrics or column not in new_metrics:
+            continue
+        before, after = old_metrics[column], new_metrics[column]
+        if abs(after - before) > max(abs_tol, rel_tol * abs(before)):
+            return True
+    return False
@@ -0,0 +1,115 @@
+"""
+Stockage colonnaire typé des statistiques joueurs (Parquet partitionné par saison et ligue)
+Remplace data/players_stats.csv
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pathlib import Path
+
+IDENTITY_COLUMNS = ['league', 'season', 'team', 'player']
+
+# Colonnes textuelles à faible cardinalité stockées en codes catégoriels
+CATEGORICAL_PREFIXES = ('pos_', 'nation_')
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("season", pa.int32()), ("league", pa.string())]),
+    flavor="hive"
+)
+
+
+def to_typed_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Applique des types explicites et compacts
+
+    - season en entier, league/team/poste/nationalité en catégories
+    - statistiques numériques en float32
+    - autres colonnes textuelles (player, âge "24-123", né...) en chaînes
+    """
+    df = df.copy()
+    for column in df.columns:
+        if column == 'season':
+            df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype('int32')
+        elif column in ('league', 'team') or column.startswith(CATEGORICAL_PREFIXES):
+            df[column] = df[column].astype(str).astype('category')
+        elif column == 'player':
+            df[column] = df[column].astype(str)
+        elif pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = df[column].astype('float32')
+        else:
+            numeric = pd.to_numeric(df[column], errors='coerce')
+            if numeric.notna().sum() == df[column].notna().sum():
+                df[column] = numeric.astype('float32')
+            else:
+                df[column] = df[column].astype(str)
+    return df
+
+
+class StatsStore:
+    """Jeu de données Parquet des statistiques (un répertoire par saison/ligue)"""
+
+    def __init__(self, root: Path, legacy_csv: Path | None = None):
+        """
+        Args:
+            root: Racine du jeu de données (ex: data/players_stats)
+            legacy_csv: Ancien players_stats.csv, lu si le jeu Parquet n'existe pas encore
+        """
+        self.root = Path(root)
+        self.legacy_csv = Path(legacy_csv) if legacy_csv else None
+
+    def exists(self) -> bool:
+        return self.root.exists() and any(self.root.rglob("*.parquet"))
+
+    def write(self, df: pd.DataFrame):
+        """Écrit (ou remplace) les partitions saison/ligue présentes dans `df`"""
+        df = to_typed_frame(df)
+        # Les partitions sont des chemins : valeurs en clair plutôt qu'en catégories
+        df['league'] = df['league'].astype(str)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        ds.write_dataset(
+            table,
+            self.root,
+            format="parquet",
+            partitioning=PARTITIONING,
+            existing_data_behavior="delete_matching",
+            file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        )
+
+    def columns(self) -> list[str]:
+        """Colonnes disponibles (sans lire les données)"""
+        return ds.dataset(self.root, format="parquet", partitioning=PARTITIONING).schema.names
+
+    def read(self, columns: list[str] | None = None, seasons: list | None = None,
+             leagues: list[str] | None = None) -> pd.DataFrame:
+        """
+        Lit les statistiques
+
+        Args:
+            columns: Colonnes à charger (toutes si None) ; seules celles-ci sont lues sur disque
+            seasons: Saisons à charger (ex: [2425])
+            leagues: Ligues à charger
+        """
+        if not self.exists():
+            if self.legacy_csv is not None and self.legacy_csv.exists():
+                df = to_typed_frame(pd.read_csv(self.legacy_csv))
+                if seasons is not None:
+                    df = df[df['season'].isin([int(s) for s in seasons])]
+                if leagues is not None:
+                    df = df[df['league'].isin(leagues)]
+                return df[columns] if columns is not None else df
+            raise FileNotFoundError(f"Aucune statistique dans {self.root}")
+
+        dataset = ds.dataset(self.root, format="parquet", partitioning=PARTITIONING)
+        expression = None
+        if seasons is not None:
+            expression = ds.field("season").isin([int(s) for s in seasons])
+        if leagues is not None:
+            league_filter = ds.field("league").isin(list(leagues))
+            expression = league_filter if expression is None else expression & league_filter
+
+        table = dataset.to_table(columns=columns, filter=expression)
+        df = table.to_pandas()
+        if 'league' in df.columns:
+            df['league'] = df['league'].astype('category')
+        return df
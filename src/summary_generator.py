@@ -0,0 +1,337 @@
+"""
+Génération asynchrone des résumés de joueurs avec OpenAI
+Concurrence bornée, limiteur token-bucket (RPM/TPM) et reprise adaptative sur 429
+"""
+
+import random
+import asyncio
+import time
+from dataclasses import dataclass
+from openai import AsyncOpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+
+SYSTEM_PROMPT = "Tu es un expert en analyse footballistique."
+
+# Colonnes d'identité exclues des statistiques envoyées au LLM
+EXCLUDE_COLUMNS = ['season', 'team', 'player', 'league', 'nation__standard', 'age__standard', 'born__standard', 'nation__shooting', 'pos__shooting', 'age__shooting', 'born__shooting', 'nation__passing', 'pos__passing', 'age__passing', 'born__passing', 'nation__defense', 'pos__defense', 'age__defense', 'born__defense', 'nation__possession', 'pos__possession', 'age__possession', 'born__possession', 'nation__misc', 'pos__misc', 'age__misc', 'born__misc']
+
+SUMMARY_PROMPT = """
+        Tu es un expert en scouting football, analyste football spécialisé en scouting basé sur les données.
+        
+        Tu vas recevoir les statistiques détaillées d’un joueur professionnel.  
+        À partir de ces données, rédige une **fiche de scouting complète, claire et neutre**, destinée à alimenter une base de recherche intelligente.
+
+        ---
+
+        ### 🎯 Objectif du texte :
+        Identifier avec précision :
+        - le **rôle du joueur** (poste et sous-rôle)
+        - son **style de jeu** (comportement avec et sans ballon)
+        - ses **principales qualités**
+        - ses **axes d'amélioration**
+        - son **profil-type** en fin de texte
+
+        Le résumé doit permettre à un recruteur ou analyste d’avoir une **vision rapide mais fiable** du profil du joueur.
+
+        ---
+        
+        ### ✍️ Structure attendue (fluide, sans titres ni bullets) :
+
+        1. **Style de jeu et rôle** :  
+        Décris le poste principal (DF, MF, FW…) et si possible, deduis des stats disponibles, le sous-rôle (ex : latéral offensif, milieu récupérateur, attaquant mobile).  
+        Mentionne comment il évolue : projections, appels, conservation, pressing, largeur, implication défensive…  
+        Base-toi uniquement sur les statistiques fournies.
+
+        2. **Qualités principales** :  
+        Regroupe par catégories :
+        - **Physique** : volume de jeu, duels gagnés, présence, mobilité…
+        - **Technique** : types de passes, créativité, conduite, finition, dribbles…
+        - **Mental/tactique** : implication, pressing, discipline, concentration…
+
+        3. **Axes d'amélioration** :  
+        Exprime de manière neutre les domaines où il est moins à l’aise ou peut progresser.  
+        Utilise des tournures comme “gagnerait à améliorer…”, “peut encore progresser sur…”, “montre quelques limites dans…”
+
+        4. **Profil-type** :  
+        Termine toujours par une ligne :  
+        **Profil-type :** suivi d’une expression courte (3 à 6 mots) qui résume son profil.  
+        (ex : “Milieu défensif intense”, “Défenseur axial sobre et solide”, “Ailier percutant et créatif”)
+
+        ---
+
+        ### ⚠️ Contraintes essentielles :
+
+        - **Ne fais aucune déduction** à partir de données absentes (taille, puissance, nationalité, âge, etc.)
+        - **N'invente jamais** une information
+        - Ne donne aucun chiffre, pourcentage ou ratio
+        - Texte fluide, sans bullet points, environ 6 à 8 phrases
+        - Ne mentionne jamais le nom, le club, la ligue ou la nationalité du joueur
+
+        ---
+        
+        IMPORTANT :
+        - Ne déduis ni n’invente aucune donnée.
+        - Si une information n’est pas présente dans les statistiques (comme la taille, la vitesse, la puissance, etc.), **n’en parle pas**.
+        - Reste strictement fidèle aux données fournies.
+
+        Voici les données du joueur :
+        {stats}
+
+        Résumé:
+        """
+
+
+def player_key(player: str, team: str) -> str:
+    """Clé d'un joueur dans player_summaries.json"""
+    return f"{player} ({team})"
+
+
+def build_summary_prompt(stats: dict) -> str:
+    """Construit le prompt de résumé à partir des statistiques d'un joueur"""
+    # Arrondi : les stats float32 ne doivent pas apparaître comme 0.30000001192092896
+    stats_text = "\n".join([f"{k}: {round(v, 3) if isinstance(v, float) else v}" for k, v in stats.items()
+                            if k not in EXCLUDE_COLUMNS and k != 'index' and v != 0])
+    return SUMMARY_PROMPT.format(stats=stats_text)
+
+
+def build_chat_request(prompt: str, model: str) -> dict:
+    """Paramètres de l'appel chat.completions pour un prompt de résumé"""
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 500,
+    }
+
+
+def estimate_tokens(request: dict) -> int:
+    """Estimation grossière (≈ 3 caractères par token en français) + tokens de sortie"""
+    chars = sum(len(m["content"]) for m in request["messages"])
+    return chars // 3 + request.get("max_tokens", 0)
+
+
+class TokenBucket:
+    """Seau à jetons asynchrone rechargé en continu (débit par minute, rafale de 10 s)"""
+
+    BURST_SECONDS = 10.0
+
+    def __init__(self, per_minute: float):
+        self.rate = float(per_minute) / 60.0
+        self.capacity = max(1.0, self.rate * self.BURST_SECONDS)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Attend que `amount` jetons soient disponibles puis les consomme"""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def debit(self, amount: float):
+        """Ajuste le solde a posteriori (peut devenir négatif)"""
+        self._refill()
+        self.tokens -= amount
+
+    def drain(self):
+        """Vide le seau (plus de rafale possible)"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class AdaptiveRateLimiter:
+    """
+    Limiteur RPM/TPM qui réduit son débit sur 429 et le rétablit progressivement
+
+    Décroissance multiplicative à chaque 429, remontée additive à chaque succès.
+    """
+
+    MIN_FACTOR = 0.1
+
+    def __init__(self, rpm: int, tpm: int):
+        self.max_rpm = rpm
+        self.max_tpm = tpm
+        self.factor = 1.0
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.paused_until = 0.0
+
+    def _apply_factor(self):
+        for bucket, maximum in ((self.requests, self.max_rpm), (self.tokens, self.max_tpm)):
+            bucket.rate = maximum * self.factor / 60.0
+
+    async def acquire(self, tokens: int):
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
+
+    def on_success(self, estimated_tokens: int, used_tokens: int | None):
+        if used_tokens is not None:
+            self.tokens.debit(used_tokens - estimated_tokens)
+        if self.factor < 1.0:
+            self.factor = min(1.0, self.factor + 0.05)
+            self._apply_factor()
+
+    def on_rate_limited(self, retry_after: float | None):
+        self.factor = max(self.MIN_FACTOR, self.factor / 2)
+        self._apply_factor()
+        self.requests.drain()
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+
+@dataclass
+class GenerationStats:
+    """Compteurs d'une exécution de génération"""
+    completed: int = 0
+    failed: int = 0
+    rate_limited: int = 0
+    retries: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class AsyncSummaryGenerator:
+    """Moteur de génération concurrente des résumés"""
+
+    RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, InternalServerError)
+
+    def __init__(self, client: AsyncOpenAI, model: str, max_concurrency: int = 16,
+                 rpm: int = 500, tpm: int = 200_000, max_retries: int = 6):
+        """
+        Args:
+            client: Client OpenAI asynchrone (base_url configurable pour un serveur de test)
+            model: Modèle de chat à utiliser
+            max_concurrency: Nombre maximal de requêtes en vol
+            rpm: Limite de requêtes par minute
+            tpm: Limite de tokens par minute
+            max_retries: Nombre de tentatives supplémentaires par joueur
+        """
+        self.client = client
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.limiter = AdaptiveRateLimiter(rpm, tpm)
+        self.stats = GenerationStats()
+
+    @staticmethod
+    def _backoff(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+        """Attente exponentielle avec jitter complet"""
+        return random.uniform(0, min(cap, base * 2 ** attempt))
+
+    @staticmethod
+    def _retry_after(error: RateLimitError) -> float | None:
+        try:
+            return float(error.response.headers.get("retry-after"))
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+    async def generate(self, prompt: str) -> str:
+        """Génère un résumé, avec reprises sur limite de débit et erreurs transitoires"""
+        request = build_chat_request(prompt, self.model)
+        estimated = estimate_tokens(request)
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(estimated)
+            try:
+                response = await self.client.chat.completions.create(**request)
+            except RateLimitError as e:
+                self.stats.rate_limited += 1
+                retry_after = self._retry_after(e)
+                self.limiter.on_rate_limited(retry_after)
+                if attempt == self.max_retries:
+                    raise
+                self.stats.retries += 1
+                await asyncio.sleep(max(retry_after or 0.0, self._backoff(attempt)))
+                continue
+            except self.RETRYABLE_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+                self.stats.retries += 1
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self.stats.prompt_tokens += usage.prompt_tokens or 0
+                self.stats.completion_tokens += usage.completion_tokens or 0
+            self.limiter.on_success(estimated, usage.total_tokens if usage is not None else None)
+            return response.choices[0].message.content.strip()
+
+    async def generate_all(self, prompts: dict, on_result=None) -> dict:
+        """
+        Génère tous les résumés avec une concurrence bornée
+
+        Args:
+            prompts: {clé joueur: prompt}
+            on_result: Callback optionnel appelé avec (clé, résumé) à chaque succès
+
+        Returns:
+            {clé joueur: résumé} pour les générations réussies
+        """
+        results = {}
+        queue = asyncio.Queue()
+        for item in prompts.items():
+            queue.put_nowait(item)
+
+        async def worker():
+            while True:
+                try:
+                    key, prompt = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    summary = await self.generate(prompt)
+                except Exception as e:
+                    self.stats.failed += 1
+                    print(f"⚠️ Erreur pour {key}: {e}")
+                    continue
+                results[key] = summary
+                self.stats.completed += 1
+                if on_result is not None:
+                    on_result(key, summary)
+
+        workers = min(self.max_concurrency, len(prompts)) or 1
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        return results
+
+    def run(self, prompts: dict, on_result=None) -> dict:
+        """Point d'entrée synchrone de `generate_all`"""
+        return asyncio.run(self.generate_all(prompts, on_result=on_result))
+
+    async def generate_chunks(self, next_chunk, on_result=None, on_failure=None) -> dict:
+        """
+        Génère des lots successifs jusqu'à épuisement (ex: lots réservés dans un journal partagé)
+
+        Args:
+            next_chunk: Fonction renvoyant le prochain lot {clé: prompt} (vide pour arrêter)
+            on_result: Callback (clé, résumé) à chaque succès
+            on_failure: Callback recevant la liste des clés en échec d'un lot
+        """
+        results = {}
+        while True:
+            chunk = next_chunk()
+            if not chunk:
+                return results
+            done = await self.generate_all(chunk, on_result=on_result)
+            results.update(done)
+            if on_failure is not None:
+                on_failure([key for key in chunk if key not in done])
+
+    def run_chunks(self, next_chunk, on_result=None, on_failure=None) -> dict:
+        """Point d'entrée synchrone de `generate_chunks`"""
+        return asyncio.run(self.generate_chunks(next_chunk, on_result=on_result, on_failure=on_failure))
@@ -0,0 +1,194 @@
+"""
+Journal SQLite des résumés générés
+Chaque résumé est écrit dès sa génération : reprise après crash et partage du travail
+entre plusieurs processus de génération
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+from pathlib import Path
+
+
+class SummaryJournal:
+    """
+    Journal persistant des résumés (mode WAL)
+
+    - `record` écrit un résumé dès qu'il est généré (fsync selon `sync`)
+    - `claim` réserve des joueurs pour un processus (bail expirant) afin
+      que plusieurs générateurs ne produisent pas deux fois le même résumé
+    - `compact` matérialise le journal dans player_summaries.json
+    """
+
+    SYNC_MODES = {"full": "FULL", "normal": "NORMAL", "off": "OFF"}
+
+    def __init__(self, path: Path, sync: str = "full", lease_seconds: int = 900, owner: str | None = None):
+        """
+        Args:
+            path: Fichier SQLite du journal
+            sync: Politique fsync ("full" = à chaque écriture, "normal" = aux checkpoints WAL)
+            lease_seconds: Durée d'une réservation avant qu'un autre processus puisse la reprendre
+            owner: Identifiant du processus (généré si absent)
+        """
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.owner = owner or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={self.SYNC_MODES.get(sync, 'FULL')}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, summary TEXT NOT NULL, owner TEXT, created_at REAL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS claims ("
+            "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(summaries)")}
+        if "fingerprint" not in columns:
+            self.conn.execute("ALTER TABLE summaries ADD COLUMN fingerprint_hash TEXT")
+            self.conn.execute("ALTER TABLE summaries ADD COLUMN fingerprint TEXT")
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def completed(self) -> dict:
+        """Résumés présents dans le journal"""
+        return dict(self.conn.execute("SELECT key, summary FROM summaries"))
+
+    def fingerprints(self) -> dict:
+        """Empreintes des statistiques ayant servi à générer chaque résumé journalisé"""
+        return {
+            key: json.loads(fingerprint)
+            for key, fingerprint in self.conn.execute(
+                "SELECT key, fingerprint FROM summaries WHERE fingerprint IS NOT NULL"
+            )
+        }
+
+    def record(self, key: str, summary: str, fingerprint: dict | None = None):
+        """Enregistre un résumé (et l'empreinte des stats utilisées) puis libère sa réservation"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, owner, created_at, fingerprint_hash, fingerprint) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, summary, self.owner, time.time(),
+                 fingerprint["hash"] if fingerprint else None,
+                 json.dumps(fingerprint) if fingerprint else None)
+            )
+            self.conn.execute("DELETE FROM claims WHERE key = ?", (key,))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def claim(self, keys: list[str], limit: int, lease_seconds: int | None = None,
+              fingerprints: dict | None = None, newer_than: float | None = None) -> list[str]:
+        """
+        Réserve jusqu'à `limit` joueurs parmi `keys` qui ne sont ni journalisés
+        ni réservés par un autre processus
+
+        Args:
+            fingerprints: Empreintes attendues {clé: empreinte} ; un résumé journalisé
+                avec une autre empreinte est considéré comme à régénérer
+            newer_than: Si fourni, seuls les résumés journalisés après cet instant comptent
+                comme faits (régénération complète)
+
+        Returns:
+            Les clés réservées par ce processus
+        """
+        now = time.time()
+        lease = lease_seconds or self.lease_seconds
+        fingerprints = fingerprints or {}
+        claimed = []
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            done = {
+                key for key, fingerprint_hash, created_at in self.conn.execute(
+                    "SELECT key, fingerprint_hash, created_at FROM summaries"
+                )
+                if (key not in fingerprints or fingerprints[key]["hash"] == fingerprint_hash)
+                and (newer_than is None or (created_at or 0) >= newer_than)
+            }
+            taken = {
+                row[0] for row in self.conn.execute(
+                    "SELECT key FROM claims WHERE owner != ? AND expires_at > ?", (self.owner, now)
+                )
+            }
+            for key in keys:
+                if key in done or key in taken:
+                    continue
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO claims (key, owner, expires_at) VALUES (?, ?, ?)",
+                    (key, self.owner, now + lease)
+                )
+                claimed.append(key)
+                if len(claimed) >= limit:
+                    break
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def release(self, keys: list[str], any_owner: bool = False):
+        """
+        Libère des réservations (échecs de génération)
+
+        Args:
+            keys: Clés à libérer
+            any_owner: Libère aussi les réservations d'un autre processus (ex: lot repris après redémarrage)
+        """
+        if any_owner:
+            self.conn.executemany("DELETE FROM claims WHERE key = ?", [(key,) for key in keys])
+            return
+        self.conn.executemany(
+            "DELETE FROM claims WHERE key = ? AND owner = ?", [(key, self.owner) for key in keys]
+        )
+
+    def pending_claims(self) -> int:
+        """Nombre de joueurs réservés par d'autres processus encore actifs"""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM claims WHERE owner != ? AND expires_at > ?", (self.owner, time.time())
+        ).fetchone()[0]
+
+    def compact(self, json_path: Path) -> dict:
+        """
+        Fusionne le journal dans `json_path` (écriture atomique) et tronque le WAL
+
+        Le fichier JSON est relu sous le verrou d'écriture du journal : deux
+        processus qui compactent l'un après l'autre ne s'écrasent pas. Les
+        entrées restent dans le journal pour que les autres processus ne
+        réservent pas un joueur déjà généré.
+
+        Returns:
+            L'ensemble des résumés écrits
+        """
+        json_path = Path(json_path)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            base = {}
+            if json_path.exists():
+                with open(json_path, "r", encoding="utf-8") as f:
+                    base = json.load(f)
+            rows = self.conn.execute("SELECT key, summary FROM summaries").fetchall()
+            all_summaries = {**base, **dict(rows)}
+
+            tmp_path = json_path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(all_summaries, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, json_path)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return all_summaries
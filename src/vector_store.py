@@ -0,0 +1,432 @@
+"""
+Backends de stockage vectoriel
+Qdrant (serveur ou embarqué) et index local en mémoire (NumPy memory-map exact, ou FAISS)
+"""
+
+import json
+import numpy as np
+from pathlib import Path
+from dataclasses import dataclass, field
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.http.models import QueryResponse, CountResult
+from qdrant_client.models import (
+    Filter,
+    FieldCondition,
+    MatchValue,
+    MatchAny,
+    MatchExcept,
+    IsEmptyCondition,
+    IsNullCondition,
+    HasIdCondition,
+    ScoredPoint,
+    Record,
+)
+
+import config
+from qdrant_sync import point_vector
+from generations import GenerationStore
+
+FORMAT_VERSION = 1
+
+VECTOR_BACKENDS = ("qdrant", "numpy", "faiss")
+
+
+def create_qdrant_client() -> QdrantClient:
+    """Client Qdrant : embarqué (QDRANT_PATH, sans serveur) ou serveur (QDRANT_URL)"""
+    if config.Config.QDRANT_PATH:
+        return QdrantClient(path=config.Config.QDRANT_PATH)
+    return QdrantClient(url=config.Config.QDRANT_URL)
+
+
+def create_async_qdrant_client() -> AsyncQdrantClient | None:
+    """
+    Client Qdrant asynchrone (None en mode embarqué : le dossier n'accepte qu'un client,
+    les appels passent alors par le client synchrone)
+    """
+    if config.Config.QDRANT_PATH:
+        return None
+    return AsyncQdrantClient(url=config.Config.QDRANT_URL)
+
+
+# ---------------------------------------------------------------------- filtres
+
+
+class PayloadColumns:
+    """Colonnes de payload (une valeur par point) construites à la demande pour les filtres"""
+
+    def __init__(self, payloads: list[dict], ids: list[str]):
+        self.payloads = payloads
+        self.ids = ids
+        self._values = {}
+        self._numbers = {}
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def values(self, key: str) -> np.ndarray:
+        if key not in self._values:
+            column = np.empty(len(self.payloads), dtype=object)
+            column[:] = [p.get(key) for p in self.payloads]
+            self._values[key] = column
+        return self._values[key]
+
+    def numbers(self, key: str) -> np.ndarray:
+        """Valeurs numériques (NaN si absente ou non numérique)"""
+        if key not in self._numbers:
+            column = np.full(len(self.payloads), np.nan)
+            for i, value in enumerate(self.values(key)):
+                try:
+                    column[i] = float(value)
+                except (TypeError, ValueError):
+                    pass
+            self._numbers[key] = column
+        return self._numbers[key]
+
+
+def _isin(values: np.ndarray, accepted) -> np.ndarray:
+    accepted = set(accepted)
+    return np.fromiter((v in accepted for v in values), dtype=bool, count=len(values))
+
+
+def _condition_mask(condition, columns: PayloadColumns) -> np.ndarray:
+    """Masque des points vérifiant une condition Qdrant"""
+    if isinstance(condition, Filter):
+        return filter_mask(condition, columns)
+
+    if isinstance(condition, FieldCondition):
+        mask = np.ones(len(columns), dtype=bool)
+        if condition.match is not None:
+            values = columns.values(condition.key)
+            match = condition.match
+            if isinstance(match, MatchValue):
+                mask &= _isin(values, [match.value])
+            elif isinstance(match, MatchAny):
+                mask &= _isin(values, match.any)
+            elif isinstance(match, MatchExcept):
+                excluded = set(match.except_)
+                mask &= np.fromiter((v is not None and v not in excluded for v in values),
+                                    dtype=bool, count=len(values))
+            else:
+                raise NotImplementedError(f"Condition non supportée par l'index local: {match!r}")
+        if condition.range is not None:
+            numbers = columns.numbers(condition.key)
+            r = condition.range
+            with np.errstate(invalid="ignore"):
+                mask &= ~np.isnan(numbers)
+                if r.gt is not None:
+                    mask &= numbers > r.gt
+                if r.gte is not None:
+                    mask &= numbers >= r.gte
+                if r.lt is not None:
+                    mask &= numbers < r.lt
+                if r.lte is not None:
+                    mask &= numbers <= r.lte
+        return mask
+
+    if isinstance(condition, IsEmptyCondition):
+        values = columns.values(condition.is_empty.key)
+        return np.fromiter((v is None or v == [] for v in values), dtype=bool, count=len(values))
+
+    if isinstance(condition, IsNullCondition):
+        values = columns.values(condition.is_null.key)
+        return np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+
+    if isinstance(condition, HasIdCondition):
+        return _isin(np.asarray(columns.ids, dtype=object), [str(i) for i in condition.has_id])
+
+    raise NotImplementedError(f"Condition non supportée par l'index local: {condition!r}")
+
+
+def _as_list(conditions) -> list:
+    if conditions is None:
+        return []
+    return conditions if isinstance(conditions, list) else [conditions]
+
+
+def filter_mask(query_filter: Filter | None, columns: PayloadColumns) -> np.ndarray:
+    """
+    Équivalent local d'un filtre Qdrant : masque booléen des points retenus
+
+    Gère must / should / must_not, les correspondances (valeur, liste, exclusion),
+    les intervalles numériques, is_empty / is_null et has_id.
+    """
+    mask = np.ones(len(columns), dtype=bool)
+    if query_filter is None:
+        return mask
+    for condition in _as_list(query_filter.must):
+        mask &= _condition_mask(condition, columns)
+    should = _as_list(query_filter.should)
+    if should:
+        any_mask = np.zeros(len(columns), dtype=bool)
+        for condition in should:
+            any_mask |= _condition_mask(condition, columns)
+        mask &= any_mask
+    for condition in _as_list(query_filter.must_not):
+        mask &= ~_condition_mask(condition, columns)
+    return mask
+
+
+# ---------------------------------------------------------------------- index local
+
+
+@dataclass(frozen=True)
+class VectorSnapshot:
+    """
+    Génération chargée de l'index local (memory-map), en lecture seule
+
+    Les positions renvoyées par `search` renvoient à cet instantané (`ids`, `payloads`) :
+    elles sont relues sur le même instantané.
+    """
+    manifest: dict | None = None
+    ids: list = field(default_factory=list)
+    payloads: list = field(default_factory=list)
+    vectors: np.ndarray | None = None
+    columns: PayloadColumns | None = None
+    position: dict = field(default_factory=dict)
+    faiss_index: object = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query_vector, query_filter: Filter | None = None, limit: int = 10) -> list[tuple[int, float]]:
+        """[(position, similarité cosinus)] des `limit` meilleurs points vérifiant le filtre"""
+        if not self.ids or limit <= 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        if query_filter is None and self.faiss_index is not None:
+            scores, positions = self.faiss_index.search(query[None, :], limit)
+            return [(int(i), float(s)) for i, s in zip(positions[0], scores[0]) if i >= 0]
+
+        if query_filter is None:
+            candidates = None
+            scores = self.vectors @ query
+        else:
+            candidates = np.flatnonzero(filter_mask(query_filter, self.columns))
+            if candidates.size == 0:
+                return []
+            scores = self.vectors[candidates] @ query
+
+        k = min(limit, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        positions = top if candidates is None else candidates[top]
+        return [(int(i), float(scores[j])) for i, j in zip(positions, top)]
+
+    def vector(self, position: int, with_vectors):
+        if not with_vectors:
+            return None
+        vector = np.asarray(self.vectors[position], dtype=np.float32).tolist()
+        if isinstance(with_vectors, list):
+            return {name: vector for name in with_vectors}
+        return vector
+
+    def mask(self, query_filter: Filter | None) -> np.ndarray:
+        if not self.ids:
+            return np.zeros(0, dtype=bool)
+        return filter_mask(query_filter, self.columns)
+
+
+_EMPTY = VectorSnapshot()
+
+
+class LocalVectorIndex:
+    """
+    Index vectoriel local, sans serveur : matrice float32 normalisée chargée par memory-map
+
+    - recherche exacte : un seul produit matrice-vecteur (BLAS) sur les points filtrés
+    - backend "faiss" : index HNSW ou IVF construit au chargement pour les requêtes sans filtre
+      (avec filtre, la recherche exacte sur le sous-ensemble filtré reste la plus rapide)
+    - même sous-ensemble d'API que `QdrantClient` pour la recherche (`query_points`, `retrieve`,
+      `scroll`, `count`) : l'application l'utilise à la place du client
+    - générations `gen-<n>/` publiées par bascule atomique de `manifest.json` (`GenerationStore`),
+      comme l'index BM25 ; chaque appel lit un seul `VectorSnapshot`
+    """
+
+    def __init__(self, root: Path, backend: str = "numpy"):
+        """
+        Args:
+            root: Dossier de l'index (ex: data/vector_index/ragscout_players)
+            backend: "numpy" (exact) ou "faiss" (FAISS_INDEX_TYPE)
+        """
+        self.root = Path(root)
+        self.backend = backend
+        self._generations = GenerationStore(self.root, FORMAT_VERSION, self._read_generation)
+
+    # ------------------------------------------------------------------ lecture
+
+    def _read_generation(self, gen_dir: Path, manifest: dict) -> VectorSnapshot:
+        with open(gen_dir / "points.json", "r", encoding="utf-8") as f:
+            points = json.load(f)
+        vectors = np.load(gen_dir / "vectors.npy", mmap_mode="r")
+        ids = points["ids"]
+        return VectorSnapshot(
+            manifest=manifest,
+            ids=ids,
+            payloads=points["payloads"],
+            vectors=vectors,
+            columns=PayloadColumns(points["payloads"], ids),
+            position={point_id: i for i, point_id in enumerate(ids)},
+            faiss_index=self._build_faiss(vectors) if self.backend == "faiss" and len(ids) else None,
+        )
+
+    def load(self) -> bool:
+        """Charge la génération courante (memory-map). Faux si l'index n'existe pas."""
+        return self._generations.load()
+
+    def reload_if_changed(self) -> bool:
+        """Recharge l'index si une nouvelle génération a été publiée. Vrai si rechargé."""
+        return self._generations.reload_if_changed()
+
+    def snapshot(self) -> VectorSnapshot:
+        """Génération chargée (vide avant le premier chargement)"""
+        return self._generations.snapshot or _EMPTY
+
+    @property
+    def manifest(self) -> dict | None:
+        return self.snapshot().manifest
+
+    @property
+    def generation(self) -> str | None:
+        return (self.manifest or {}).get("generation")
+
+    def __len__(self) -> int:
+        return len(self.snapshot())
+
+    @staticmethod
+    def _build_faiss(vectors: np.ndarray):
+        import faiss
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        dim = vectors.shape[1]
+        if config.Config.FAISS_INDEX_TYPE == "ivf":
+            nlist = max(1, min(config.Config.FAISS_IVF_NLIST, len(vectors) // 39))
+            index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+            index.nprobe = config.Config.FAISS_IVF_NPROBE
+        elif config.Config.FAISS_INDEX_TYPE == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, config.Config.FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efSearch = config.Config.FAISS_HNSW_EF
+        else:
+            raise ValueError(f"FAISS_INDEX_TYPE inconnu: {config.Config.FAISS_INDEX_TYPE}")
+        index.add(vectors)
+        return index
+
+    # ------------------------------------------------------------------ API type QdrantClient
+
+    @staticmethod
+    def _select_payload(payload: dict, with_payload):
+        if with_payload is True:
+            return payload
+        if not with_payload:
+            return None
+        return {k: payload[k] for k in with_payload if k in payload}
+
+    def query_points(self, collection_name: str = None, query=None, using: str | None = None,
+                     limit: int = 10, query_filter: Filter | None = None, with_payload=True,
+                     with_vectors=False, **kwargs) -> QueryResponse:
+        """
+        Recherche exacte (ou FAISS) ; `prefetch` et `search_params` sont ignorés :
+        l'index local garde uniquement le vecteur complet
+        """
+        snapshot = self.snapshot()
+        hits = snapshot.search(query, query_filter, limit)
+        return QueryResponse(points=[
+            ScoredPoint(
+                id=snapshot.ids[i],
+                version=0,
+                score=score,
+                payload=self._select_payload(snapshot.payloads[i], with_payload),
+                vector=snapshot.vector(i, with_vectors)
+            )
+            for i, score in hits
+        ])
+
+    def retrieve(self, collection_name: str = None, ids: list = (), with_payload=True,
+                 with_vectors=False, **kwargs) -> list:
+        snapshot = self.snapshot()
+        records = []
+        for point_id in ids:
+            i = snapshot.position.get(str(point_id))
+            if i is None:
+                continue
+            records.append(Record(
+                id=snapshot.ids[i],
+                payload=self._select_payload(snapshot.payloads[i], with_payload),
+                vector=snapshot.vector(i, with_vectors)
+            ))
+        return records
+
+    def scroll(self, collection_name: str = None, scroll_filter: Filter | None = None, limit: int = 10,
+               offset=None, with_payload=True, with_vectors=False, **kwargs) -> tuple[list, int | None]:
+        snapshot = self.snapshot()
+        positions = np.flatnonzero(snapshot.mask(scroll_filter))
+        start = int(offset or 0)
+        page = positions[positions >= start][:limit]
+        records = [
+            Record(
+                id=snapshot.ids[i],
+                payload=self._select_payload(snapshot.payloads[i], with_payload),
+                vector=snapshot.vector(i, with_vectors)
+            )
+            for i in page
+        ]
+        remaining = positions[positions > page[-1]] if len(page) else []
+        return records, (int(remaining[0]) if len(remaining) else None)
+
+    def count(self, collection_name: str = None, count_filter: Filter | None = None, exact: bool = True,
+              **kwargs) -> CountResult:
+        return CountResult(count=int(self.snapshot().mask(count_filter).sum()))
+
+    # ------------------------------------------------------------------ écriture
+
+    def write(self, ids: list[str], vectors: np.ndarray, payloads: list[dict]):
+        """Publie une nouvelle génération (vecteurs normalisés en float32)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(ids):
+            vectors = np.zeros((0, 0), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1.0)
+
+        def write(gen_dir: Path):
+            np.save(gen_dir / "vectors.npy", vectors)
+            with open(gen_dir / "points.json", "w", encoding="utf-8") as f:
+                json.dump({"ids": [str(i) for i in ids], "payloads": payloads}, f, ensure_ascii=False, default=str)
+
+        self._generations.publish(write, points=len(ids), dim=int(vectors.shape[1]) if len(ids) else 0)
+
+
+def fetch_points(client: QdrantClient, collection_name: str, vector_name: str | None = None,
+                 batch_size: int = 256) -> tuple[list[str], np.ndarray | None, list[dict]]:
+    """Identifiants, vecteurs complets (float32) et payloads de tous les points d'une collection"""
+    ids, vectors, payloads = [], [], []
+    next_page = None
+    while True:
+        points, next_page = client.scroll(
+            collection_name=collection_name,
+            with_payload=True,
+            with_vectors=[vector_name] if vector_name else True,
+            limit=batch_size,
+            offset=next_page
+        )
+        for point in points:
+            ids.append(str(point.id))
+            vectors.append(np.asarray(point_vector(point, vector_name), dtype=np.float32))
+            payloads.append(point.payload or {})
+        if not next_page:
+            break
+    return ids, (np.stack(vectors) if vectors else None), payloads
+
+
+def export_collection(client: QdrantClient, collection_name: str, index: LocalVectorIndex,
+                      vector_name: str | None = None, batch_size: int = 256) -> int:
+    """
+    Copie les vecteurs complets et les payloads d'une collection Qdrant dans l'index local
+
+    Returns:
+        Nombre de points exportés
+    """
+    ids, vectors, payloads = fetch_points(client, collection_name, vector_name, batch_size)
+    index.write(ids, vectors, payloads)
+    return len(ids)
@@ -0,0 +1,8 @@
+"""
+Configuration pytest : les modules de src/ s'importent à plat (`import config`, `from bm25_index import ...`)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
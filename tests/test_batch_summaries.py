@@ -0,0 +1,95 @@
+"""
+Cycle soumission -> suivi -> ingestion de l'API Batch contre le serveur OpenAI factice
+"""
+
+import json
+import threading
+
+import pytest
+from openai import OpenAI
+
+from batch_summaries import BatchSummaryRunner, custom_id_for
+from fake_openai_server import FAKE_SUMMARY, make_server
+from summary_journal import SummaryJournal
+
+KEYS = [f"Joueur {i} (Club)" for i in range(10)] + ['N\'Golo "Kanté" (Chelsea/Londres)']
+
+
+@pytest.fixture
+def fake_openai():
+    """Démarre un serveur factice sur un port libre : appeler avec ses options (erreurs, délai du lot)"""
+    servers = []
+
+    def start(**options):
+        server = make_server(port=0, latency=0.0, **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_runner(server, work_dir) -> BatchSummaryRunner:
+    client = OpenAI(api_key="test", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1", max_retries=0)
+    return BatchSummaryRunner(client, model="fake", work_dir=work_dir, poll_interval=0.05)
+
+
+def prompts() -> dict:
+    return {key: f"Statistiques de {key}" for key in KEYS}
+
+
+def test_requests_map_custom_ids_to_journal_keys(fake_openai, tmp_path):
+    runner = make_runner(fake_openai(), tmp_path / "batch")
+    requests_path, mapping = runner.write_requests(prompts())
+
+    with open(requests_path, "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["custom_id"] for line in lines] == [custom_id_for(key) for key in KEYS]
+    assert mapping == {custom_id_for(key): key for key in KEYS}
+    assert lines[-1]["body"]["messages"][-1]["content"] == prompts()[KEYS[-1]]
+
+
+def test_run_ingests_results_and_releases_failures(fake_openai, tmp_path):
+    server = fake_openai(error_rate=0.3, seed=1, batch_delay=0.1)
+    runner = make_runner(server, tmp_path / "batch")
+    journal = SummaryJournal(tmp_path / "journal.sqlite", sync="off", owner="pipeline")
+
+    # Même enchaînement que le pipeline : réservation du lot, journalisation, libération des échecs
+    assert journal.claim(KEYS, limit=len(KEYS), lease_seconds=86400) == KEYS
+    ingested, failed = runner.run(prompts(), journal.record, wait=True)
+    journal.release(failed, any_owner=True)
+
+    assert failed
+    assert ingested + len(failed) == len(KEYS)
+    assert journal.completed() == {key: FAKE_SUMMARY for key in KEYS if key not in failed}
+    assert runner.usage["prompt_tokens"] > 0
+    assert runner.load_state() is None
+
+    other = SummaryJournal(tmp_path / "journal.sqlite", sync="off", owner="autre")
+    assert other.pending_claims() == 0
+    assert sorted(other.claim(KEYS, limit=len(KEYS))) == sorted(failed)
+    other.close()
+    journal.close()
+
+
+def test_run_resumes_from_saved_state(fake_openai, tmp_path):
+    server = fake_openai(batch_delay=0.3)
+    work_dir = tmp_path / "batch"
+
+    # Première exécution : soumission sans attendre (BATCH_WAIT=False), le processus s'arrête
+    assert make_runner(server, work_dir).run(prompts(), on_result=None, wait=False) is None
+    with open(work_dir / "batch_state.json", "r", encoding="utf-8") as f:
+        state = json.load(f)
+    assert set(state["mapping"].values()) == set(KEYS)
+
+    # Exécution suivante : nouveau runner, reprise du même lot sans nouvelle soumission
+    results = {}
+    ingested, failed = make_runner(server, work_dir).run({}, results.__setitem__, wait=True)
+
+    assert (ingested, failed) == (len(KEYS), [])
+    assert results == {key: FAKE_SUMMARY for key in KEYS}
+    assert server.RequestHandlerClass.state.counters["batches"] == 1
+    assert not (work_dir / "batch_state.json").exists()
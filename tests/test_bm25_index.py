@@ -0,0 +1,112 @@
+"""
+Index BM25 : mises à jour incrémentales (`sync`) face à une reconstruction complète et à rank_bm25
+"""
+
+import numpy as np
+import pytest
+
+from bm25_index import BM25Index, document_text, tokenize
+
+QUERIES = [
+    "milieu récupérateur",
+    "ailier rapide dribbleur gauche",
+    "attaquant attaquant buteur",
+    "défenseur central jeu aérien",
+    "gardien",
+    "terme absent du corpus",
+]
+
+CORPUS = {
+    "p1": "Profil-type : milieu récupérateur. Milieu défensif solide, récupérateur de ballons.",
+    "p2": "Profil-type : ailier dribbleur. Ailier gauche rapide, dribbleur et centreur.",
+    "p3": "Profil-type : attaquant de surface. Attaquant buteur, efficace dans la surface.",
+    "p4": "Profil-type : défenseur aérien. Défenseur central dominant dans le jeu aérien.",
+    "p5": "Profil-type : meneur de jeu. Milieu offensif créatif, passeur décisif.",
+    "p6": "Profil-type : latéral offensif. Latéral gauche rapide, centreur régulier.",
+}
+
+
+def build(root, documents: dict) -> BM25Index:
+    index = BM25Index(root)
+    index.sync(documents)
+    return index
+
+
+def assert_same_scores(index: BM25Index, reference: BM25Index):
+    assert sorted(index.doc_ids) == sorted(reference.doc_ids)
+    ids = reference.doc_ids
+    for query in QUERIES:
+        np.testing.assert_allclose(
+            index.scores_for(query, ids), reference.scores_for(query, ids), rtol=1e-5, atol=1e-6
+        )
+
+
+def test_sync_stats(tmp_path):
+    index = BM25Index(tmp_path / "bm25")
+    assert index.sync(CORPUS) == {"added": 6, "updated": 0, "deleted": 0, "unchanged": 0}
+
+    documents = dict(CORPUS)
+    documents["p2"] = "Ailier droit percutant."
+    del documents["p3"]
+    documents["p7"] = "Gardien de but, bon jeu au pied."
+    assert index.sync(documents) == {"added": 1, "updated": 1, "deleted": 1, "unchanged": 4}
+    assert index.sync(documents) == {"added": 0, "updated": 0, "deleted": 0, "unchanged": 6}
+    assert len(index) == 6
+    assert index.manifest["generation"] == "gen-2"  # sync sans changement : pas de nouvelle génération
+
+
+def test_incremental_sync_matches_full_rebuild(tmp_path):
+    index = build(tmp_path / "incremental", CORPUS)
+
+    documents = dict(CORPUS)
+    documents["p2"] = "Profil-type : ailier percutant. Ailier droit percutant, dribbleur."
+    documents["p7"] = "Profil-type : gardien. Gardien de but, bon jeu au pied."
+    index.sync(documents)
+    del documents["p1"], documents["p5"]
+    documents["p8"] = "Profil-type : milieu récupérateur. Récupérateur infatigable."
+    index.sync(documents)
+
+    assert_same_scores(index, build(tmp_path / "full", documents))
+
+
+def test_matches_rank_bm25(tmp_path):
+    rank_bm25 = pytest.importorskip("rank_bm25")
+    documents = {doc_id: document_text(text) for doc_id, text in CORPUS.items()}
+    index = build(tmp_path / "bm25", documents)
+
+    ids = index.doc_ids
+    okapi = rank_bm25.BM25Okapi([tokenize(documents[doc_id]) for doc_id in ids], k1=1.5, b=0.75, epsilon=0.25)
+    for query in QUERIES:
+        np.testing.assert_allclose(index.scores(query), okapi.get_scores(tokenize(query)), rtol=1e-5, atol=1e-6)
+
+
+def test_search_and_unknown_documents(tmp_path):
+    index = build(tmp_path / "bm25", CORPUS)
+
+    hits = index.search("ailier dribbleur", top_k=3)
+    assert hits[0][0] == "p2"
+    assert all(score > 0 for _, score in hits)
+    assert index.search("terme absent", top_k=3) == []
+    assert index.scores_for("ailier", ["p2", "inconnu"])[1] == 0.0
+
+
+def test_new_generation_is_picked_up_by_readers(tmp_path):
+    root = tmp_path / "bm25"
+    writer = build(root, CORPUS)
+    reader = BM25Index(root)
+    assert reader.load()
+    before = reader.snapshot()
+
+    documents = dict(CORPUS)
+    documents["p7"] = "Gardien de but, bon jeu au pied."
+    writer.sync(documents)
+    writer.sync({doc_id: text for doc_id, text in documents.items() if doc_id != "p1"})
+
+    # L'instantané déjà lu reste cohérent avec ses propres scores
+    assert len(before.scores("gardien")) == len(before.doc_ids) == 6
+    assert reader.reload_if_changed()
+    assert not reader.reload_if_changed()
+    assert reader.manifest["generation"] == "gen-3"
+    assert reader.search("gardien", top_k=1)[0][0] == "p7"
+    # Générations conservées : la courante et la précédente
+    assert sorted(p.name for p in root.glob("gen-*")) == ["gen-2", "gen-3"]
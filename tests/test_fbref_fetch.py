@@ -0,0 +1,164 @@
+"""
+Récupération FBref hors ligne : tables enregistrées servies par un lecteur factice (`reader_factory`)
+"""
+
+import os
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fbref_fetch import FBREF_HOST, FBrefFetcher, HostLimiter, TableCache, flatten_stat_table
+
+LEAGUE = "ENG-Premier League"
+SEASON = "2425"
+
+# Tables au format soccerdata : index (league, season, team, player), colonnes MultiIndex
+PLAYERS = {
+    "standard": [("Arsenal", "Bukayo Saka"), ("Arsenal", "Declan Rice"), ("Chelsea", "Cole Palmer")],
+    "shooting": [("Chelsea", "Cole Palmer"), ("Arsenal", "Bukayo Saka")],  # ordre différent, un joueur absent
+    "passing": [("Arsenal", "Declan Rice"), ("Chelsea", "Cole Palmer"), ("Arsenal", "Bukayo Saka"),
+                ("Liverpool", "Joueur hors standard")],
+}
+COLUMNS = {
+    "standard": [("nation", ""), ("Playing Time", "Min"), ("Per 90 Minutes", "Gls")],
+    "shooting": [("nation", ""), ("Standard", "Sh/90")],
+    "passing": [("nation", ""), ("Total", "Cmp%")],
+}
+
+
+def saved_table(stat: str, league: str = LEAGUE, season: str = SEASON) -> pd.DataFrame:
+    """Table enregistrée d'un type de stat : valeurs dérivées du joueur pour vérifier l'alignement"""
+    players = PLAYERS[stat]
+    index = pd.MultiIndex.from_tuples(
+        [(league, season, team, player) for team, player in players], names=["league", "season", "team", "player"]
+    )
+    data = {
+        column: ["ENG"] * len(players) if column == ("nation", "")
+        else [float(len(player)) + i for _, player in players]
+        for i, column in enumerate(COLUMNS[stat])
+    }
+    return pd.DataFrame(data, index=index, columns=pd.MultiIndex.from_tuples(COLUMNS[stat]))
+
+
+class FakeReader:
+    """Lecteur hors ligne : même interface que `soccerdata.FBref`"""
+
+    calls = []
+
+    def __init__(self, league: str, season: str):
+        self.league, self.season = league, season
+
+    def read_player_season_stats(self, stat_type: str) -> pd.DataFrame:
+        FakeReader.calls.append((self.league, self.season, stat_type))
+        return saved_table(stat_type, self.league, self.season)
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    FakeReader.calls = []
+    return FBrefFetcher(tmp_path / "fbref", ttl_hours=24, max_workers=4, per_host_limit=2,
+                        min_interval=0.0, reader_factory=FakeReader)
+
+
+def test_flatten_stat_table():
+    table = flatten_stat_table(saved_table("standard"), "standard")
+    assert list(table.columns) == ["nation__standard", "Playing Time_Min_standard", "Per 90 Minutes_Gls_standard"]
+    assert table.index.names == ["league", "season", "team", "player"]
+    assert table.loc[(LEAGUE, SEASON, "Chelsea", "Cole Palmer"), "Playing Time_Min_standard"] == len("Cole Palmer") + 1
+
+
+def test_flatten_stat_table_with_ids_as_columns_and_duplicates():
+    # Table à colonnes simples, identifiants en colonnes et un joueur listé deux fois
+    raw = pd.DataFrame({
+        "league": [LEAGUE] * 3,
+        "season": [SEASON] * 3,
+        "team": ["Chelsea", "Arsenal", "Chelsea"],
+        "player": ["Cole Palmer", "Bukayo Saka", "Cole Palmer"],
+        "Sh/90": [3.1, 2.4, 9.9],
+    })
+    table = flatten_stat_table(raw, "shooting")
+    assert table.index.names == ["league", "season", "team", "player"]
+    assert table["Sh/90_shooting"].tolist() == [3.1, 2.4]
+
+
+def test_table_cache_ttl(tmp_path):
+    cache = TableCache(tmp_path, ttl_hours=1)
+    table = flatten_stat_table(saved_table("standard"), "standard")
+    assert cache.get(LEAGUE, SEASON, "standard") is None
+
+    cache.put(LEAGUE, SEASON, "standard", table)
+    pd.testing.assert_frame_equal(cache.get(LEAGUE, SEASON, "standard"), table)
+
+    path = cache._path(LEAGUE, SEASON, "standard")
+    two_hours_ago = time.time() - 7200
+    os.utime(path, (two_hours_ago, two_hours_ago))
+    assert cache.get(LEAGUE, SEASON, "standard") is None
+    # TTL nul : jamais expiré
+    assert TableCache(tmp_path, ttl_hours=0).get(LEAGUE, SEASON, "standard") is not None
+
+
+def test_host_limiter_bounds_concurrency_per_host():
+    limiter = HostLimiter(max_concurrent=2, min_interval=0.0)
+    active, peak = {}, {}
+    lock = threading.Lock()
+
+    def request(host):
+        limiter.acquire(host)
+        try:
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), active[host])
+            time.sleep(0.05)
+            with lock:
+                active[host] -= 1
+        finally:
+            limiter.release(host)
+
+    threads = [threading.Thread(target=request, args=(host,)) for host in ("fbref.com", "autre.org") for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    # Deux requêtes simultanées au plus par hôte, les hôtes ne se bloquent pas entre eux
+    assert peak == {"fbref.com": 2, "autre.org": 2}
+
+
+def test_host_limiter_spaces_request_starts():
+    limiter = HostLimiter(max_concurrent=4, min_interval=0.05)
+    starts = []
+    for _ in range(3):
+        limiter.acquire(FBREF_HOST)
+        starts.append(time.monotonic())
+        limiter.release(FBREF_HOST)
+    assert all(b - a >= 0.045 for a, b in zip(starts, starts[1:]))
+
+
+def test_fetch_partitions_aligns_tables_on_index(fetcher):
+    stat_types = ["standard", "shooting", "passing"]
+    partitions = fetcher.fetch_partitions([(LEAGUE, SEASON), ("ESP-La Liga", SEASON)], stat_types)
+
+    assert set(partitions) == {(LEAGUE, SEASON), ("ESP-La Liga", SEASON)}
+    df = partitions[(LEAGUE, SEASON)].set_index(["team", "player"])
+    # Joueurs de la table standard uniquement, dans son ordre
+    assert list(df.index) == PLAYERS["standard"]
+    # Valeurs alignées par joueur (et non par position de ligne)
+    for team, player in PLAYERS["standard"]:
+        assert df.loc[(team, player), "Playing Time_Min_standard"] == len(player) + 1
+        assert df.loc[(team, player), "Total_Cmp%_passing"] == len(player) + 1
+    assert df.loc[("Chelsea", "Cole Palmer"), "Standard_Sh/90_shooting"] == len("Cole Palmer") + 1
+    assert np.isnan(df.loc[("Arsenal", "Declan Rice"), "Standard_Sh/90_shooting"])
+    assert {"nation__standard", "nation__shooting", "nation__passing"} <= set(df.columns)
+    assert fetcher.stats == {"cache_hits": 0, "fetched": 6}
+
+
+def test_fetch_partitions_reuses_cached_tables(fetcher):
+    fetcher.fetch_partitions([(LEAGUE, SEASON)], ["standard", "passing"])
+    calls = len(FakeReader.calls)
+    again = fetcher.fetch_partitions([(LEAGUE, SEASON)], ["standard", "passing"])
+
+    assert len(FakeReader.calls) == calls == 2
+    assert fetcher.stats == {"cache_hits": 2, "fetched": 2}
+    assert len(again[(LEAGUE, SEASON)]) == len(PLAYERS["standard"])
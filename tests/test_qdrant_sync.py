@@ -0,0 +1,20 @@
+"""
+Synchronisation Qdrant : identifiants de points stables et propres à chaque partition
+"""
+
+from partitions import Partition
+from qdrant_sync import player_point_id
+
+
+def test_point_id_is_stable():
+    assert player_point_id("Joueur", "Club", "2425") == player_point_id("Joueur", "Club", 2425)
+
+
+def test_overlapping_partitions_get_distinct_points():
+    big5 = Partition("2425", "Big 5 European Leagues Combined")
+    premier_league = Partition("2425", "ENG-Premier League")
+    ids = {player_point_id("Joueur", "Club", "2425", partition.id) for partition in (big5, premier_league)}
+    assert len(ids) == 2
+    # Partition historique : identifiants d'avant les partitions
+    assert player_point_id("Joueur", "Club", "2425") not in ids
+
@@ -0,0 +1,206 @@
+"""
+Cache de la recherche : LRU, expiration et coalescence des calculs (synchrones et asynchrones)
+"""
+
+import time
+import asyncio
+import threading
+
+import pytest
+
+import search_cache
+from search_cache import TTLCache, normalize_query
+
+
+def wait_until(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition non atteinte"
+        time.sleep(0.001)
+
+
+class Counter:
+    """Fonction de calcul qui compte ses appels"""
+
+    def __init__(self, value="valeur"):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_normalize_query():
+    assert normalize_query("  Milieu   DÉFENSIF\tU21 ") == "milieu défensif u21"
+    assert normalize_query("Mu\u0308ller") == normalize_query("M\u00fcller")  # forme décomposée -> NFC
+    assert normalize_query(None) == ""
+
+
+def test_hit_after_miss():
+    cache = TTLCache("test")
+    compute = Counter()
+    assert cache.get_or_compute("q", compute) == "valeur"
+    assert cache.get_or_compute("q", compute) == "valeur"
+    assert compute.calls == 1
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_lru_eviction():
+    cache = TTLCache("test", maxsize=2)
+    for key in ("a", "b"):
+        cache.get_or_compute(key, Counter(key))
+    cache.get_or_compute("a", Counter())  # "a" devient la plus récente
+    cache.get_or_compute("c", Counter("c"))
+
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+    recompute = Counter("b")
+    cache.get_or_compute("b", recompute)
+    assert recompute.calls == 1
+    kept = Counter()
+    cache.get_or_compute("c", kept)
+    assert kept.calls == 0
+
+
+def test_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(search_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache("test", ttl=10)
+    compute = Counter()
+
+    cache.get_or_compute("q", compute)
+    now[0] += 9
+    cache.get_or_compute("q", compute)
+    assert compute.calls == 1
+
+    now[0] += 2
+    cache.get_or_compute("q", compute)
+    assert compute.calls == 2
+    assert cache.stats()["expired"] == 1
+
+
+def test_maxsize_zero_disables_storage():
+    cache = TTLCache("test", maxsize=0)
+    compute = Counter()
+    cache.get_or_compute("q", compute)
+    cache.get_or_compute("q", compute)
+    assert compute.calls == 2
+    assert len(cache) == 0
+
+
+def test_errors_are_not_cached():
+    cache = TTLCache("test")
+
+    def fail():
+        raise RuntimeError("panne")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("q", fail)
+    assert cache.get_or_compute("q", Counter()) == "valeur"
+    assert cache.stats()["errors"] == 1
+
+
+def test_concurrent_calls_are_coalesced():
+    cache = TTLCache("test")
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "valeur"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("q", slow))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: cache.stats()["coalesced"] == 7)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["valeur"] * 8
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"]) == (1, 7)
+
+
+def test_error_reaches_coalesced_callers():
+    cache = TTLCache("test")
+    release = threading.Event()
+
+    def slow_failure():
+        release.wait(5)
+        raise RuntimeError("panne")
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_compute("q", slow_failure)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: cache.stats()["coalesced"] == 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == ["panne"] * 4
+    assert len(cache) == 0
+
+
+def test_async_calls_are_coalesced():
+    cache = TTLCache("test")
+    calls = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def compute():
+            calls.append(1)
+            await release.wait()
+            return "valeur"
+
+        tasks = [asyncio.create_task(cache.aget_or_compute("q", compute)) for _ in range(5)]
+        while cache.stats()["coalesced"] < 4:
+            await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(main()) == ["valeur"] * 5
+    assert len(calls) == 1
+
+
+def test_sync_caller_waits_for_async_computation():
+    cache = TTLCache("test")
+    release = threading.Event()
+    sync_compute = Counter("calcul synchrone")
+    results = []
+
+    async def main():
+        async def compute():
+            await asyncio.get_running_loop().run_in_executor(None, release.wait, 5)
+            return "valeur"
+
+        task = asyncio.create_task(cache.aget_or_compute("q", compute))
+        await asyncio.sleep(0)
+        thread = threading.Thread(target=lambda: results.append(cache.get_or_compute("q", sync_compute)))
+        thread.start()
+        while cache.stats()["coalesced"] < 1:
+            await asyncio.sleep(0.001)
+        release.set()
+        value = await task
+        thread.join(5)
+        return value
+
+    assert asyncio.run(main()) == "valeur"
+    assert results == ["valeur"]
+    assert sync_compute.calls == 0
@@ -0,0 +1,113 @@
+"""
+Empreintes des statistiques : normalisation par 90 minutes et tolérances de `has_materially_changed`
+"""
+
+import math
+
+import pytest
+
+from stats_fingerprint import (
+    MINUTES_COLUMN, NINETIES_COLUMN, compute_fingerprint, has_materially_changed
+)
+
+GOALS = "Per 90 Minutes_Gls_standard"      # rate : 0.10 absolu, 25 % relatif
+CARRIES = "Progression_PrgC_standard"      # count : ramené à 90 minutes, 0.50 absolu, 20 % relatif
+PASS_PCT = "Total_Cmp%_passing"            # pct : 3 points
+
+
+def stats(**overrides) -> dict:
+    row = {
+        "player": "Joueur",
+        MINUTES_COLUMN: 1800,
+        NINETIES_COLUMN: 20.0,
+        GOALS: 0.5,
+        CARRIES: 40,
+        PASS_PCT: 80.0,
+    }
+    row.update(overrides)
+    return row
+
+
+def changed(old_row: dict, new_row: dict) -> bool:
+    return has_materially_changed(compute_fingerprint(old_row), compute_fingerprint(new_row))
+
+
+def test_compute_fingerprint_metrics():
+    fingerprint = compute_fingerprint(stats())
+    assert fingerprint["metrics"] == {MINUTES_COLUMN: 1800, GOALS: 0.5, CARRIES: 2.0, PASS_PCT: 80.0}
+
+
+def test_compute_fingerprint_ignores_text_and_nan():
+    base = compute_fingerprint(stats())
+    assert compute_fingerprint(stats(player="Autre nom", team=None))["hash"] == base["hash"]
+    assert compute_fingerprint(stats(xG=math.nan))["hash"] == base["hash"]
+    assert compute_fingerprint(stats(**{GOALS: "n/a"}))["metrics"].get(GOALS) is None
+
+
+def test_compute_fingerprint_hash_rounds_to_three_decimals():
+    assert compute_fingerprint(stats(**{GOALS: 0.5001}))["hash"] == compute_fingerprint(stats())["hash"]
+    assert compute_fingerprint(stats(**{GOALS: 0.502}))["hash"] != compute_fingerprint(stats())["hash"]
+
+
+def test_count_metric_without_minutes_played():
+    assert compute_fingerprint(stats(**{NINETIES_COLUMN: 0}))["metrics"][CARRIES] == 0.0
+
+
+def test_identical_hash_is_unchanged():
+    assert not changed(stats(), stats())
+
+
+def test_small_noise_is_not_material():
+    # Le hash change mais chaque métrique reste dans sa tolérance
+    assert not changed(stats(), stats(**{GOALS: 0.6, CARRIES: 44, PASS_PCT: 82.5}))
+
+
+@pytest.mark.parametrize("column, before, after, expected", [
+    # rate : seuil max(0.10, 25 % de 0.5 = 0.125)
+    (GOALS, 0.5, 0.62, False),
+    (GOALS, 0.5, 0.63, True),
+    (GOALS, 0.5, 0.37, True),
+    # petite valeur : la tolérance absolue domine
+    (GOALS, 0.1, 0.19, False),
+    (GOALS, 0.1, 0.21, True),
+    # pct : 3 points, sans tolérance relative
+    (PASS_PCT, 80.0, 82.9, False),
+    (PASS_PCT, 80.0, 83.5, True),
+])
+def test_metric_tolerances(column, before, after, expected):
+    assert changed(stats(**{column: before}), stats(**{column: after})) is expected
+
+
+@pytest.mark.parametrize("carries, expected", [
+    (49, False),  # 2.45 / 90 : +0.45 < 0.50
+    (51, True),   # 2.55 / 90 : +0.55 > 0.50
+])
+def test_count_metric_is_compared_per_90(carries, expected):
+    assert changed(stats(), stats(**{CARRIES: carries})) is expected
+
+
+def test_more_matches_with_same_rate_is_not_material():
+    # Deux fois plus de progressions en deux fois plus de matchs : même profil par 90 minutes
+    old = stats(**{MINUTES_COLUMN: 1800, NINETIES_COLUMN: 20.0, CARRIES: 40})
+    new = stats(**{MINUTES_COLUMN: 2300, NINETIES_COLUMN: 25.6, CARRIES: 51})
+    assert not changed(old, new)
+
+
+@pytest.mark.parametrize("before, after, expected", [
+    (1800, 2300, False),  # +500 < 30 % de 1800
+    (1800, 2400, True),   # +600 > 540
+    (1800, 900, False),   # une baisse du temps de jeu ne suffit pas
+    (30, 55, False),      # en deçà de 90 minutes, seuil de 27 minutes
+    (30, 60, True),
+])
+def test_minutes_played_tolerance(before, after, expected):
+    old = stats(**{MINUTES_COLUMN: before})
+    new = stats(**{MINUTES_COLUMN: after})
+    assert changed(old, new) is expected
+
+
+def test_metric_missing_on_one_side_is_ignored():
+    new = stats()
+    del new[GOALS]
+    assert not changed(stats(), new)
+    assert changed(stats(), stats(**{GOALS: 1.0}))
@@ -0,0 +1,98 @@
+"""
+Génération concurrente des résumés contre le serveur OpenAI factice (aucun appel réseau externe)
+"""
+
+import threading
+
+import pytest
+from openai import AsyncOpenAI
+
+from fake_openai_server import FAKE_SUMMARY, make_server
+from summary_generator import AsyncSummaryGenerator
+from summary_journal import SummaryJournal
+
+
+@pytest.fixture
+def fake_openai():
+    """Démarre un serveur factice sur un port libre : appeler avec ses options (RPM, erreurs...)"""
+    servers = []
+
+    def start(**options):
+        server = make_server(port=0, latency=0.0, **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """Reprises sans attente exponentielle (le Retry-After des 429 reste respecté)"""
+    monkeypatch.setattr(AsyncSummaryGenerator, "_backoff", staticmethod(lambda attempt, base=1.0, cap=60.0: 0.01))
+
+
+def make_generator(server, **kwargs) -> AsyncSummaryGenerator:
+    client = AsyncOpenAI(
+        api_key="test", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1", max_retries=0
+    )
+    options = {"max_concurrency": 4, "rpm": 6000, "tpm": 10_000_000, "max_retries": 10}
+    options.update(kwargs)
+    return AsyncSummaryGenerator(client, model="fake", **options)
+
+
+def prompts(n: int) -> dict:
+    return {f"Joueur {i} (Club)": f"Statistiques du joueur {i}" for i in range(n)}
+
+
+def test_generates_all_summaries_through_429_and_errors(fake_openai):
+    # 4 requêtes par demi-seconde : les 4 workers dépassent la limite et reçoivent des 429
+    server = fake_openai(rate_limit_rpm=4, rate_window=0.5, error_rate=0.2, seed=3)
+    generator = make_generator(server)
+
+    results = generator.run(prompts(12))
+
+    counters = server.RequestHandlerClass.state.counters
+    stats = generator.stats
+    assert results == {key: FAKE_SUMMARY for key in prompts(12)}
+    assert (stats.completed, stats.failed) == (12, 0)
+    assert counters["completions"] == 12
+    assert counters["rate_limited"] > 0
+    assert counters["errors"] > 0
+    assert stats.rate_limited == counters["rate_limited"]
+    # Chaque 429 et chaque 500 a donné lieu à une reprise
+    assert stats.retries == counters["rate_limited"] + counters["errors"]
+    assert stats.prompt_tokens > 0 and stats.completion_tokens > 0
+
+
+def test_journal_records_results_and_releases_failures(fake_openai, tmp_path):
+    server = fake_openai(error_rate=0.3, seed=5)
+    generator = make_generator(server, max_retries=0)
+    journal = SummaryJournal(tmp_path / "journal.sqlite", sync="off", owner="generateur")
+    keys = list(prompts(10))
+
+    # Même enchaînement que le pipeline : lots réservés, résultats journalisés, échecs libérés
+    remaining = list(keys)
+
+    def next_chunk():
+        nonlocal remaining
+        claimed = journal.claim(remaining, limit=4)
+        remaining = [key for key in remaining if key not in claimed]
+        return {key: prompts(10)[key] for key in claimed}
+
+    results = generator.run_chunks(next_chunk, on_result=journal.record, on_failure=journal.release)
+
+    failed = [key for key in keys if key not in results]
+    assert failed and results
+    assert generator.stats.failed == len(failed) == server.RequestHandlerClass.state.counters["errors"]
+    assert journal.completed() == results
+
+    # Aucun bail ne reste : un autre processus reprend exactement les échecs
+    other = SummaryJournal(tmp_path / "journal.sqlite", sync="off", owner="autre")
+    assert other.pending_claims() == 0
+    assert sorted(other.claim(keys, limit=len(keys))) == sorted(failed)
+    other.close()
+    journal.close()
@@ -0,0 +1,155 @@
+"""
+Journal SQLite des résumés : réservations entre processus, expiration des baux, compaction
+"""
+
+import json
+
+import pytest
+
+import summary_journal
+from summary_journal import SummaryJournal
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Horloge contrôlée par le test (time.time du module)"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(summary_journal.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return tmp_path / "player_summaries.journal.sqlite"
+
+
+def open_journal(path, owner, **kwargs):
+    return SummaryJournal(path, sync="off", owner=owner, **kwargs)
+
+
+def test_record_and_reopen(journal_path):
+    journal = open_journal(journal_path, "a")
+    journal.record("p1", "Résumé 1", fingerprint={"hash": "h1", "metrics": {"x": 1.0}})
+    journal.record("p2", "Résumé 2")
+    journal.close()
+
+    reopened = open_journal(journal_path, "b")
+    assert len(reopened) == 2
+    assert reopened.completed() == {"p1": "Résumé 1", "p2": "Résumé 2"}
+    assert reopened.fingerprints() == {"p1": {"hash": "h1", "metrics": {"x": 1.0}}}
+    reopened.close()
+
+
+def test_claims_are_exclusive_between_owners(journal_path, clock):
+    a = open_journal(journal_path, "a")
+    b = open_journal(journal_path, "b")
+    keys = ["p1", "p2", "p3", "p4"]
+
+    assert a.claim(keys, limit=2) == ["p1", "p2"]
+    assert b.claim(keys, limit=10) == ["p3", "p4"]
+    assert a.claim(keys, limit=10) == ["p1", "p2"]  # ses propres réservations restent à lui
+    assert a.pending_claims() == 2
+    assert b.pending_claims() == 2
+    a.close()
+    b.close()
+
+
+def test_recorded_summaries_are_not_claimed_again(journal_path, clock):
+    a = open_journal(journal_path, "a")
+    b = open_journal(journal_path, "b")
+
+    assert a.claim(["p1", "p2"], limit=10) == ["p1", "p2"]
+    a.record("p1", "Résumé 1")
+    a.release(["p2"])
+
+    assert a.pending_claims() == 0
+    assert b.pending_claims() == 0
+    assert b.claim(["p1", "p2"], limit=10) == ["p2"]
+    a.close()
+    b.close()
+
+
+def test_expired_lease_can_be_taken_over(journal_path, clock):
+    a = open_journal(journal_path, "a", lease_seconds=60)
+    b = open_journal(journal_path, "b")
+
+    assert a.claim(["p1"], limit=1) == ["p1"]
+    clock[0] += 59
+    assert b.claim(["p1"], limit=1) == []
+    assert b.pending_claims() == 1
+
+    clock[0] += 2
+    assert b.pending_claims() == 0
+    assert b.claim(["p1"], limit=1) == ["p1"]
+    assert a.claim(["p1"], limit=1) == []
+    a.close()
+    b.close()
+
+
+def test_release_any_owner(journal_path, clock):
+    a = open_journal(journal_path, "a")
+    b = open_journal(journal_path, "b")
+
+    a.claim(["p1"], limit=1)
+    b.release(["p1"])
+    assert b.claim(["p1"], limit=1) == []
+
+    b.release(["p1"], any_owner=True)
+    assert b.claim(["p1"], limit=1) == ["p1"]
+    a.close()
+    b.close()
+
+
+def test_changed_fingerprint_is_claimed_again(journal_path, clock):
+    journal = open_journal(journal_path, "a")
+    journal.record("p1", "Résumé 1", fingerprint={"hash": "old", "metrics": {}})
+    journal.record("p2", "Résumé 2", fingerprint={"hash": "same", "metrics": {}})
+
+    fingerprints = {"p1": {"hash": "new"}, "p2": {"hash": "same"}}
+    assert journal.claim(["p1", "p2"], limit=10, fingerprints=fingerprints) == ["p1"]
+    journal.close()
+
+
+def test_newer_than_regenerates_older_summaries(journal_path, clock):
+    journal = open_journal(journal_path, "a")
+    journal.record("p1", "Ancien résumé")
+    clock[0] += 10
+    started = clock[0]
+    journal.record("p2", "Nouveau résumé")
+
+    assert journal.claim(["p1", "p2"], limit=10, newer_than=started) == ["p1"]
+    journal.close()
+
+
+def test_compact_merges_into_existing_json(journal_path, tmp_path):
+    json_path = tmp_path / "player_summaries.json"
+    json_path.write_text(json.dumps({"p0": "Résumé 0", "p1": "Ancien résumé"}), encoding="utf-8")
+
+    journal = open_journal(journal_path, "a")
+    journal.record("p1", "Résumé 1")
+    journal.record("p2", "Résumé 2")
+    merged = journal.compact(json_path)
+
+    expected = {"p0": "Résumé 0", "p1": "Résumé 1", "p2": "Résumé 2"}
+    assert merged == expected
+    assert json.loads(json_path.read_text(encoding="utf-8")) == expected
+    assert not json_path.with_suffix(".json.tmp").exists()
+    # Les entrées restent journalisées : un autre processus ne les réserve pas
+    assert len(journal) == 2
+    assert journal.claim(["p1", "p2", "p3"], limit=10) == ["p3"]
+    journal.close()
+
+
+def test_successive_compactions_do_not_overwrite_each_other(tmp_path):
+    json_path = tmp_path / "player_summaries.json"
+    a = open_journal(tmp_path / "a.sqlite", "a")
+    b = open_journal(tmp_path / "b.sqlite", "b")
+    a.record("p1", "Résumé 1")
+    b.record("p2", "Résumé 2")
+
+    a.compact(json_path)
+    b.compact(json_path)
+
+    assert json.loads(json_path.read_text(encoding="utf-8")) == {"p1": "Résumé 1", "p2": "Résumé 2"}
+    a.close()
+    b.close()